@@ -0,0 +1,42 @@
+"""
+Microbenchmark: lei-lookup.com record page extraction.
+
+    python benchmarks/bench_fallback_parse.py [-n 200]
+
+Compares the lxml/XPath fast path with the original BeautifulSoup get_text path
+over the saved pages in benchmarks/samples/.
+"""
+from __future__ import annotations
+
+import argparse
+import timeit
+from pathlib import Path
+
+from lei_enricher.core import parse_fallback_html, parse_fallback_html_soup
+
+SAMPLES = Path(__file__).parent / "samples"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=200)
+    args = parser.parse_args()
+
+    for page in sorted(SAMPLES.glob("*.html")):
+        html = page.read_text(encoding="utf-8")
+        fast = parse_fallback_html(html)
+        slow = parse_fallback_html_soup(html)
+        assert fast == slow, (page.name, fast, slow)
+
+        t_fast = timeit.timeit(lambda: parse_fallback_html(html), number=args.number) / args.number
+        t_slow = (
+            timeit.timeit(lambda: parse_fallback_html_soup(html), number=args.number) / args.number
+        )
+        print(
+            f"{page.name:28s} {len(html):>8d} B  lxml {t_fast * 1e3:7.3f} ms  "
+            f"soup {t_slow * 1e3:7.3f} ms  x{t_slow / t_fast:5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
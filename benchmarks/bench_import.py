@@ -0,0 +1,78 @@
+"""
+Startup import benchmark, based on `python -X importtime`.
+
+    python -m benchmarks.bench_import                      # GUI startup
+    python -m benchmarks.bench_import --module lei_enricher.cli --budget-ms 150
+
+Each run imports the module in a fresh interpreter and reports the cumulative
+import time (median of --repeat runs) and which heavy dependencies it pulled in.
+Exits non-zero when the budget is exceeded or a deferred dependency was loaded.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Loaded on the first job / first fallback page, never at startup
+DEFERRED = ("pandas", "numpy", "requests", "urllib3", "lxml", "bs4", "openpyxl", "pyarrow")
+
+# Cumulative import time allowed per entry point (ms); PySide6 itself is most of the GUI's
+BUDGET_MS = {"lei_enricher.gui": 600.0, "lei_enricher.cli": 100.0}
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """module -> cumulative import time in microseconds."""
+    out: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        out[name.strip()] = int(cumulative)
+    return out
+
+
+def measure_imports(module: str) -> Tuple[float, List[str]]:
+    """(cumulative ms for `module`, deferred top-level packages it imported)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = parse_importtime(proc.stderr)
+    loaded = sorted({name.split(".")[0] for name in times} & set(DEFERRED))
+    return times.get(module, 0) / 1000, loaded
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    p.add_argument("--module", default="lei_enricher.gui")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--budget-ms", type=float, help="Default: per-module budget in BUDGET_MS")
+    args = p.parse_args()
+
+    runs = [measure_imports(args.module) for _ in range(args.repeat)]
+    median_ms = statistics.median(ms for ms, _ in runs)
+    loaded = runs[-1][1]
+    budget = args.budget_ms if args.budget_ms is not None else BUDGET_MS.get(args.module)
+
+    report = {
+        "module": args.module,
+        "import_ms_median": round(median_ms, 1),
+        "import_ms_runs": [round(ms, 1) for ms, _ in runs],
+        "budget_ms": budget,
+        "deferred_loaded": loaded,
+    }
+    print(json.dumps(report, indent=2))
+    if loaded or (budget is not None and median_ms > budget):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Synthetic input generator.
+
+    python -m benchmarks.generate out.csv --rows 1000000 --dup-ratio 0.6 --invalid-ratio 0.02
+
+`dup-ratio` is the share of rows that repeat an LEI already used; `invalid-ratio`
+the share of rows with a malformed or checksum-failing LEI.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import random
+import string
+from pathlib import Path
+from typing import Iterator, List
+
+_ALNUM = string.digits + string.ascii_uppercase
+
+
+def make_lei(rng: random.Random) -> str:
+    """Random LEI with valid ISO 17442 check digits."""
+    base = "".join(rng.choice(_ALNUM) for _ in range(18))
+    n = int("".join(str(int(c, 36)) for c in base + "00"))
+    return f"{base}{98 - n % 97:02d}"
+
+
+def make_invalid(rng: random.Random) -> str:
+    lei = make_lei(rng)
+    kind = rng.random()
+    if kind < 0.4:
+        # flip a check digit: right shape, wrong checksum
+        return lei[:-1] + str((int(lei[-1]) + 1) % 10)
+    if kind < 0.7:
+        return lei[:12]
+    if kind < 0.85:
+        return lei[:10] + "-" + lei[11:]
+    return ""
+
+
+def iter_rows(
+    rows: int, dup_ratio: float, invalid_ratio: float, seed: int = 0
+) -> Iterator[List[str]]:
+    rng = random.Random(seed)
+    used: List[str] = []
+    for i in range(rows):
+        roll = rng.random()
+        if roll < invalid_ratio:
+            lei = make_invalid(rng)
+        elif used and roll < invalid_ratio + dup_ratio:
+            lei = rng.choice(used)
+        else:
+            lei = make_lei(rng)
+            used.append(lei)
+        # messy-but-normalizable formatting, like real sheets
+        if lei and rng.random() < 0.05:
+            lei = f" {lei.lower()} "
+        yield [f"Counterparty {i}", lei, f"{rng.randint(1, 10_000_000)}"]
+
+
+HEADER = ["Counterparty", "LEI", "Exposure"]
+
+
+def generate_input(
+    path: str, rows: int, dup_ratio: float = 0.5, invalid_ratio: float = 0.01, seed: int = 0
+) -> str:
+    suffix = Path(path).suffix.lower()
+    data = iter_rows(rows, dup_ratio, invalid_ratio, seed)
+    if suffix == ".csv":
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            w = csv.writer(fh)
+            w.writerow(HEADER)
+            w.writerows(data)
+    elif suffix == ".xlsx":
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        ws.append(HEADER)
+        for row in data:
+            ws.append(row)
+        wb.save(path)
+    else:
+        raise ValueError(f"Unsupported benchmark input type: {suffix}")
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--dup-ratio", type=float, default=0.5)
+    parser.add_argument("--invalid-ratio", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_input(args.path, args.rows, args.dup_ratio, args.invalid_ratio, args.seed)
+    print(args.path)
+
+
+if __name__ == "__main__":
+    main()
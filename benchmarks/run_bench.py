@@ -0,0 +1,120 @@
+"""
+End-to-end pipeline benchmark against the local stand-in server (fully offline).
+
+    python -m benchmarks.run_bench --rows 100000 --format xlsx --latency 0.05 --gleif-workers 4
+
+Reports rows/s, peak RSS and HTTP request counts as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from lei_enricher.engine import EnrichEngine, JobConfig
+
+from .generate import generate_input
+from .standin import StandinConfig, StandinServer
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:   # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_benchmark(args: argparse.Namespace, workdir: Path) -> dict:
+    src = workdir / f"input.{args.format}"
+    t0 = time.perf_counter()
+    generate_input(str(src), args.rows, args.dup_ratio, args.invalid_ratio, args.seed)
+    gen_s = time.perf_counter() - t0
+
+    standin = StandinConfig(
+        latency_s=args.latency,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        unknown_ratio=args.unknown_ratio,
+        seed=args.seed,
+    )
+    with StandinServer(standin) as srv:
+        cfg = JobConfig(
+            input_path=str(src),
+            output_path=str(workdir / f"output.{args.format}"),
+            sheet=None,
+            lei_col=None,
+            status_col="Entity Status",
+            renewal_col="Next Renewal Date",
+            cache_db=str(workdir / "cache.sqlite"),
+            cache_days=14,
+            gleif_batch_size=args.batch_size,
+            gleif_throttle_s=args.gleif_throttle,
+            fallback_enabled=args.fallback,
+            fallback_throttle_s=args.fallback_throttle,
+            gleif_workers=args.gleif_workers,
+            fallback_workers=args.fallback_workers,
+            stream_chunk_rows=args.stream_chunk_rows,
+            gleif_lean=not args.full_records,
+            gleif_base_url=srv.gleif_url,
+            fallback_base_url=srv.fallback_url,
+        )
+        engine = EnrichEngine(cfg)
+        t0 = time.perf_counter()
+        engine.run()
+        run_s = time.perf_counter() - t0
+        requests_by_kind = dict(srv.counts)
+
+    return {
+        "rows": args.rows,
+        "format": args.format,
+        "generate_seconds": round(gen_s, 3),
+        "run_seconds": round(run_s, 3),
+        "rows_per_second": round(args.rows / run_s, 1) if run_s else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "http_requests": requests_by_kind,
+        "metrics": engine.metrics.to_dict(),
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    p.add_argument("--rows", type=int, default=10_000)
+    p.add_argument("--format", choices=("csv", "xlsx"), default="csv")
+    p.add_argument("--dup-ratio", type=float, default=0.5)
+    p.add_argument("--invalid-ratio", type=float, default=0.01)
+    p.add_argument("--unknown-ratio", type=float, default=0.02)
+    p.add_argument("--latency", type=float, default=0.02, help="Stand-in latency per request (s)")
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--rate-429", type=float, default=0.0)
+    p.add_argument("--batch-size", type=int, default=200)
+    p.add_argument("--gleif-throttle", type=float, default=0.0)
+    p.add_argument("--gleif-workers", type=int, default=1)
+    p.add_argument("--full-records", action="store_true", help="Disable the sparse GLEIF fieldset")
+    p.add_argument("--fallback", action="store_true")
+    p.add_argument("--fallback-throttle", type=float, default=0.0)
+    p.add_argument("--fallback-workers", type=int, default=1)
+    p.add_argument("--stream-chunk-rows", type=int, default=0)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", help="Also write the report to this JSON file")
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report = run_benchmark(args, Path(tmp))
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Local stand-in for the GLEIF API and lei-lookup.com, for offline benchmarks and tests.
+
+    with StandinServer(latency_s=0.05, error_rate=0.01) as srv:
+        cfg.gleif_base_url = srv.gleif_url
+        cfg.fallback_base_url = srv.fallback_url
+
+Every LEI is "known" unless it hashes into `unknown_ratio`; answers are deterministic.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# as in the real API: entity.status is only ACTIVE / INACTIVE, lifecycle is registration.status
+STATUSES = ("ACTIVE", "ACTIVE", "ACTIVE", "INACTIVE")
+REGISTRATION_STATUSES = ("ISSUED", "ISSUED", "ISSUED", "LAPSED", "RETIRED")
+
+
+@dataclass
+class StandinConfig:
+    latency_s: float = 0.0          # added to every response
+    error_rate: float = 0.0         # share of requests answered with 503
+    rate_429: float = 0.0           # share of requests answered with 429
+    retry_after: str = "0"          # Retry-After header sent with 429s
+    unknown_ratio: float = 0.0      # share of LEIs GLEIF doesn't know
+    fallback_hit_ratio: float = 1.0  # share of unknown LEIs the fallback page resolves
+    seed: int = 0
+    # extra (lei -> record attributes) merged into GLEIF answers, e.g. relationships
+    extra: Dict[str, dict] = field(default_factory=dict)
+    # child LEI -> (direct parent, ultimate parent), served as relationship-records
+    parents: Dict[str, Tuple[Optional[str], Optional[str]]] = field(default_factory=dict)
+
+
+def _bucket(lei: str) -> float:
+    return (zlib.crc32(lei.encode("ascii")) % 10_000) / 10_000
+
+
+def record_for(lei: str) -> dict:
+    h = zlib.crc32(lei.encode("ascii"))
+    return {
+        "status": STATUSES[h % len(STATUSES)],
+        "registration_status": REGISTRATION_STATUSES[h // 7 % len(REGISTRATION_STATUSES)],
+        "renewal": f"{2025 + h % 3}-{1 + h % 12:02d}-{1 + h % 28:02d}",
+    }
+
+
+def _address(lei: str, kind: str) -> dict:
+    return {
+        "language": "en",
+        "addressLines": [f"{kind} {lei[:4]} Street 1", "Floor 2"],
+        "city": "Athens",
+        "region": "GR-I",
+        "country": "GR",
+        "postalCode": "10557",
+    }
+
+
+def gleif_item(lei: str, extra: Optional[dict] = None, fields: Optional[List[str]] = None) -> dict:
+    """A record shaped (and sized) like the real API's; `fields` = JSON:API sparse fieldset."""
+    rec = record_for(lei)
+    attrs = {
+        "lei": lei,
+        "entity": {
+            "status": rec["status"],
+            "legalName": {"name": f"Entity {lei[:6]}", "language": "en"},
+            "otherNames": [
+                {
+                    "name": f"Entity {lei[:6]} Holdings",
+                    "language": "en",
+                    "type": "TRADING_OR_OPERATING_NAME",
+                }
+            ],
+            "legalAddress": _address(lei, "Legal"),
+            "headquartersAddress": _address(lei, "HQ"),
+            "registeredAt": {"id": "RA000260", "other": None},
+            "registeredAs": lei[4:12],
+            "jurisdiction": "GR",
+            "category": "GENERAL",
+            "legalForm": {"id": "GR001", "other": None},
+        },
+        "registration": {
+            "initialRegistrationDate": "2014-01-10T00:00:00Z",
+            "lastUpdateDate": "2024-01-10T00:00:00Z",
+            "status": rec["registration_status"],
+            "nextRenewalDate": f"{rec['renewal']}T00:00:00Z",
+            "managingLou": "213800WAVVOPS85N2205",
+            "corroborationLevel": "FULLY_CORROBORATED",
+        },
+        "bic": None,
+        "mic": None,
+        "ocid": None,
+        "spglobal": [],
+        "conformityFlag": "CONFORMING",
+    }
+    if fields:
+        attrs = {k: v for k, v in attrs.items() if k in fields}
+    item = {"type": "lei-records", "id": lei, "attributes": attrs}
+    if extra:
+        item.update(extra)
+    return item
+
+
+def relationship_item(child: str, kind: str, parent: str) -> dict:
+    return {
+        "type": "relationship-records",
+        "id": f"{child}_{parent}_{kind}",
+        "attributes": {
+            "relationship": {
+                "startNode": {"id": child, "type": "LEI"},
+                "endNode": {"id": parent, "type": "LEI"},
+                "type": kind,
+                "status": "ACTIVE",
+            },
+            "registration": {"registrationStatus": "PUBLISHED"},
+        },
+    }
+
+
+def fallback_page(lei: str) -> str:
+    rec = record_for(lei)
+    return (
+        "<html><body><h1>LEI record</h1><dl>"
+        f"<dt>LEI code</dt><dd>{lei}</dd>"
+        f"<dt>Entity status.</dt><dd>{rec['status']}</dd>"
+        f"<dt>Next renewal date,</dt><dd>{rec['renewal']}</dd>"
+        "</dl></body></html>"
+    )
+
+
+class StandinServer:
+    def __init__(self, config: Optional[StandinConfig] = None, **overrides) -> None:
+        self.config = config or StandinConfig(**overrides)
+        self.counts: Counter = Counter()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def gleif_url(self) -> str:
+        return self.base_url + "/api/v1"
+
+    @property
+    def fallback_url(self) -> str:
+        return self.base_url
+
+    def known(self, lei: str) -> bool:
+        return _bucket(lei) >= self.config.unknown_ratio
+
+    def _inject(self) -> Optional[int]:
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.config.rate_429:
+            return 429
+        if roll < self.config.rate_429 + self.config.error_rate:
+            return 503
+        return None
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def start(self) -> "StandinServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:   # keep benchmark output clean
+                pass
+
+            def _send(
+                self, status: int, body: bytes, ctype: str, headers: Optional[dict] = None
+            ) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                if server.config.latency_s:
+                    time.sleep(server.config.latency_s)
+
+                if url.path.rstrip("/").endswith("/lei-records"):
+                    kind = "gleif"
+                elif url.path.rstrip("/").endswith("/relationship-records"):
+                    kind = "relationships"
+                elif url.path.startswith("/record/"):
+                    kind = "fallback"
+                else:
+                    server._count("other")
+                    self._send(404, b"", "text/plain")
+                    return
+
+                server._count(kind)
+                injected = server._inject()
+                if injected == 429:
+                    server._count("429")
+                    self._send(429, b"", "text/plain", {"Retry-After": server.config.retry_after})
+                    return
+                if injected:
+                    server._count("5xx")
+                    self._send(injected, b"", "text/plain")
+                    return
+
+                if kind == "gleif":
+                    self._gleif(url)
+                elif kind == "relationships":
+                    self._relationships(url)
+                else:
+                    self._fallback(url)
+
+            def _gleif(self, url) -> None:
+                query = parse_qs(url.query)
+                leis: List[str] = query.get("filter[lei]", [""])[0].split(",")
+                sparse = query.get("fields[lei-records]")
+                fields = sparse[0].split(",") if sparse else None
+                data = [
+                    gleif_item(lei, server.config.extra.get(lei), fields)
+                    for lei in leis if lei and server.known(lei)
+                ]
+                body = json.dumps(
+                    {"data": data, "meta": {"pagination": {"total": len(data)}}}
+                ).encode()
+                if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                    self._send(
+                        200,
+                        gzip.compress(body),
+                        "application/vnd.api+json",
+                        {"Content-Encoding": "gzip"},
+                    )
+                    return
+                self._send(200, body, "application/vnd.api+json")
+
+            def _relationships(self, url) -> None:
+                query = parse_qs(url.query)
+                children = query.get("filter[startNode.id]", [""])[0].split(",")
+                data = []
+                for child in children:
+                    direct, ultimate = server.config.parents.get(child, (None, None))
+                    if direct:
+                        data.append(relationship_item(child, "IS_DIRECTLY_CONSOLIDATED_BY", direct))
+                    if ultimate:
+                        data.append(
+                            relationship_item(child, "IS_ULTIMATELY_CONSOLIDATED_BY", ultimate)
+                        )
+                body = json.dumps({"data": data, "meta": {"pagination": {"total": len(data)}}})
+                self._send(200, body.encode(), "application/vnd.api+json")
+
+            def _fallback(self, url) -> None:
+                lei = url.path.strip("/").split("/")[-1]
+                if _bucket(lei[::-1]) >= server.config.fallback_hit_ratio:
+                    self._send(200, b"<html><body>Record not found</body></html>", "text/html")
+                    return
+                self._send(200, fallback_page(lei).encode(), "text/html")
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -1,9 +1,47 @@
 from __future__ import annotations
 
 import sqlite3
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Optional
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .core import LeiParents, LeiResult
+    from .metrics import RunMetrics
+
+# Stay well under SQLITE_MAX_VARIABLE_NUMBER on old builds (999)
+_IN_CHUNK = 500
+
+_UPSERT_SQL = """
+    INSERT INTO lei_cache(
+      lei, entity_status, next_renewal_date, source, fetched_at, registration_status
+    )
+    VALUES(?,?,?,?,?,?)
+    ON CONFLICT(lei) DO UPDATE SET
+      entity_status=excluded.entity_status,
+      next_renewal_date=excluded.next_renewal_date,
+      source=excluded.source,
+      fetched_at=excluded.fetched_at,
+      registration_status=excluded.registration_status,
+      miss_reason=NULL
+"""
+
+# Negative entries: rows with a miss_reason and no data, kept for a shorter TTL
+_UPSERT_MISS_SQL = """
+    INSERT INTO lei_cache(lei, entity_status, next_renewal_date, source, fetched_at, miss_reason)
+    VALUES(?,NULL,NULL,?,?,?)
+    ON CONFLICT(lei) DO UPDATE SET
+      entity_status=NULL,
+      next_renewal_date=NULL,
+      registration_status=NULL,
+      source=excluded.source,
+      fetched_at=excluded.fetched_at,
+      miss_reason=excluded.miss_reason
+"""
+
+MISS_NOT_FOUND = "not_found"            # GLEIF returned nothing for the LEI
+MISS_INVALID = "invalid"                # GLEIF rejected the LEI on its own
+MISS_FALLBACK_EMPTY = "fallback_empty"  # fallback page had neither field
 
 
 @dataclass
@@ -12,11 +50,106 @@ class CachedLei:
     next_renewal_date: Optional[str]
     source: Optional[str]
     fetched_at: str
+    registration_status: Optional[str] = None
+
+
+def _parse_utc(value: Optional[str]) -> Optional[datetime]:
+    """ISO date/datetime (GLEIF uses ...T00:00:00Z) -> naive UTC, like fetched_at."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+@dataclass
+class TtlPolicy:
+    """
+    Freshness derived from the record itself: long TTL while the next renewal
+    is far away, short once it is near or past, fixed TTL per registration
+    status (GLEIF registration.status; entity.status is only ACTIVE/INACTIVE).
+    """
+
+    default_days: float = 14        # no renewal date known
+    max_days: float = 90            # cap for records renewing far in the future
+    min_days: float = 1             # renewal near or past
+    near_renewal_days: float = 30   # "near" window before next_renewal_date
+    status_days: Dict[str, float] = field(
+        default_factory=lambda: {
+            "LAPSED": 3,
+            "RETIRED": 180,
+            "ANNULLED": 180,
+            "MERGED": 180,
+            "DUPLICATE": 180,
+        }
+    )
+
+    def ttl_days(
+        self, registration_status: Optional[str], next_renewal_date: Optional[str], now: datetime
+    ) -> float:
+        status = (registration_status or "").strip().upper()
+        if status in self.status_days:
+            return self.status_days[status]
+
+        renewal = _parse_utc(next_renewal_date)
+        if renewal is None:
+            return self.default_days
+
+        days_left = (renewal - now).total_seconds() / 86400
+        if days_left <= self.near_renewal_days:
+            return self.min_days
+        # don't trust the entry past the point where the renewal window opens
+        return max(self.min_days, min(self.max_days, days_left - self.near_renewal_days))
+
+
+def _age_days(fetched_at: str, now: datetime) -> Optional[float]:
+    try:
+        fetched_dt = datetime.fromisoformat(fetched_at)
+    except Exception:
+        return None
+    return (now - fetched_dt).total_seconds() / 86400
+
+
+def _min_ttl_days(max_age_days: float, policy: Optional[TtlPolicy]) -> float:
+    if policy is None:
+        return max_age_days
+    return min([policy.min_days, policy.default_days, *policy.status_days.values()])
+
+
+AGE_BUCKETS = ((1, "<1d"), (7, "1-7d"), (14, "7-14d"), (30, "14-30d"), (90, "30-90d"))
+
+
+def _age_bucket(age: float) -> str:
+    for upper, label in AGE_BUCKETS:
+        if age < upper:
+            return label
+    return ">90d"
+
+
+def _fresh(fetched_at: str, max_age_days: int, now: datetime) -> bool:
+    age = _age_days(fetched_at, now)
+    return age is not None and age <= max_age_days
 
 
 class LeiCache:
-    def __init__(self, db_path: str) -> None:
-        self.conn = sqlite3.connect(db_path)
+    def __init__(
+        self,
+        db_path: str,
+        wal: bool = False,
+        metrics: Optional["RunMetrics"] = None,
+        check_same_thread: bool = True,
+    ) -> None:
+        self.metrics = metrics
+        # check_same_thread=False: the caller serializes access across threads itself
+        self.conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+        if wal:
+            # Readers don't block the writer and commits skip the full fsync
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
         self.conn.execute(
             """
             CREATE TABLE IF NOT EXISTS lei_cache (
@@ -24,41 +157,287 @@ class LeiCache:
               entity_status TEXT,
               next_renewal_date TEXT,
               source TEXT,
+              fetched_at TEXT,
+              miss_reason TEXT,
+              registration_status TEXT
+            )
+            """
+        )
+        cols = {row[1] for row in self.conn.execute("PRAGMA table_info(lei_cache)")}
+        if "miss_reason" not in cols:
+            # caches created before negative caching
+            self.conn.execute("ALTER TABLE lei_cache ADD COLUMN miss_reason TEXT")
+        if "registration_status" not in cols:
+            # caches created before the registration-status TTL
+            self.conn.execute("ALTER TABLE lei_cache ADD COLUMN registration_status TEXT")
+        # parent edges (None = no parent reported), with their own TTL
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS lei_relationships (
+              lei TEXT PRIMARY KEY,
+              direct_parent TEXT,
+              ultimate_parent TEXT,
               fetched_at TEXT
             )
             """
         )
+        # refresh planning / stats scan by age and renewal date
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_lei_cache_fetched_at ON lei_cache(fetched_at)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_lei_cache_next_renewal ON lei_cache(next_renewal_date)"
+        )
         self.conn.commit()
 
     def get(self, lei: str, max_age_days: int) -> Optional[CachedLei]:
         row = self.conn.execute(
-            "SELECT entity_status, next_renewal_date, source, fetched_at FROM lei_cache WHERE lei=?",
+            "SELECT entity_status, next_renewal_date, source, fetched_at FROM lei_cache "
+            "WHERE lei=? AND miss_reason IS NULL",
             (lei,),
         ).fetchone()
         if not row:
             return None
         entity_status, next_renewal_date, source, fetched_at = row
-        try:
-            fetched_dt = datetime.fromisoformat(fetched_at)
-        except Exception:
-            return None
-
-        if datetime.utcnow() - fetched_dt > timedelta(days=max_age_days):
+        if not _fresh(fetched_at, max_age_days, datetime.utcnow()):
             return None
 
         return CachedLei(entity_status, next_renewal_date, source, fetched_at)
 
+    def _scan(self, leis: List[str]) -> Iterator[Tuple[str, CachedLei]]:
+        for i in range(0, len(leis), _IN_CHUNK):
+            chunk = leis[i : i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                "SELECT lei, entity_status, next_renewal_date, source, fetched_at, "
+                "registration_status "
+                f"FROM lei_cache WHERE lei IN ({placeholders}) AND miss_reason IS NULL",
+                chunk,
+            )
+            for lei, *row in rows:
+                yield lei, CachedLei(*row)
+
+    def get_misses(self, leis: Iterable[str], max_age_days: float) -> Dict[str, str]:
+        """Unexpired negative entries: lei -> miss reason."""
+        leis = list(leis)
+        now = datetime.utcnow()
+        out: Dict[str, str] = {}
+        for i in range(0, len(leis), _IN_CHUNK):
+            chunk = leis[i : i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                "SELECT lei, miss_reason, fetched_at "
+                f"FROM lei_cache WHERE lei IN ({placeholders}) AND miss_reason IS NOT NULL",
+                chunk,
+            )
+            for lei, reason, fetched_at in rows:
+                age = _age_days(fetched_at, now)
+                if age is not None and age <= max_age_days:
+                    out[lei] = reason
+        if self.metrics is not None:
+            self.metrics.incr("cache_negative_hits", len(out))
+        return out
+
+    def put_misses(self, leis: Iterable[str], reason: str, source: str = "gleif") -> None:
+        fetched_at = datetime.utcnow().isoformat()
+        rows = [(lei, source, fetched_at, reason) for lei in leis]
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany(_UPSERT_MISS_SQL, rows)
+        if self.metrics is not None:
+            self.metrics.incr("cache_negative_writes", len(rows))
+
+    def get_many(
+        self, leis: Iterable[str], max_age_days: int, policy: Optional[TtlPolicy] = None
+    ) -> Dict[str, CachedLei]:
+        fresh, _ = self.get_many_swr(leis, max_age_days, stale_days=0, policy=policy)
+        return fresh
+
+    def get_many_swr(
+        self,
+        leis: Iterable[str],
+        max_age_days: int,
+        stale_days: float = 0,
+        policy: Optional[TtlPolicy] = None,
+    ) -> Tuple[Dict[str, CachedLei], Dict[str, CachedLei]]:
+        """
+        Returns (fresh, stale). Stale entries are past their TTL by at most
+        stale_days: callers may serve them now and refresh them in the background.
+        """
+        leis = list(leis)
+        now = datetime.utcnow()
+        fresh: Dict[str, CachedLei] = {}
+        stale: Dict[str, CachedLei] = {}
+        for lei, c in self._scan(leis):
+            age = _age_days(c.fetched_at, now)
+            if age is None:
+                continue
+            ttl = (
+                policy.ttl_days(c.registration_status, c.next_renewal_date, now)
+                if policy
+                else max_age_days
+            )
+            if age <= ttl:
+                fresh[lei] = c
+            elif age <= ttl + stale_days:
+                stale[lei] = c
+        if self.metrics is not None:
+            self.metrics.incr("cache_lookups", len(leis))
+            self.metrics.incr("cache_hits", len(fresh))
+            if stale_days:
+                self.metrics.incr("cache_stale_hits", len(stale))
+        return fresh, stale
+
+    def _refresh_candidates(
+        self, max_age_days: float, policy: Optional[TtlPolicy], horizon_days: float, now: datetime
+    ) -> Iterator[Tuple[str, CachedLei]]:
+        # Index-backed prefilter; the exact TTL check happens per row
+        old_cutoff = (
+            now - timedelta(days=_min_ttl_days(max_age_days, policy) - horizon_days)
+        ).isoformat()
+        near = policy.near_renewal_days if policy is not None else 0
+        renewal_cutoff = (now + timedelta(days=near + horizon_days)).date().isoformat() + "T99"
+        rows = self.conn.execute(
+            "SELECT lei, entity_status, next_renewal_date, source, fetched_at, registration_status "
+            "FROM lei_cache "
+            "WHERE miss_reason IS NULL AND (fetched_at <= ? OR next_renewal_date <= ?)",
+            (old_cutoff, renewal_cutoff),
+        )
+        for lei, *row in rows:
+            yield lei, CachedLei(*row)
+
+    def due_for_refresh(
+        self,
+        max_age_days: float,
+        policy: Optional[TtlPolicy] = None,
+        horizon_days: float = 1,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Entries that are stale or will expire within horizon_days, most urgent
+        (earliest expiry) first. Negative entries are never refreshed.
+        """
+        now = datetime.utcnow()
+        due: List[Tuple[float, str]] = []
+        for lei, c in self._refresh_candidates(max_age_days, policy, horizon_days, now):
+            age = _age_days(c.fetched_at, now)
+            if age is None:
+                continue
+            ttl = (
+                policy.ttl_days(c.registration_status, c.next_renewal_date, now)
+                if policy
+                else max_age_days
+            )
+            remaining = ttl - age
+            if remaining <= horizon_days:
+                due.append((remaining, lei))
+        due.sort()
+        return [lei for _, lei in due[:limit]]
+
+    def stats(
+        self, max_age_days: float, policy: Optional[TtlPolicy] = None, horizon_days: float = 1
+    ) -> dict:
+        now = datetime.utcnow()
+        out: dict = {
+            "entries": 0,
+            "negative_entries": {},
+            "by_source": {},
+            "by_status": {},
+            "age_days": {label: 0 for _, label in AGE_BUCKETS} | {">90d": 0},
+            "fresh": 0,
+            "stale": 0,
+            "renewal_within_30d": 0,
+            "due_for_refresh": 0,
+        }
+        soon = (now + timedelta(days=30)).date().isoformat() + "T99"
+        rows = self.conn.execute(
+            "SELECT entity_status, next_renewal_date, source, fetched_at, miss_reason, "
+            "registration_status FROM lei_cache"
+        )
+        for entity_status, next_renewal_date, source, fetched_at, miss_reason, reg_status in rows:
+            out["entries"] += 1
+            if miss_reason is not None:
+                out["negative_entries"][miss_reason] = (
+                    out["negative_entries"].get(miss_reason, 0) + 1
+                )
+                continue
+            key = source or "unknown"
+            out["by_source"][key] = out["by_source"].get(key, 0) + 1
+            key = entity_status or "unknown"
+            out["by_status"][key] = out["by_status"].get(key, 0) + 1
+            if next_renewal_date and next_renewal_date <= soon:
+                out["renewal_within_30d"] += 1
+            age = _age_days(fetched_at, now)
+            if age is None:
+                continue
+            out["age_days"][_age_bucket(age)] += 1
+            ttl = policy.ttl_days(reg_status, next_renewal_date, now) if policy else max_age_days
+            if age <= ttl:
+                out["fresh"] += 1
+            else:
+                out["stale"] += 1
+            if ttl - age <= horizon_days:
+                out["due_for_refresh"] += 1
+        return out
+
+    def get_parents(
+        self, leis: Iterable[str], max_age_days: float
+    ) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """Unexpired relationship edges: lei -> (direct parent, ultimate parent)."""
+        leis = list(leis)
+        now = datetime.utcnow()
+        out: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        for i in range(0, len(leis), _IN_CHUNK):
+            chunk = leis[i : i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                "SELECT lei, direct_parent, ultimate_parent, fetched_at "
+                f"FROM lei_relationships WHERE lei IN ({placeholders})",
+                chunk,
+            )
+            for lei, direct, ultimate, fetched_at in rows:
+                if _fresh(fetched_at, max_age_days, now):
+                    out[lei] = (direct, ultimate)
+        if self.metrics is not None:
+            self.metrics.incr("relationship_cache_hits", len(out))
+        return out
+
+    def put_parents(self, parents: Mapping[str, "LeiParents"]) -> None:
+        fetched_at = datetime.utcnow().isoformat()
+        rows = [(lei, p.direct, p.ultimate, fetched_at) for lei, p in parents.items()]
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO lei_relationships"
+                "(lei, direct_parent, ultimate_parent, fetched_at) VALUES(?,?,?,?)",
+                rows,
+            )
+
     def put(self, lei: str, entity_status: str | None, next_renewal_date: str | None, source: str) -> None:
         self.conn.execute(
-            """
-            INSERT INTO lei_cache(lei, entity_status, next_renewal_date, source, fetched_at)
-            VALUES(?,?,?,?,?)
-            ON CONFLICT(lei) DO UPDATE SET
-              entity_status=excluded.entity_status,
-              next_renewal_date=excluded.next_renewal_date,
-              source=excluded.source,
-              fetched_at=excluded.fetched_at
-            """,
-            (lei, entity_status, next_renewal_date, source, datetime.utcnow().isoformat()),
+            _UPSERT_SQL,
+            (lei, entity_status, next_renewal_date, source, datetime.utcnow().isoformat(), None),
         )
-        self.conn.commit()
\ No newline at end of file
+        self.conn.commit()
+
+    def put_many(self, results: Mapping[str, "LeiResult"], default_source: str = "gleif") -> None:
+        fetched_at = datetime.utcnow().isoformat()
+        rows: List[tuple] = [
+            (
+                lei,
+                res.entity_status,
+                res.next_renewal_date,
+                res.source or default_source,
+                fetched_at,
+                res.registration_status,
+            )
+            for lei, res in results.items()
+        ]
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany(_UPSERT_SQL, rows)
+        if self.metrics is not None:
+            self.metrics.incr("cache_writes", len(rows))
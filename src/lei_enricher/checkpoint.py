@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from .core import chunked
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def default_checkpoint_path(output_path: str) -> str:
+    return output_path + ".checkpoint.json"
+
+
+def _journal_path(path: str) -> str:
+    return path + ".journal"
+
+
+@dataclass
+class JobCheckpoint:
+    """
+    On-disk job manifest. Results themselves live in LeiCache; the checkpoint only
+    records what has been done so a resumed run can skip it. The plan is written
+    once; progress is appended to a journal next to it (one JSON line per step),
+    so each completed batch costs one small write instead of a full rewrite.
+    """
+
+    job_id: str
+    input_hash: str
+    batch_size: int
+    plan: List[str]                                  # LEIs to fetch from GLEIF, in order
+    completed_batches: List[int] = field(default_factory=list)
+    fallback_misses: Optional[List[str]] = None      # set once the fallback phase starts
+    fallback_cursor: int = 0                         # misses[:cursor] are done
+
+    @classmethod
+    def new(cls, input_hash: str, batch_size: int, plan: List[str]) -> "JobCheckpoint":
+        return cls(job_id=uuid.uuid4().hex, input_hash=input_hash, batch_size=batch_size, plan=plan)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["JobCheckpoint"]:
+        p = Path(path)
+        if not p.exists():
+            return None
+        try:
+            cp = cls(**json.loads(p.read_text(encoding="utf-8")))
+        except (ValueError, TypeError):
+            return None
+        if os.path.exists(_journal_path(path)):
+            cp._replay(_journal_path(path))
+            # fold the journal into the manifest so new steps don't follow a torn line
+            cp.save(path)
+        return cp
+
+    def _replay(self, journal: str) -> None:
+        done = set(self.completed_batches)
+        with open(journal, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break   # torn last line from a crash mid-write
+                if "batch" in entry and entry["batch"] not in done:
+                    done.add(entry["batch"])
+                    self.completed_batches.append(entry["batch"])
+                if "fallback_cursor" in entry:
+                    self.fallback_cursor = max(self.fallback_cursor, entry["fallback_cursor"])
+
+    def _append(self, path: str, entry: dict) -> None:
+        with open(_journal_path(path), "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
+
+    def complete_batch(self, path: str, index: int) -> None:
+        self.completed_batches.append(index)
+        self._append(path, {"batch": index})
+
+    def advance_fallback(self, path: str, cursor: int) -> None:
+        self.fallback_cursor = cursor
+        self._append(path, {"fallback_cursor": cursor})
+
+    def batches(self) -> List[List[str]]:
+        return list(chunked(self.plan, self.batch_size))
+
+    def done_leis(self) -> List[str]:
+        batches = self.batches()
+        done = [lei for i in self.completed_batches for lei in batches[i]]
+        if self.fallback_misses:
+            done.extend(self.fallback_misses[: self.fallback_cursor])
+        return done
+
+    def save(self, path: str) -> None:
+        """Full manifest; it includes everything journaled so far, so the journal starts over."""
+        # write-then-rename so a crash never leaves a truncated manifest
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(asdict(self), fh)
+        os.replace(tmp, path)
+        # a crash before this unlink only replays steps the manifest already has
+        Path(_journal_path(path)).unlink(missing_ok=True)
+
+    @staticmethod
+    def remove(path: str) -> None:
+        Path(path).unlink(missing_ok=True)
+        Path(_journal_path(path)).unlink(missing_ok=True)
@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from .engine import JobConfig
+
+# Sub-commands import their dependencies lazily, so e.g. `ingest` never loads pandas.
+
+DEFAULT_CACHE_DB = str(Path.home() / "lei_cache.sqlite")
+
+# `lei-enricher <command>` runs headless only for these; anything else opens the GUI
+COMMANDS = ("run", "batch", "serve", "refresh", "stats", "ingest")
+
+
+def _default_output(input_path: str) -> str:
+    p = Path(input_path)
+    # Parquet/Feather inputs stay columnar; everything else becomes a workbook
+    suffix = p.suffix.lower()
+    if suffix not in {".parquet", ".pq", ".feather", ".arrow"}:
+        suffix = ".xlsx"
+    return str(p.with_name(p.stem + "_enriched" + suffix))
+
+
+def _add_run_parser(sub: argparse._SubParsersAction) -> None:
+    p = sub.add_parser("run", help="Enrich a spreadsheet with Entity Status / Next Renewal Date")
+    p.add_argument("input", help="Input file (.xlsx/.xls/.ods/.csv/.parquet/.feather)")
+    p.add_argument("-o", "--output",
+                   help="Output file (default: <input>_enriched.xlsx, "
+                        "or .parquet/.feather for those inputs)")
+    p.add_argument("--sheet", help="Sheet name (default: first sheet)")
+    _add_job_options(p)
+
+
+def _add_batch_parser(sub: argparse._SubParsersAction) -> None:
+    p = sub.add_parser("batch", help="Enrich many files / sheets with one de-duplicated fetch")
+    p.add_argument("inputs", nargs="+", help="Input files, directories or glob patterns")
+    p.add_argument("--output-dir", required=True, help="Where <name>_enriched.* files are written")
+    group = p.add_mutually_exclusive_group()
+    group.add_argument("--sheet", help="Sheet name in every workbook (default: first sheet)")
+    group.add_argument("--all-sheets", action="store_true",
+                       help="Enrich every sheet of every workbook")
+    _add_job_options(p)
+
+
+def _add_job_options(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--lei-col", help="LEI column name (default: auto-detect)")
+    p.add_argument("--status-col", default="Entity Status")
+    p.add_argument("--renewal-col", default="Next Renewal Date")
+    p.add_argument("--validation-col", help="Add a per-row LEI validation reason column")
+    p.add_argument("--no-checksum", action="store_true",
+                   help="Don't drop LEIs that fail the ISO 17442 check digits")
+    p.add_argument("--cache-db", default=DEFAULT_CACHE_DB)
+    p.add_argument("--cache-days", type=int, default=14)
+    p.add_argument("--negative-days", type=float, default=2,
+                   help="Skip LEIs GLEIF/fallback didn't know for N days (0 disables)")
+    p.add_argument("--renewal-ttl", action="store_true",
+                   help="Derive cache freshness from next renewal date / registration "
+                        "status (--cache-days = default)")
+    p.add_argument("--stale-days", type=float, default=0,
+                   help="Serve entries up to N days past their TTL and refresh them "
+                        "in the background")
+    p.add_argument("--cache-wal", action="store_true", help="SQLite WAL + synchronous=NORMAL")
+    p.add_argument("--gleif-batch-size", type=int, default=200, help="Maximum LEIs per GLEIF call")
+    p.add_argument("--fixed-batches", action="store_true",
+                   help="Disable adaptive batch sizing / bisection of failed batches")
+    p.add_argument("--full-records", action="store_true",
+                   help="Download complete GLEIF records instead of the sparse "
+                        "status/renewal fieldset")
+    p.add_argument("--gleif-throttle", type=float, default=0.2, help="Seconds between GLEIF calls")
+    p.add_argument("--gleif-workers", type=int, default=1, help="GLEIF batches in flight at once")
+    p.add_argument("--gleif-rate", type=float, help="Shared GLEIF requests/s (default: 1/throttle)")
+    p.add_argument("--parents", action="store_true",
+                   help="Add direct / ultimate parent LEIs and their statuses "
+                        "(batched relationship lookups)")
+    p.add_argument("--relationship-days", type=float, default=30,
+                   help="Cache TTL of parent relationships")
+    p.add_argument("--previous",
+                   help="Delta mode: previous enriched output; only new / due LEIs are looked up")
+    p.add_argument("--key-col",
+                   help="Row key column for the delta change report (default: row content)")
+    p.add_argument("--change-report", help="Change report file (default: <output>_changes.csv)")
+    p.add_argument("--index-db", help="Resolve from a local golden-copy index first (see `ingest`)")
+    p.add_argument("--fallback", action="store_true",
+                   help="Enable lei-lookup.com fallback for misses")
+    p.add_argument("--fallback-throttle", type=float, default=1.0,
+                   help="Seconds between fallback requests to the same host")
+    p.add_argument("--fallback-workers", type=int, default=1,
+                   help="Fallback lookups in flight at once")
+    p.add_argument("--write-back", action="store_true",
+                   help="XLSX only: update the result cells in a copy of the original workbook "
+                        "(keeps other sheets, formatting, formulas); "
+                        "new result columns are appended")
+    p.add_argument("--stream-chunk-rows", type=int, default=0,
+                   help="Stream the sheet in chunks of N rows (bounded memory for huge inputs)")
+    p.add_argument("--checkpoint", help="Job checkpoint file (default: <output>.checkpoint.json)")
+    p.add_argument("--resume", action="store_true",
+                   help="Skip work already recorded in the checkpoint of an interrupted run")
+    p.add_argument("--metrics-json", help="Write a JSON run report (stage times, hit ratios, ...)")
+    p.add_argument("--metrics-prom", help="Write metrics as a Prometheus textfile-collector file")
+    p.add_argument("--gleif-url", default=None, help="GLEIF API base URL (e.g. a local stand-in)")
+    p.add_argument("--fallback-url", default=None,
+                   help="lei-lookup base URL (e.g. a local stand-in)")
+    p.add_argument("-q", "--quiet", action="store_true", help="Only print the output path")
+
+
+def _add_ingest_parser(sub: argparse._SubParsersAction) -> None:
+    p = sub.add_parser("ingest", help="Load GLEIF golden-copy / delta files into a local LEI index")
+    p.add_argument("files", nargs="+",
+                   help="Golden-copy or delta files (.csv/.xml, optionally .zip)")
+    p.add_argument("--index-db", default=DEFAULT_CACHE_DB)
+    p.add_argument("--delta", action="store_true", help="Files are delta files (applied in order)")
+
+
+def _add_serve_parser(sub: argparse._SubParsersAction) -> None:
+    p = sub.add_parser("serve", help="Local HTTP lookup service (GET /lei/<lei>, POST /lei/batch)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--cache-db", default=DEFAULT_CACHE_DB)
+    p.add_argument("--cache-days", type=int, default=14)
+    p.add_argument("--negative-days", type=float, default=2)
+    p.add_argument("--renewal-ttl", action="store_true")
+    p.add_argument("--no-checksum", action="store_true")
+    p.add_argument("--window-ms", type=float, default=50,
+                   help="How long misses are collected before one GLEIF call")
+    p.add_argument("--max-batch", type=int, default=200, help="Maximum LEIs per GLEIF call")
+    p.add_argument("--gleif-rate", type=float, default=5.0,
+                   help="GLEIF requests/s for the whole service")
+    p.add_argument("--gleif-url", default=None, help="GLEIF API base URL (e.g. a local stand-in)")
+
+
+def _add_refresh_parser(sub: argparse._SubParsersAction) -> None:
+    p = sub.add_parser("refresh",
+                       help="Re-fetch cache entries that are stale or expire soon (off-hours)")
+    p.add_argument("--cache-db", default=DEFAULT_CACHE_DB)
+    p.add_argument("--cache-days", type=int, default=14)
+    p.add_argument("--renewal-ttl", action="store_true")
+    p.add_argument("--horizon-days", type=float, default=1,
+                   help="Refresh entries expiring within N days (default: 1)")
+    p.add_argument("--max-requests", type=int, default=100,
+                   help="GLEIF HTTP request budget for this run "
+                        "(pages and split batches count)")
+    p.add_argument("--gleif-batch-size", type=int, default=200)
+    p.add_argument("--gleif-rate", type=float, default=2.0, help="GLEIF requests/s")
+    p.add_argument("--window", help="Only run between these local times, e.g. 22:00-06:00")
+    p.add_argument("--gleif-url", default=None, help="GLEIF API base URL (e.g. a local stand-in)")
+
+
+def _add_stats_parser(sub: argparse._SubParsersAction) -> None:
+    p = sub.add_parser("stats", help="Cache size, age distribution and entries due for refresh")
+    p.add_argument("--cache-db", default=DEFAULT_CACHE_DB)
+    p.add_argument("--cache-days", type=int, default=14)
+    p.add_argument("--renewal-ttl", action="store_true")
+    p.add_argument("--horizon-days", type=float, default=1)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="lei-enricher-batch",
+        description="Headless LEI enrichment (no GUI).",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    _add_run_parser(sub)
+    _add_batch_parser(sub)
+    _add_serve_parser(sub)
+    _add_refresh_parser(sub)
+    _add_stats_parser(sub)
+    _add_ingest_parser(sub)
+    return parser
+
+
+def config_from_args(args: argparse.Namespace) -> "JobConfig":
+    return _job_config(args, args.input, args.output or _default_output(args.input))
+
+
+def _job_config(args: argparse.Namespace, input_path: str, output_path: str) -> "JobConfig":
+    from .checkpoint import default_checkpoint_path
+    from .engine import JobConfig
+
+    endpoints = {}
+    if args.gleif_url:
+        endpoints["gleif_base_url"] = args.gleif_url
+    if args.fallback_url:
+        endpoints["fallback_base_url"] = args.fallback_url
+    return JobConfig(
+        input_path=input_path,
+        output_path=output_path,
+        sheet=args.sheet,
+        lei_col=args.lei_col,
+        status_col=args.status_col,
+        renewal_col=args.renewal_col,
+        cache_db=args.cache_db,
+        cache_days=args.cache_days,
+        gleif_batch_size=args.gleif_batch_size,
+        gleif_throttle_s=args.gleif_throttle,
+        fallback_enabled=args.fallback,
+        fallback_throttle_s=args.fallback_throttle,
+        gleif_workers=args.gleif_workers,
+        gleif_rate_per_s=args.gleif_rate,
+        gleif_adaptive=not args.fixed_batches,
+        gleif_lean=not args.full_records,
+        fallback_workers=args.fallback_workers,
+        cache_wal=args.cache_wal,
+        negative_cache_days=args.negative_days,
+        renewal_aware_ttl=args.renewal_ttl,
+        stale_while_revalidate_days=args.stale_days,
+        index_db=args.index_db,
+        stream_chunk_rows=args.stream_chunk_rows,
+        verify_checksum=not args.no_checksum,
+        validation_col=args.validation_col,
+        checkpoint_path=args.checkpoint or default_checkpoint_path(output_path),
+        resume=args.resume,
+        metrics_json=args.metrics_json,
+        metrics_prom=args.metrics_prom,
+        xlsx_write_back=args.write_back,
+        parent_enrichment=args.parents,
+        previous_output=args.previous,
+        delta_key_col=args.key_col,
+        change_report_path=args.change_report,
+        relationship_cache_days=args.relationship_days,
+        **endpoints,
+    )
+
+
+def _cmd_run(args: argparse.Namespace) -> int:
+    from .engine import EnrichEngine, ThrottledProgress
+
+    if args.write_back and args.stream_chunk_rows > 0 and not args.previous:
+        print("--write-back keeps the whole workbook and cannot stream; "
+              "drop --stream-chunk-rows", file=sys.stderr)
+        return 2
+
+    if not Path(args.input).exists():
+        print(f"Input file not found: {args.input}", file=sys.stderr)
+        return 2
+
+    def on_message(msg: str) -> None:
+        if not args.quiet:
+            print(msg, file=sys.stderr)
+
+    def on_progress(done: int, total: int) -> None:
+        if not args.quiet and total > 0:
+            print(f"  {done}/{total}", file=sys.stderr)
+
+    engine = EnrichEngine(
+        config_from_args(args),
+        on_progress=ThrottledProgress(on_progress, 1.0),
+        on_message=on_message,
+    )
+    print(engine.run())
+    engine.wait_background()   # output is written; let a stale-while-revalidate refresh land
+    return 0
+
+
+def _cmd_batch(args: argparse.Namespace) -> int:
+    from .engine import ThrottledProgress
+    from .multi import MultiFileEngine, expand_inputs, plan_outputs
+
+    if args.previous:
+        print("--previous (delta mode) works on single-file `run` jobs only", file=sys.stderr)
+        return 2
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("No input files matched", file=sys.stderr)
+        return 2
+
+    def on_message(msg: str) -> None:
+        if not args.quiet:
+            print(msg, file=sys.stderr)
+
+    def on_progress(done: int, total: int) -> None:
+        if not args.quiet and total > 0:
+            print(f"  {done}/{total}", file=sys.stderr)
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    plan = plan_outputs(paths, args.output_dir, args.all_sheets, args.sheet)
+    cfg = _job_config(args, paths[0], str(Path(args.output_dir) / "batch"))
+    engine = MultiFileEngine(
+        cfg, plan, on_progress=ThrottledProgress(on_progress, 1.0), on_message=on_message
+    )
+    for out in engine.run_all():
+        print(out)
+    engine.wait_background()
+    return 0
+
+
+def _cmd_serve(args: argparse.Namespace) -> int:
+    from .core import GLEIF_API_URL, AdaptiveBatchSizer, GleifClient, TokenBucket
+    from .metrics import RunMetrics
+    from .service import LeiService, ServiceConfig, make_server
+
+    cfg = ServiceConfig(
+        cache_db=args.cache_db,
+        cache_days=args.cache_days,
+        negative_cache_days=args.negative_days,
+        renewal_aware_ttl=args.renewal_ttl,
+        verify_checksum=not args.no_checksum,
+        window_s=args.window_ms / 1000,
+        max_batch=args.max_batch,
+    )
+    metrics = RunMetrics()
+    gleif = GleifClient(
+        throttle_s=0.0,
+        rate_limiter=TokenBucket(args.gleif_rate),
+        sizer=AdaptiveBatchSizer(max_size=args.max_batch),
+        metrics=metrics,
+        base_url=args.gleif_url or GLEIF_API_URL,
+        lean=True,
+    )
+    service = LeiService(cfg, gleif, metrics=metrics)
+    server = make_server(service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+def _cmd_refresh(args: argparse.Namespace) -> int:
+    from .core import GLEIF_API_URL, AdaptiveBatchSizer, GleifClient, TokenBucket
+    from .metrics import RunMetrics
+    from .refresh import RefreshConfig, refresh_cache
+
+    cfg = RefreshConfig(
+        cache_db=args.cache_db,
+        cache_days=args.cache_days,
+        renewal_aware_ttl=args.renewal_ttl,
+        horizon_days=args.horizon_days,
+        max_requests=args.max_requests,
+        batch_size=args.gleif_batch_size,
+        window=args.window,
+    )
+    metrics = RunMetrics()
+    gleif = GleifClient(
+        throttle_s=0.0,
+        rate_limiter=TokenBucket(args.gleif_rate),
+        sizer=AdaptiveBatchSizer(max_size=args.gleif_batch_size),
+        metrics=metrics,
+        base_url=args.gleif_url or GLEIF_API_URL,
+        lean=True,
+    )
+    summary = refresh_cache(cfg, gleif, metrics, on_message=lambda msg: print(msg, file=sys.stderr))
+    print(json.dumps(summary))
+    return 0
+
+
+def _cmd_stats(args: argparse.Namespace) -> int:
+    from .cache import LeiCache, TtlPolicy
+
+    policy = TtlPolicy(default_days=args.cache_days) if args.renewal_ttl else None
+    stats = LeiCache(args.cache_db).stats(args.cache_days, policy, args.horizon_days)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+def _cmd_ingest(args: argparse.Namespace) -> int:
+    from .golden import LeiIndex, ingest_file
+
+    index = LeiIndex(args.index_db)
+    kind = "delta" if args.delta else "golden"
+    for path in args.files:
+        count = ingest_file(path, index, kind=kind)
+        print(f"{path}: {count} records", file=sys.stderr)
+    print(f"Index size: {index.count()} LEIs")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "run":
+        return _cmd_run(args)
+    if args.command == "batch":
+        return _cmd_batch(args)
+    if args.command == "serve":
+        return _cmd_serve(args)
+    if args.command == "refresh":
+        return _cmd_refresh(args)
+    if args.command == "stats":
+        return _cmd_stats(args)
+    if args.command == "ingest":
+        return _cmd_ingest(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+# Kept free of heavy imports: the GUI builds a JobConfig before pandas/requests are loaded
+
+GLEIF_API_URL = "https://api.gleif.org/api/v1"
+LEI_LOOKUP_URL = "https://www.lei-lookup.com"
+
+
+@dataclass
+class JobConfig:
+    input_path: str
+    output_path: str
+    sheet: Optional[str]
+    lei_col: Optional[str]
+    status_col: str
+    renewal_col: str
+    cache_db: str
+    cache_days: int
+    gleif_batch_size: int                  # upper bound when gleif_adaptive is on
+    gleif_throttle_s: float
+    fallback_enabled: bool
+    fallback_throttle_s: float             # per host; shared by all fallback workers
+    gleif_workers: int = 1
+    gleif_rate_per_s: Optional[float] = None   # default: 1 / gleif_throttle_s
+    gleif_adaptive: bool = True   # bisect rejected batches, shrink on 5xx/timeouts, grow back
+    gleif_lean: bool = True       # sparse fieldset: only lei / entity / registration attributes
+    fallback_workers: int = 1
+    cache_wal: bool = False
+    negative_cache_days: float = 2   # skip known misses this long (0 disables negative caching)
+    renewal_aware_ttl: bool = False  # TTL from renewal date / registration status
+    stale_while_revalidate_days: float = 0   # > 0: serve slightly stale hits, refresh in background
+    index_db: Optional[str] = None   # local golden-copy index (see golden.py)
+    stream_chunk_rows: int = 0       # > 0: read/write the sheet in chunks of this many rows
+    verify_checksum: bool = True           # drop LEIs failing the ISO 17442 check digits
+    validation_col: Optional[str] = None   # per-row validation reason column (see validate.py)
+    checkpoint_path: Optional[str] = None
+    resume: bool = False
+    metrics_json: Optional[str] = None   # JSON run report
+    metrics_prom: Optional[str] = None   # Prometheus textfile-collector file
+    parent_enrichment: bool = False   # direct / ultimate parent LEIs and their statuses
+    relationship_cache_days: float = 30
+    direct_parent_col: str = "Direct Parent LEI"
+    direct_parent_status_col: str = "Direct Parent Status"
+    ultimate_parent_col: str = "Ultimate Parent LEI"
+    ultimate_parent_status_col: str = "Ultimate Parent Status"
+    previous_output: Optional[str] = None   # delta mode: yesterday's enriched output
+    delta_key_col: Optional[str] = None  # row key for the change report (default: row content hash)
+    change_report_path: Optional[str] = None   # default: <output>_changes.csv
+    xlsx_write_back: bool = False   # update result cells in the original .xlsx in place
+    gleif_base_url: str = GLEIF_API_URL
+    fallback_base_url: str = LEI_LOOKUP_URL
@@ -1,23 +1,43 @@
 from __future__ import annotations
 
+import json
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 import requests
-from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .config import GLEIF_API_URL, LEI_LOOKUP_URL
+
+try:
+    import orjson   # optional: faster decoding of GLEIF responses
+except ImportError:
+    orjson = None
+
+if TYPE_CHECKING:
+    from .metrics import RunMetrics
+
 LEI_REGEX = re.compile(r"^[0-9A-Z]{20}$")
 
+# JSON:API sparse fieldset: the only attributes parse_gleif_item reads
+GLEIF_LEAN_FIELDS = "lei,entity,registration"
+
 
 @dataclass
 class LeiResult:
     entity_status: Optional[str] = None
     next_renewal_date: Optional[str] = None
     source: Optional[str] = None
+    registration_status: Optional[str] = None   # GLEIF registration.status: ISSUED, LAPSED, ...
 
 
 def normalize_lei(value: object) -> Optional[str]:
@@ -32,6 +52,13 @@ def is_valid_lei(lei: str) -> bool:
     return bool(LEI_REGEX.match(lei))
 
 
+def lei_checksum_ok(lei: str) -> bool:
+    """ISO 17442 / ISO 7064 MOD 97-10: digits of the LEI (A=10 .. Z=35) mod 97 == 1."""
+    if not is_valid_lei(lei):
+        return False
+    return int("".join(str(int(c, 36)) for c in lei)) % 97 == 1
+
+
 def chunked(items: List[str], n: int) -> Iterable[List[str]]:
     for i in range(0, len(items), n):
         yield items[i : i + n]
@@ -47,16 +74,79 @@ def make_session() -> requests.Session:
         raise_on_status=False,
         respect_retry_after_header=True,
     )
-    s.mount("https://", HTTPAdapter(max_retries=retry, pool_connections=20, pool_maxsize=20))
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=20, pool_maxsize=20)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)   # local stand-ins / proxies
     s.headers.update(
         {
             "User-Agent": "LEI-Enricher/0.1 (contact: it-ops@yourbank.example)",
             "Accept": "application/json,text/html",
+            "Accept-Encoding": "gzip, deflate",
         }
     )
     return s
 
 
+class TokenBucket:
+    """
+    Thread-safe requests-per-second limiter shared by concurrent workers.
+    pause() blocks every caller, e.g. after a 429 with Retry-After.
+    """
+
+    def __init__(
+        self,
+        rate_per_s: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate_per_s <= 0:
+            raise ValueError("rate_per_s must be > 0")
+        self.rate_per_s = rate_per_s
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._last = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate_per_s)
+                self._last = now
+                if self._blocked_until > now:
+                    wait = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate_per_s
+            self._sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+            self._tokens = 0.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return max(0.0, (dt - datetime.now(timezone.utc)).total_seconds())
+
+
 def parse_gleif_item(item: dict) -> Tuple[str, LeiResult]:
     attrs = item.get("attributes", {}) or {}
     lei = attrs.get("lei") or item.get("id") or ""
@@ -65,77 +155,503 @@ def parse_gleif_item(item: dict) -> Tuple[str, LeiResult]:
 
     status = entity.get("status")
     renewal = registration.get("nextRenewalDate")
+    reg_status = registration.get("status")
 
     if isinstance(status, str):
         status = status.strip().upper()
     if isinstance(renewal, str):
         renewal = renewal.strip()
+    if isinstance(reg_status, str):
+        reg_status = reg_status.strip().upper()
+
+    return lei, LeiResult(
+        entity_status=status,
+        next_renewal_date=renewal,
+        source="gleif",
+        registration_status=reg_status,
+    )
+
+
+def loads_json(body: bytes) -> object:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def wire_bytes(r: requests.Response) -> int:
+    """Bytes received before Content-Encoding was undone (falls back to the body size)."""
+    raw = getattr(r, "raw", None)
+    try:
+        n = raw.tell() if raw is not None else 0
+    except Exception:
+        n = 0
+    return n or int(r.headers.get("Content-Length") or 0) or len(r.content)
+
+
+REL_DIRECT = "IS_DIRECTLY_CONSOLIDATED_BY"
+REL_ULTIMATE = "IS_ULTIMATELY_CONSOLIDATED_BY"
+
 
-    return lei, LeiResult(entity_status=status, next_renewal_date=renewal, source="gleif")
+@dataclass
+class LeiParents:
+    direct: Optional[str] = None
+    ultimate: Optional[str] = None
+
+
+def parse_relationship_item(item: dict) -> Optional[Tuple[str, str, str]]:
+    """
+    relationship-records item -> (child LEI, relationship type, parent LEI);
+    None if it is not an active LEI-to-LEI edge.
+    """
+    rel = ((item.get("attributes") or {}).get("relationship")) or {}
+    start = (rel.get("startNode") or {}).get("id")
+    end = (rel.get("endNode") or {}).get("id")
+    kind = rel.get("type")
+    if not start or not end or kind not in (REL_DIRECT, REL_ULTIMATE):
+        return None
+    if (rel.get("status") or "ACTIVE").upper() != "ACTIVE":
+        return None
+    return start.strip().upper(), kind, end.strip().upper()
+
+
+# Errors caused by the batch itself (URL too long, a malformed LEI): worth splitting
+BISECT_STATUSES = (400, 413, 414)
+
+
+class GleifBatchError(Exception):
+    def __init__(self, status: Optional[int], message: str = "") -> None:
+        super().__init__(message or f"GLEIF request failed (status={status})")
+        self.status = status
+
+
+class AdaptiveBatchSizer:
+    """
+    Shared batch size for GLEIF calls: halves when a batch is too big for GLEIF
+    (400/413/414) or GLEIF struggles with it (5xx, timeouts), grows back step by
+    step on success, never above max_size.
+    """
+
+    def __init__(self, max_size: int = 200, min_size: int = 1, grow_step: int = 0) -> None:
+        self.max_size = max(1, max_size)
+        self.min_size = max(1, min(min_size, self.max_size))
+        self.grow_step = grow_step or max(1, self.max_size // 8)
+        self.size = self.max_size
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        with self._lock:
+            return self.size
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.size = min(self.max_size, self.size + self.grow_step)
+
+    def on_failure(self) -> None:
+        with self._lock:
+            self.size = max(self.min_size, self.size // 2)
 
 
 class GleifClient:
     """
     Prefer API calls, not scraping search.gleif.org.
     Uses batching: filter[lei]=LEI1,LEI2,... (up to 200)
+    With a sizer, batches GLEIF refuses as too big are bisected and batches that
+    hit a 5xx or a timeout are retried smaller; a part that still fails at the
+    minimum size is given up on and the rest carries on, until
+    max_consecutive_failures parts in a row got no answer. LEIs of parts given
+    up on are never reported as not found.
     """
 
-    def __init__(self, session: Optional[requests.Session] = None, throttle_s: float = 0.2) -> None:
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        throttle_s: float = 0.2,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_429_retries: int = 3,
+        sizer: Optional[AdaptiveBatchSizer] = None,
+        max_consecutive_failures: int = 3,
+        metrics: Optional["RunMetrics"] = None,
+        base_url: str = GLEIF_API_URL,
+        lean: bool = False,
+    ) -> None:
         self.session = session or make_session()
+        # lean: ask only for the attributes we parse (sparse fieldset)
+        self.lean = lean
         self.throttle_s = throttle_s
+        self.rate_limiter = rate_limiter
+        self.max_429_retries = max_429_retries
+        self.sizer = sizer
+        self.max_consecutive_failures = max_consecutive_failures
+        self.metrics = metrics
+        self.base_url = base_url.rstrip("/")
+        # LEIs that failed even as a batch of one (adaptive mode)
+        self.rejected: List[str] = []
+        # LEIs of batches that got no answer (429 / 5xx): unknown, not misses
+        self.failed: List[str] = []
+        self._failures_in_row = 0
+        self._rejected_lock = threading.Lock()
+        # HTTP requests sent (pages and bisected parts included); _get stops at request_budget
+        self.requests = 0
+        self.request_budget: Optional[int] = None
+
+    def _record_response(self, r: requests.Response) -> None:
+        if self.metrics is None:
+            return
+        self.metrics.incr("gleif_requests")
+        # retries urllib3 did behind our back
+        history = getattr(getattr(r.raw, "retries", None), "history", None) or ()
+        if history:
+            self.metrics.incr("gleif_retries", len(history))
+            self.metrics.incr("gleif_429", sum(1 for h in history if h.status == 429))
+        if r.status_code == 429:
+            self.metrics.incr("gleif_429")
+
+    def _wait_turn(self) -> None:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        elif self.throttle_s > 0:
+            time.sleep(self.throttle_s)
 
-    def lookup_batch(self, leis: List[str]) -> Dict[str, LeiResult]:
+    def _get(self, url: str) -> requests.Response:
+        for _ in range(self.max_429_retries + 1):
+            with self._rejected_lock:
+                if self.request_budget is not None and self.requests >= self.request_budget:
+                    raise GleifBatchError(None, "GLEIF request budget exhausted")
+                self.requests += 1
+            self._wait_turn()
+            r = self.session.get(url, timeout=30)
+            self._record_response(r)
+            if r.status_code != 429 or self.rate_limiter is None:
+                break
+            # urllib3 already retried; make every worker back off before trying again
+            self.rate_limiter.pause(parse_retry_after(r.headers.get("Retry-After")) or 1.0)
+        return r
+
+    def fetch_batch(self, leis: List[str]) -> Dict[str, LeiResult]:
+        """One filter[lei] query, following links.next. Raises GleifBatchError on non-200."""
         if not leis:
             return {}
         lei_csv = ",".join(leis)
-        url = f"https://api.gleif.org/api/v1/lei-records?page[size]={len(leis)}&filter[lei]={lei_csv}"
+        url: Optional[str] = (
+            f"{self.base_url}/lei-records?page[size]={len(leis)}&filter[lei]={lei_csv}"
+        )
+        if self.lean:
+            url += f"&fields[lei-records]={GLEIF_LEAN_FIELDS}"
 
-        if self.throttle_s > 0:
-            time.sleep(self.throttle_s)
+        out: Dict[str, LeiResult] = {}
+        t0 = time.perf_counter()
+        while url:
+            r = self._get(url)
+            if r.status_code != 200:
+                if self.metrics is not None:
+                    self.metrics.incr("gleif_errors")
+                raise GleifBatchError(r.status_code)
+
+            body = r.content
+            t_decode = time.perf_counter()
+            payload = loads_json(body)
+            if self.metrics is not None:
+                self.metrics.observe_gleif_decode(
+                    time.perf_counter() - t_decode, wire_bytes(r), len(body)
+                )
+            for item in payload.get("data", []) or []:
+                lei, res = parse_gleif_item(item)
+                if lei:
+                    out[lei] = res
+            url = ((payload.get("links") or {}).get("next")) or None
+
+        if self.metrics is not None:
+            self.metrics.incr("gleif_batches")
+            self.metrics.observe_gleif_batch(time.perf_counter() - t0)
+        return out
 
-        r = self.session.get(url, timeout=30)
-        if r.status_code != 200:
+    def fetch_parents(self, leis: List[str]) -> Dict[str, LeiParents]:
+        """
+        Direct / ultimate parents of a whole batch in one relationship-records
+        query (following links.next). Every requested LEI gets an entry, empty
+        when it reports no parent. Raises GleifBatchError on non-200.
+        """
+        if not leis:
             return {}
+        url: Optional[str] = (
+            f"{self.base_url}/relationship-records?page[size]={min(200, 2 * len(leis))}"
+            f"&filter[startNode.id]={','.join(leis)}"
+            f"&filter[relationshipType]={REL_DIRECT},{REL_ULTIMATE}"
+        )
+        out = {lei: LeiParents() for lei in leis}
+        while url:
+            r = self._get(url)
+            if r.status_code != 200:
+                if self.metrics is not None:
+                    self.metrics.incr("gleif_errors")
+                raise GleifBatchError(r.status_code)
+            payload = loads_json(r.content)
+            for item in payload.get("data", []) or []:
+                edge = parse_relationship_item(item)
+                if edge is None or edge[0] not in out:
+                    continue
+                child, kind, parent = edge
+                if kind == REL_DIRECT:
+                    out[child].direct = parent
+                else:
+                    out[child].ultimate = parent
+            url = ((payload.get("links") or {}).get("next")) or None
+
+        if self.metrics is not None:
+            self.metrics.incr("gleif_relationship_batches")
+        return out
 
-        payload = r.json()
+    def lookup_parents(self, leis: List[str], batch_size: int = 200) -> Dict[str, LeiParents]:
+        """Batched fetch_parents; failed batches are left out (and retried on the next run)."""
+        out: Dict[str, LeiParents] = {}
+        for batch in chunked(leis, batch_size):
+            try:
+                out.update(self.fetch_parents(batch))
+            except (GleifBatchError, requests.RequestException):
+                continue
+        return out
+
+    def _mark_failed(self, leis: List[str]) -> None:
+        with self._rejected_lock:
+            self.failed.extend(leis)
+
+    def lookup_batch(self, leis: List[str]) -> Dict[str, LeiResult]:
+        """
+        LEIs GLEIF answered for. A batch (or, adaptive mode, a part) that gets
+        no answer is recorded in `failed`; adaptive mode raises GleifBatchError
+        once max_consecutive_failures parts in a row failed or the request
+        budget runs out.
+        """
+        if self.sizer is not None:
+            return self._lookup_adaptive(leis)
+        try:
+            return self.fetch_batch(leis)
+        except (GleifBatchError, requests.RequestException):
+            self._mark_failed(leis)
+            return {}
+
+    def _retry_smaller(self, part: List[str], pending: List[List[str]]) -> bool:
+        """Requeue `part` at half the batch size; False once it is at the minimum."""
+        if len(part) <= self.sizer.min_size:
+            return False
+        self.sizer.on_failure()
+        size = max(self.sizer.min_size, min(self.sizer.current(), len(part) // 2))
+        pending[:0] = [part[i : i + size] for i in range(0, len(part), size)]
+        return True
+
+    def _give_up(self, part: List[str], pending: List[List[str]]) -> None:
+        """Record a part GLEIF never answered; raise once too many failed in a row."""
+        with self._rejected_lock:
+            self.failed.extend(part)
+            self._failures_in_row += 1
+            outage = self._failures_in_row >= self.max_consecutive_failures
+        if outage:
+            self._mark_failed([lei for p in pending for lei in p])
+            raise GleifBatchError(
+                None, f"GLEIF unavailable: {self.max_consecutive_failures} batches in a row failed"
+            )
+
+    def _lookup_adaptive(self, leis: List[str]) -> Dict[str, LeiResult]:
         out: Dict[str, LeiResult] = {}
-        for item in payload.get("data", []) or []:
-            lei, res = parse_gleif_item(item)
-            if lei:
-                out[lei] = res
+        size = self.sizer.current()
+        pending = [leis[i : i + size] for i in range(0, len(leis), size)]
+        limited = 0
+        while pending:
+            part = pending.pop(0)
+            try:
+                out.update(self.fetch_batch(part))
+            except GleifBatchError as e:
+                if e.status == 429 and limited < self.max_429_retries:
+                    # rate limited, not a bad batch: wait and send the same part again
+                    limited += 1
+                    time.sleep(min(30.0, 2.0 ** limited))
+                    pending.insert(0, part)
+                    continue
+                limited = 0
+                if e.status is None:
+                    # request budget exhausted: everything left waits for the next run
+                    self._mark_failed([lei for p in [part, *pending] for lei in p])
+                    raise
+                if e.status not in BISECT_STATUSES:
+                    # 5xx: a smaller batch may get through; 429 after backing off, 4xx: it won't
+                    if e.status < 500 or not self._retry_smaller(part, pending):
+                        self._give_up(part, pending)
+                    continue
+                if len(part) > 1:
+                    self.sizer.on_failure()
+                    mid = len(part) // 2
+                    pending[:0] = [part[:mid], part[mid:]]
+                    continue
+                # isolated a single LEI GLEIF rejects; leave it to fallback
+                with self._rejected_lock:
+                    self.rejected.extend(part)
+                continue
+            except requests.Timeout:
+                if not self._retry_smaller(part, pending):
+                    self._give_up(part, pending)
+                continue
+            except requests.RequestException:
+                # urllib3 already retried: a smaller batch won't get through either
+                self._give_up(part, pending)
+                continue
+            limited = 0
+            self.sizer.on_success()
+            with self._rejected_lock:
+                self._failures_in_row = 0
         return out
 
+    def lookup_batches(
+        self, batches: List[List[str]], workers: int = 1
+    ) -> Iterator[Tuple[List[str], Dict[str, LeiResult]]]:
+        """
+        Yields (batch, results) as batches complete. With workers > 1 several
+        batches are in flight at once; pass a shared rate_limiter to stay in limits.
+        """
+        if workers <= 1:
+            for batch in batches:
+                yield batch, self.lookup_batch(batch)
+            return
+
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {pool.submit(self.lookup_batch, batch): batch for batch in batches}
+            for fut in as_completed(futures):
+                yield futures[fut], fut.result()
+        finally:
+            # a consumer that stops early (cancellation) drops the batches not started yet
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+_STATUS_RE = re.compile(r"Entity status[.:]?\s*([A-Z]+)", flags=re.IGNORECASE)
+_RENEWAL_RE = re.compile(
+    r"Next renewal date[,:\s]*([0-9]{4}-[0-9]{2}-[0-9]{2})", flags=re.IGNORECASE
+)
+
+_LABEL_RE = re.compile(r"entity status|next renewal date", flags=re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _text_nodes_xpath():
+    # lxml loads on the first fallback page, not at import
+    from lxml import etree
+
+    # Every visible text node in document order: element text and tails alike
+    return etree.XPath("//text()[normalize-space()][not(parent::script or parent::style)]")
+
+
+def parse_fallback_text(text: str) -> LeiResult:
+    status = None
+    renewal = None
+
+    m1 = _STATUS_RE.search(text)
+    if m1:
+        status = m1.group(1).strip().upper()
+
+    m2 = _RENEWAL_RE.search(text)
+    if m2:
+        renewal = m2.group(1).strip()
+
+    return LeiResult(entity_status=status, next_renewal_date=renewal, source="lei-lookup")
+
+
+def parse_fallback_html(html: str) -> LeiResult:
+    """
+    lxml extraction: finds the text nodes holding a label and reads only them
+    and the next few text nodes (the value sits in the same node or the next
+    one) instead of building a BeautifulSoup tree and flattening the page.
+    """
+    from lxml import etree
+    from lxml import html as lxml_html
+
+    try:
+        root = lxml_html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return LeiResult(source="lei-lookup")
+
+    nodes = [t.strip() for t in _text_nodes_xpath()(root)]
+    windows = [
+        "\n".join(nodes[i : i + 4]) for i, text in enumerate(nodes) if _LABEL_RE.search(text)
+    ]
+    return parse_fallback_text("\n".join(windows))
+
+
+def parse_fallback_html_soup(html: str) -> LeiResult:
+    """Reference (slow) extraction over the full BeautifulSoup text; kept for benchmarks."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    return parse_fallback_text(soup.get_text("\n", strip=True))
+
+
+class PerHostRateLimiter:
+    """One TokenBucket per host, created on first use."""
+
+    def __init__(self, rate_per_s: float) -> None:
+        self.rate_per_s = rate_per_s
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str) -> None:
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate_per_s)
+        bucket.acquire()
+
 
 class LeiLookupFallback:
     """
     HTML parse fallback for misses only. Throttle heavily.
     """
 
-    def __init__(self, session: Optional[requests.Session] = None, throttle_s: float = 1.0) -> None:
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        throttle_s: float = 1.0,
+        rate_limiter: Optional[PerHostRateLimiter] = None,
+        metrics: Optional["RunMetrics"] = None,
+        base_url: str = LEI_LOOKUP_URL,
+    ) -> None:
         self.session = session or make_session()
         self.throttle_s = throttle_s
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.base_url = base_url.rstrip("/")
 
     def lookup(self, lei: str) -> LeiResult:
-        url = f"https://www.lei-lookup.com/record/{lei}/"
-        if self.throttle_s > 0:
+        res = self._lookup(lei)
+        if self.metrics is not None:
+            self.metrics.incr("fallback_attempts")
+            if res.entity_status or res.next_renewal_date:
+                self.metrics.incr("fallback_success")
+        return res
+
+    def _lookup(self, lei: str) -> LeiResult:
+        url = f"{self.base_url}/record/{lei}/"
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+        elif self.throttle_s > 0:
             time.sleep(self.throttle_s)
 
         r = self.session.get(url, timeout=30)
         if r.status_code != 200 or not r.text:
             return LeiResult(source="lei-lookup")
 
-        soup = BeautifulSoup(r.text, "lxml")
-        text = soup.get_text("\n", strip=True)
-
-        status = None
-        renewal = None
-
-        m1 = re.search(r"Entity status\.?\s*([A-Z]+)", text, flags=re.IGNORECASE)
-        if m1:
-            status = m1.group(1).strip().upper()
-
-        m2 = re.search(r"Next renewal date[,\s]*([0-9]{4}-[0-9]{2}-[0-9]{2})", text, flags=re.IGNORECASE)
-        if m2:
-            renewal = m2.group(1).strip()
-
-        return LeiResult(entity_status=status, next_renewal_date=renewal, source="lei-lookup")
\ No newline at end of file
+        return parse_fallback_html(r.text)
+
+    def lookup_many(self, leis: List[str], workers: int = 1) -> Iterator[Tuple[str, LeiResult]]:
+        """
+        Yields (lei, result) as lookups complete. With workers > 1 pass a
+        rate_limiter, otherwise each worker only sleeps throttle_s on its own.
+        """
+        if workers <= 1:
+            for lei in leis:
+                yield lei, self.lookup(lei)
+            return
+
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {pool.submit(self.lookup, lei): lei for lei in leis}
+            for fut in as_completed(futures):
+                yield futures[fut], fut.result()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from .core import LeiResult
+
+CHANGE_ADDED = "added"
+CHANGE_REMOVED = "removed"
+CHANGE_CHANGED = "changed"
+
+
+def default_change_report_path(output_path: str) -> str:
+    p = Path(output_path)
+    return str(p.with_name(p.stem + "_changes.csv"))
+
+
+def file_age_days(path: str) -> float:
+    return (time.time() - os.path.getmtime(path)) / 86400
+
+
+def previous_results(
+    prev: pd.DataFrame, lei_col: str, status_col: str, renewal_col: str
+) -> Dict[str, LeiResult]:
+    """lei -> what the previous output said about it (first row wins)."""
+    cols = prev[[lei_col, status_col, renewal_col]].drop_duplicates(subset=[lei_col])
+    cols = cols.astype(object).where(cols.notna(), None)
+    out: Dict[str, LeiResult] = {}
+    for lei, status, renewal in cols.itertuples(index=False, name=None):
+        if isinstance(lei, str) and (status or renewal):
+            # renewal kept as written, so reused and fetched rows share one format
+            out[lei] = LeiResult(status, _as_str(renewal), source="previous")
+    return out
+
+
+def _as_str(value: object) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _norm(s: pd.Series, date: bool = False) -> pd.Series:
+    out = s.astype("string").fillna("")
+    return out.str.slice(0, 10) if date else out
+
+
+def row_keys(df: pd.DataFrame, key_col: Optional[str], input_cols: List[str]) -> pd.Series:
+    """Row identity: the key column, or a hash of the row's input (non-result) columns."""
+    if key_col is not None:
+        return df[key_col].astype("string")
+    return pd.util.hash_pandas_object(df[input_cols].astype(str), index=False).astype("string")
+
+
+def change_report(
+    prev: pd.DataFrame,
+    prev_lei_col: str,
+    cur: pd.DataFrame,
+    cur_lei_col: str,
+    status_col: str,
+    renewal_col: str,
+    key_col: Optional[str],
+    input_cols: List[str],
+) -> pd.DataFrame:
+    """
+    Rows added, removed, or whose Entity Status / Next Renewal Date changed
+    since the previous output. Without a key column rows are matched by the
+    content of the input columns both frames have, so an edited row shows up
+    as removed + added, while an added or dropped column changes nothing.
+    """
+    input_cols = [c for c in input_cols if c in prev.columns and c in cur.columns]
+
+    def side(df: pd.DataFrame, lei_col: str) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "Key": row_keys(df, key_col, input_cols).to_numpy(),
+                "LEI": df[lei_col].to_numpy(),
+                "Entity Status": _norm(df[status_col]).to_numpy(),
+                "Next Renewal Date": _norm(df[renewal_col], date=True).to_numpy(),
+            }
+        ).drop_duplicates(subset=["Key"])
+
+    merged = side(prev, prev_lei_col).merge(
+        side(cur, cur_lei_col), on="Key", how="outer", suffixes=(" (old)", " (new)"), indicator=True
+    )
+    changed = (merged["_merge"] == "both") & (
+        (merged["Entity Status (old)"] != merged["Entity Status (new)"])
+        | (merged["Next Renewal Date (old)"] != merged["Next Renewal Date (new)"])
+    )
+    merged["Change"] = None
+    merged.loc[merged["_merge"] == "left_only", "Change"] = CHANGE_REMOVED
+    merged.loc[merged["_merge"] == "right_only", "Change"] = CHANGE_ADDED
+    merged.loc[changed, "Change"] = CHANGE_CHANGED
+
+    report = merged[merged["Change"].notna()].drop(columns="_merge")
+    if key_col is None:
+        report = report.drop(columns="Key")
+    else:
+        report = report.rename(columns={"Key": key_col})
+    first = ["Change"] + ([key_col] if key_col is not None else [])
+    return report[first + [c for c in report.columns if c not in first]].reset_index(drop=True)
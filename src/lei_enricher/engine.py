@@ -0,0 +1,768 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+import pandas as pd
+import requests
+
+from .cache import MISS_FALLBACK_EMPTY, MISS_INVALID, MISS_NOT_FOUND, LeiCache, TtlPolicy
+from .checkpoint import JobCheckpoint, file_sha256
+from .config import JobConfig
+from .core import (
+    AdaptiveBatchSizer,
+    GleifBatchError,
+    GleifClient,
+    LeiLookupFallback,
+    LeiParents,
+    LeiResult,
+    PerHostRateLimiter,
+    TokenBucket,
+    chunked,
+)
+from .delta import change_report, default_change_report_path, file_age_days, previous_results
+from .golden import LeiIndex
+from .io_excel import (
+    TableChunkWriter,
+    is_columnar,
+    iter_table_chunks,
+    read_table,
+    table_columns,
+    write_back_xlsx,
+    write_table,
+)
+from .metrics import RunMetrics
+from .validate import lei_validation_reasons, normalize_lei_series, valid_unique_leis
+
+# Resumed work is trusted regardless of cache_days: it was fetched by this very job
+_RESUME_MAX_AGE_DAYS = 36500
+
+# Fallback results are written to the cache (one transaction) every this many LEIs
+_FALLBACK_WRITE_BATCH = 20
+
+ProgressCallback = Callable[[int, int], None]   # done, total
+MessageCallback = Callable[[str], None]
+ResultsCallback = Callable[[Dict[str, LeiResult]], None]   # LEIs resolved since the last call
+
+
+class ThrottledProgress:
+    """Forwards at most one progress update per `interval_s`; done == total always passes."""
+
+    def __init__(self, callback: ProgressCallback, interval_s: float = 0.1) -> None:
+        self.callback = callback
+        self.interval_s = interval_s
+        self._last = 0.0
+
+    def __call__(self, done: int, total: int) -> None:
+        now = time.monotonic()
+        if done >= total or now - self._last >= self.interval_s:
+            self._last = now
+            self.callback(done, total)
+
+
+def find_lei_column(df: pd.DataFrame, lei_col: Optional[str] = None) -> str:
+    if lei_col and lei_col in df.columns:
+        return lei_col
+
+    # common names
+    for c in df.columns:
+        if str(c).strip().lower() in {"lei", "lei_number", "lei number", "lei code"}:
+            return c
+
+    for c in df.columns:
+        if "lei" in str(c).strip().lower():
+            return c
+
+    raise ValueError("Δεν βρέθηκε στήλη LEI. Δήλωσε 'LEI column name'.")
+
+
+def merge_fallback(existing: LeiResult, res: LeiResult) -> LeiResult:
+    found = res.entity_status or res.next_renewal_date
+    return LeiResult(
+        entity_status=existing.entity_status or res.entity_status,
+        next_renewal_date=existing.next_renewal_date or res.next_renewal_date,
+        source=res.source if found else (existing.source or res.source),
+        registration_status=existing.registration_status,
+    )
+
+
+class EnrichEngine:
+    """
+    Headless enrichment pipeline: read -> normalize -> cache -> GLEIF -> fallback -> write.
+    Progress is reported through plain callbacks so it can run without Qt.
+    """
+
+    def __init__(
+        self,
+        cfg: JobConfig,
+        on_progress: Optional[ProgressCallback] = None,
+        on_message: Optional[MessageCallback] = None,
+        on_results: Optional[ResultsCallback] = None,
+    ) -> None:
+        self.cfg = cfg
+        self.on_progress = on_progress or (lambda done, total: None)
+        self.on_message = on_message or (lambda msg: None)
+        self.on_results = on_results or (lambda results: None)
+        self.metrics = RunMetrics()
+        self._gleif_limiter: Optional[TokenBucket] = None
+        self._refresh_threads: List[threading.Thread] = []
+        self._cancel = threading.Event()
+        # some GLEIF batches got no answer: the checkpoint is kept for --resume
+        self._gleif_incomplete = False
+        # lei -> parents, filled by resolve_parents when cfg.parent_enrichment is on
+        self.parents: Dict[str, LeiParents] = {}
+
+    def cancel(self) -> None:
+        """Stop fetching after the batches in flight; the job still writes what it has."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def read(self) -> pd.DataFrame:
+        self.on_message("Reading input file...")
+        return read_table(self.cfg.input_path, sheet=self.cfg.sheet)
+
+    def prepare(self, df: pd.DataFrame) -> tuple[pd.DataFrame, str]:
+        lei_col_name = find_lei_column(df, self.cfg.lei_col)
+
+        # Ensure output columns exist
+        out_cols = self.result_columns()
+        for col in out_cols:
+            if col not in df.columns:
+                df[col] = None
+
+        # Put output columns immediately to the right of LEI col
+        cols = [c for c in df.columns if c not in out_cols]
+        lei_idx = cols.index(lei_col_name)
+        cols = cols[:lei_idx + 1] + out_cols + cols[lei_idx + 1:]
+        df = df[cols]
+
+        # Normalize
+        df[lei_col_name] = normalize_lei_series(df[lei_col_name])
+        if self.cfg.validation_col:
+            df[self.cfg.validation_col] = lei_validation_reasons(
+                df[lei_col_name], self.cfg.verify_checksum
+            )
+        return df, lei_col_name
+
+    def unique_leis(self, df: pd.DataFrame, lei_col_name: str) -> List[str]:
+        unique_leis = valid_unique_leis(df[lei_col_name], checksum=self.cfg.verify_checksum)
+        unique_leis.sort()
+        return unique_leis
+
+    def gleif_limiter(self) -> Optional[TokenBucket]:
+        # One bucket per engine, shared by GLEIF workers and background revalidation
+        if self._gleif_limiter is None:
+            rate = self.cfg.gleif_rate_per_s
+            if not rate and self.cfg.gleif_throttle_s > 0:
+                rate = 1.0 / self.cfg.gleif_throttle_s
+            if rate:
+                self._gleif_limiter = TokenBucket(rate)
+        return self._gleif_limiter
+
+    def make_gleif_client(self) -> GleifClient:
+        sizer = (
+            AdaptiveBatchSizer(max_size=self.cfg.gleif_batch_size)
+            if self.cfg.gleif_adaptive
+            else None
+        )
+        if self.cfg.gleif_workers <= 1 and not self.cfg.stale_while_revalidate_days:
+            return GleifClient(
+                throttle_s=self.cfg.gleif_throttle_s,
+                sizer=sizer,
+                metrics=self.metrics,
+                base_url=self.cfg.gleif_base_url,
+                lean=self.cfg.gleif_lean,
+            )
+
+        return GleifClient(
+            throttle_s=0.0,
+            rate_limiter=self.gleif_limiter(),
+            sizer=sizer,
+            metrics=self.metrics,
+            base_url=self.cfg.gleif_base_url,
+            lean=self.cfg.gleif_lean,
+        )
+
+    def ttl_policy(self) -> Optional[TtlPolicy]:
+        if not self.cfg.renewal_aware_ttl:
+            return None
+        return TtlPolicy(default_days=self.cfg.cache_days)
+
+    def start_revalidation(self, leis: List[str]) -> None:
+        """
+        Refresh stale cache entries on a daemon thread. Neither the job nor
+        finish() waits for it (the CLI joins it after printing the output); it
+        stops on cancel(), and a process that exits first just leaves the
+        entries stale for the next run or `refresh`.
+        """
+
+        def work() -> None:
+            try:
+                # sqlite connections are per thread
+                cache = LeiCache(self.cfg.cache_db, wal=self.cfg.cache_wal)
+                gleif = self.make_gleif_client()
+                for batch in chunked(leis, self.cfg.gleif_batch_size):
+                    if self.cancelled:
+                        return
+                    res = gleif.lookup_batch(batch)
+                    cache.put_many(res, default_source="gleif")
+                    self.metrics.incr("cache_revalidated", len(res))
+            except Exception as e:
+                self.on_message(f"Background cache refresh failed: {e}")
+
+        thread = threading.Thread(target=work, name="lei-cache-revalidate", daemon=True)
+        thread.start()
+        self._refresh_threads.append(thread)
+
+    def wait_background(self) -> None:
+        """Block until background cache refreshes are done (tests, embedding callers)."""
+        while self._refresh_threads:
+            self._refresh_threads.pop().join()
+
+    def make_fallback_client(self) -> LeiLookupFallback:
+        if self.cfg.fallback_workers <= 1 or self.cfg.fallback_throttle_s <= 0:
+            return LeiLookupFallback(
+                throttle_s=self.cfg.fallback_throttle_s,
+                metrics=self.metrics,
+                base_url=self.cfg.fallback_base_url,
+            )
+        limiter = PerHostRateLimiter(1.0 / self.cfg.fallback_throttle_s)
+        return LeiLookupFallback(
+            throttle_s=0.0,
+            rate_limiter=limiter,
+            metrics=self.metrics,
+            base_url=self.cfg.fallback_base_url,
+        )
+
+    def lookup_local(self, leis: List[str], cache: LeiCache) -> Dict[str, LeiResult]:
+        results: Dict[str, LeiResult] = {}
+
+        # Cache first
+        self.on_message("Cache lookup...")
+        fresh, stale = cache.get_many_swr(
+            leis,
+            self.cfg.cache_days,
+            self.cfg.stale_while_revalidate_days,
+            policy=self.ttl_policy(),
+        )
+        for lei, c in {**stale, **fresh}.items():
+            results[lei] = LeiResult(c.entity_status, c.next_renewal_date, source="cache")
+        if stale:
+            self.on_message(
+                f"Serving {len(stale)} stale cache entries; refreshing them in the background..."
+            )
+            self.start_revalidation(sorted(stale))
+
+        if self.cfg.index_db:
+            self.on_message("Local LEI index lookup...")
+            index = LeiIndex(self.cfg.index_db)
+            pending = [lei for lei in leis if lei not in results]
+            for lei, (status, renewal) in index.get_many(pending).items():
+                results[lei] = LeiResult(status, renewal, source="golden-copy")
+
+        if results:
+            self.on_results(dict(results))
+        return results
+
+    def input_fingerprint(self) -> str:
+        return file_sha256(self.cfg.input_path)
+
+    def load_checkpoint(self) -> Optional[JobCheckpoint]:
+        if not (self.cfg.checkpoint_path and self.cfg.resume):
+            return None
+        cp = JobCheckpoint.load(self.cfg.checkpoint_path)
+        if cp is None:
+            return None
+        if cp.input_hash != self.input_fingerprint():
+            self.on_message("Checkpoint does not match the input file; starting over.")
+            return None
+        return cp
+
+    def save_checkpoint(self, cp: Optional[JobCheckpoint]) -> None:
+        if cp is not None and self.cfg.checkpoint_path:
+            cp.save(self.cfg.checkpoint_path)
+
+    def resolve(self, unique_leis: List[str]) -> Dict[str, LeiResult]:
+        total = len(unique_leis)
+        self.metrics.incr("unique_leis", total)
+        self.on_progress(0, total)
+
+        cache = LeiCache(self.cfg.cache_db, wal=self.cfg.cache_wal, metrics=self.metrics)
+
+        with self.metrics.stage("cache"):
+            cp = self.load_checkpoint()
+            if cp is not None:
+                self.on_message(f"Resuming job {cp.job_id}...")
+                plan = set(cp.plan)
+                results = self.lookup_local([lei for lei in unique_leis if lei not in plan], cache)
+                # Work finished before the interruption was written through to the cache;
+                # read without metrics so it counts as resumed, not as cache hits
+                done = LeiCache(self.cfg.cache_db, wal=self.cfg.cache_wal).get_many(
+                    cp.done_leis(), _RESUME_MAX_AGE_DAYS
+                )
+                for lei, c in done.items():
+                    results[lei] = LeiResult(c.entity_status, c.next_renewal_date, source="cache")
+                self.metrics.incr("resumed", len(done))
+                to_fetch = cp.plan
+                # what the first run skipped as known misses
+                known_misses = self.known_misses(
+                    [lei for lei in unique_leis if lei not in results and lei not in plan], cache
+                )
+            else:
+                results = self.lookup_local(unique_leis, cache)
+                to_fetch = [lei for lei in unique_leis if lei not in results]
+                known_misses = self.known_misses(to_fetch, cache)
+                if known_misses:
+                    self.on_message(
+                        f"Skipping {len(known_misses)} known misses on GLEIF (negative cache)..."
+                    )
+                    to_fetch = [lei for lei in to_fetch if lei not in known_misses]
+                if self.cfg.checkpoint_path:
+                    cp = JobCheckpoint.new(
+                        self.input_fingerprint(), self.cfg.gleif_batch_size, to_fetch
+                    )
+                    self.save_checkpoint(cp)
+
+        with self.metrics.stage("gleif"):
+            rejected, unanswered = self.fetch_gleif(to_fetch, results, cache, cp, total)
+
+        if self.cancelled:
+            # unfetched LEIs are not misses: no negative caching, no fallback
+            self.on_message(
+                f"Cancelled: writing partial results ({len(results)} of {total} LEIs resolved)..."
+            )
+            return results
+
+        # Misses: missing both fields
+        if cp is not None and cp.fallback_misses is not None:
+            misses = cp.fallback_misses
+        else:
+            # LEIs GLEIF never answered for are unknown, not misses: they are left for the next run
+            misses = []
+            for lei in to_fetch:
+                r = results.get(lei)
+                if lei not in unanswered and (
+                    not r or (not r.entity_status and not r.next_renewal_date)
+                ):
+                    misses.append(lei)
+            if self.cfg.fallback_enabled:
+                # only an empty fallback page is a known fallback miss
+                misses.extend(
+                    lei
+                    for lei in unique_leis
+                    if known_misses.get(lei) in (MISS_NOT_FOUND, MISS_INVALID)
+                )
+
+        if self.cfg.negative_cache_days > 0:
+            cache.put_misses(rejected, MISS_INVALID)
+            if not self.cfg.fallback_enabled:
+                skip = set(rejected) | set(known_misses)
+                cache.put_misses(
+                    [lei for lei in misses if lei not in results and lei not in skip],
+                    MISS_NOT_FOUND,
+                )
+
+        if self.cfg.fallback_enabled and misses:
+            with self.metrics.stage("fallback"):
+                self.fetch_fallback(misses, results, cache, cp, total)
+
+        if self.cfg.parent_enrichment and not self.cancelled:
+            with self.metrics.stage("parents"):
+                self.resolve_parents(unique_leis, results, cache)
+
+        return results
+
+    def known_misses(self, leis: List[str], cache: LeiCache) -> Dict[str, str]:
+        """Negatively cached LEI -> reason; all skip GLEIF, FALLBACK_EMPTY also skips fallback."""
+        if self.cfg.negative_cache_days <= 0:
+            return {}
+        return cache.get_misses(leis, self.cfg.negative_cache_days)
+
+    def resolve_parents(
+        self, leis: List[str], results: Dict[str, LeiResult], cache: LeiCache
+    ) -> None:
+        """
+        Parent edges for every LEI (cache, then batched relationship queries), then
+        the statuses of all distinct parents through the same cache -> GLEIF path.
+        Parent results are added to `results`, edges to `self.parents`.
+        """
+        known = cache.get_parents(leis, self.cfg.relationship_cache_days)
+        self.parents.update((lei, LeiParents(d, u)) for lei, (d, u) in known.items())
+        missing = [lei for lei in leis if lei not in known]
+        if missing:
+            self.on_message(f"Querying GLEIF relationships for {len(missing)} LEIs (batched)...")
+            fetched = self.make_gleif_client().lookup_parents(missing, self.cfg.gleif_batch_size)
+            cache.put_parents(fetched)
+            self.parents.update(fetched)
+
+        # shared parents are looked up once
+        parent_leis = sorted(
+            {p for rel in self.parents.values() for p in (rel.direct, rel.ultimate) if p}
+            - set(results)
+        )
+        if not parent_leis:
+            return
+        self.on_message(f"Resolving {len(parent_leis)} parent LEIs...")
+        found = self.lookup_local(parent_leis, cache)
+        to_fetch = [lei for lei in parent_leis if lei not in found]
+        known_misses = self.known_misses(to_fetch, cache)
+        to_fetch = [lei for lei in to_fetch if lei not in known_misses]
+        try:
+            for _, batch_res in self.make_gleif_client().lookup_batches(
+                list(chunked(to_fetch, self.cfg.gleif_batch_size)), workers=self.cfg.gleif_workers
+            ):
+                found.update(batch_res)
+                cache.put_many(batch_res, default_source="gleif")
+                self.on_results(batch_res)
+        except (GleifBatchError, requests.RequestException) as e:
+            self.on_message(f"GLEIF unavailable ({e}); parent statuses are left for the next run.")
+        results.update(found)
+
+    def fetch_gleif(
+        self,
+        to_fetch: List[str],
+        results: Dict[str, LeiResult],
+        cache: LeiCache,
+        cp: Optional[JobCheckpoint],
+        total: int,
+    ) -> tuple[List[str], Set[str]]:
+        """
+        Runs the planned GLEIF batches. Returns the LEIs GLEIF rejected
+        individually and those it never answered for (429, 5xx, network errors).
+        """
+        gleif = self.make_gleif_client()
+        self.on_message("Querying GLEIF API (batched)...")
+        if cp is not None:
+            completed = set(cp.completed_batches)
+            indexed = [(i, b) for i, b in enumerate(cp.batches()) if i not in completed]
+        else:
+            indexed = list(enumerate(chunked(to_fetch, self.cfg.gleif_batch_size)))
+        batch_index = {id(b): i for i, b in indexed}
+        unanswered = {lei for _, b in indexed for lei in b}
+
+        try:
+            for batch, batch_res in gleif.lookup_batches(
+                [b for _, b in indexed], workers=self.cfg.gleif_workers
+            ):
+                results.update(batch_res)
+                cache.put_many(batch_res, default_source="gleif")
+                failed = set(gleif.failed)
+                unanswered.difference_update(lei for lei in batch if lei not in failed)
+                # a batch that got no answer stays pending so a resumed run retries it
+                if cp is not None and not failed.intersection(batch):
+                    cp.complete_batch(self.cfg.checkpoint_path, batch_index[id(batch)])
+
+                self.on_results(batch_res)
+                self.on_progress(min(total, len(results)), total)
+                if self.cancelled:
+                    break
+        except (GleifBatchError, requests.RequestException) as e:
+            self.on_message(f"GLEIF unavailable ({e}); unresolved LEIs are left for the next run.")
+
+        if unanswered:
+            self._gleif_incomplete = True
+            self.on_message(
+                f"GLEIF did not answer for {len(unanswered)} LEIs; they are not marked as misses."
+            )
+        return gleif.rejected, unanswered
+
+    def fetch_fallback(
+        self,
+        misses: List[str],
+        results: Dict[str, LeiResult],
+        cache: LeiCache,
+        cp: Optional[JobCheckpoint],
+        total: int,
+    ) -> None:
+        done = min(total, len(results))
+        start = 0
+        if cp is not None:
+            cp.fallback_misses = misses
+            start = cp.fallback_cursor
+            self.save_checkpoint(cp)
+
+        fallback = self.make_fallback_client()
+        self.on_message("Fallback to lei-lookup.com for misses (throttled)...")
+        pending = misses[start:]
+        position = {lei: start + n for n, lei in enumerate(pending)}
+        finished: Set[int] = set()
+        cursor = start
+        found: Dict[str, LeiResult] = {}
+        empty: List[str] = []
+
+        def flush() -> None:
+            cache.put_many(found, default_source="lei-lookup")
+            cache.put_misses(empty, MISS_FALLBACK_EMPTY, source="lei-lookup")
+            found.clear()
+            empty.clear()
+            # the checkpoint only moves past LEIs that are in the cache
+            if cp is not None and cp.fallback_cursor != cursor:
+                cp.advance_fallback(self.cfg.checkpoint_path, cursor)
+
+        for count, (lei, res) in enumerate(
+            fallback.lookup_many(pending, workers=self.cfg.fallback_workers), start=start + 1
+        ):
+            merged = merge_fallback(results.get(lei, LeiResult()), res)
+            results[lei] = merged
+            if (
+                merged.entity_status
+                or merged.next_renewal_date
+                or self.cfg.negative_cache_days <= 0
+            ):
+                found[lei] = merged
+            else:
+                empty.append(lei)
+
+            # lookups may finish out of order; the cursor only covers a contiguous done prefix
+            finished.add(position[lei])
+            while cursor in finished:
+                cursor += 1
+            if len(found) + len(empty) >= _FALLBACK_WRITE_BATCH:
+                flush()
+
+            self.on_results({lei: merged})
+            self.on_progress(min(total, done + count), total)
+            if self.cancelled:
+                break
+        flush()
+
+    def finish(self) -> str:
+        # a cancelled or incomplete job keeps its checkpoint so --resume can pick it up
+        if self.cfg.checkpoint_path and not (self.cancelled or self._gleif_incomplete):
+            JobCheckpoint.remove(self.cfg.checkpoint_path)
+        if self.cfg.metrics_json:
+            self.metrics.write_json(self.cfg.metrics_json)
+        if self.cfg.metrics_prom:
+            self.metrics.write_prometheus(self.cfg.metrics_prom)
+        self.on_message(self.metrics.summary())
+        return self.cfg.output_path
+
+    def fill(self, df: pd.DataFrame, lei_col_name: str, results: Dict[str, LeiResult]) -> None:
+        df[self.cfg.status_col] = df[lei_col_name].map(
+            lambda x: results[x].entity_status if isinstance(x, str) and x in results else None
+        )
+        df[self.cfg.renewal_col] = df[lei_col_name].map(
+            lambda x: results[x].next_renewal_date if isinstance(x, str) and x in results else None
+        )
+        if self.cfg.parent_enrichment:
+            direct = df[lei_col_name].map(
+                lambda x: self.parents[x].direct if x in self.parents else None
+            )
+            ultimate = df[lei_col_name].map(
+                lambda x: self.parents[x].ultimate if x in self.parents else None
+            )
+            df[self.cfg.direct_parent_col] = direct
+            df[self.cfg.ultimate_parent_col] = ultimate
+            df[self.cfg.direct_parent_status_col] = direct.map(
+                lambda p: results[p].entity_status if p in results else None
+            )
+            df[self.cfg.ultimate_parent_status_col] = ultimate.map(
+                lambda p: results[p].entity_status if p in results else None
+            )
+
+    def typed(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Arrow outputs keep real types: string status, date32 renewal date."""
+        import pyarrow as pa
+
+        df[self.cfg.status_col] = df[self.cfg.status_col].astype("string")
+        # the calendar date as written: converting "...T00:00:00+02:00" to UTC would shift the day
+        days = df[self.cfg.renewal_col].astype("string").str.slice(0, 10)
+        dates = pd.to_datetime(days, errors="coerce", format="%Y-%m-%d")
+        df[self.cfg.renewal_col] = dates.astype(pd.ArrowDtype(pa.date32()))
+        return df
+
+    def write(self, df: pd.DataFrame, lei_col_name: str, results: Dict[str, LeiResult]) -> str:
+        self.on_message("Writing results...")
+        with self.metrics.stage("write"):
+            self.fill(df, lei_col_name, results)
+            self.write_output(df, lei_col_name)
+        return self.finish()
+
+    def write_output(self, df: pd.DataFrame, lei_col_name: str) -> None:
+        if self.writes_back():
+            write_back_xlsx(
+                self.cfg.input_path,
+                self.cfg.output_path,
+                {self.cfg.sheet: (df, lei_col_name)},
+                self.result_columns(),
+            )
+            return
+        if is_columnar(self.cfg.output_path):
+            df = self.typed(df)
+        write_table(df, self.cfg.output_path)
+
+    def result_columns(self) -> List[str]:
+        cols = [self.cfg.status_col, self.cfg.renewal_col]
+        if self.cfg.validation_col:
+            cols.append(self.cfg.validation_col)
+        if self.cfg.parent_enrichment:
+            cols += [
+                self.cfg.direct_parent_col,
+                self.cfg.direct_parent_status_col,
+                self.cfg.ultimate_parent_col,
+                self.cfg.ultimate_parent_status_col,
+            ]
+        return cols
+
+    def writes_back(
+        self, input_path: Optional[str] = None, output_path: Optional[str] = None
+    ) -> bool:
+        """In-place write-back needs an .xlsx on both ends."""
+        src = (input_path or self.cfg.input_path).lower()
+        dst = (output_path or self.cfg.output_path).lower()
+        return self.cfg.xlsx_write_back and src.endswith(".xlsx") and dst.endswith(".xlsx")
+
+    def iter_chunks(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        return iter_table_chunks(
+            self.cfg.input_path,
+            sheet=self.cfg.sheet,
+            chunksize=self.cfg.stream_chunk_rows,
+            columns=columns,
+        )
+
+    def input_lei_column(self) -> str:
+        header = table_columns(self.cfg.input_path, sheet=self.cfg.sheet)
+        return find_lei_column(pd.DataFrame(columns=header), self.cfg.lei_col)
+
+    def scan_unique_leis(self) -> List[str]:
+        self.on_message("Scanning input file (streaming)...")
+        col = self.input_lei_column()
+        seen: Set[str] = set()
+        # only the LEI column is decoded for the lookup phase
+        for chunk in self.iter_chunks(columns=[col]):
+            self.metrics.incr("rows", len(chunk))
+            seen.update(
+                valid_unique_leis(
+                    normalize_lei_series(chunk[col]), checksum=self.cfg.verify_checksum
+                )
+            )
+        return sorted(seen)
+
+    def write_streaming(self, results: Dict[str, LeiResult]) -> str:
+        self.on_message("Writing results (streaming)...")
+        with self.metrics.stage("write"), TableChunkWriter(self.cfg.output_path) as writer:
+            for chunk in self.iter_chunks():
+                chunk, lei_col_name = self.prepare(chunk)
+                self.fill(chunk, lei_col_name, results)
+                writer.write(self.typed(chunk) if is_columnar(self.cfg.output_path) else chunk)
+        return self.finish()
+
+    def run_streaming(self) -> str:
+        # Peak memory: one chunk + the unique-LEI set/results, never the whole sheet
+        with self.metrics.stage("read"):
+            unique_leis = self.scan_unique_leis()
+        results = self.resolve(unique_leis)
+        return self.write_streaming(results)
+
+    def run_projected(self) -> str:
+        """Parquet/Feather: resolve from the LEI column alone, load the full table only to write."""
+        with self.metrics.stage("read"):
+            col = self.input_lei_column()
+            leis = read_table(self.cfg.input_path, columns=[col])
+        self.metrics.incr("rows", len(leis))
+        with self.metrics.stage("normalize"):
+            leis[col] = normalize_lei_series(leis[col])
+            unique_leis = self.unique_leis(leis, col)
+        del leis
+        results = self.resolve(unique_leis)
+
+        with self.metrics.stage("read"):
+            df = self.read()
+        with self.metrics.stage("normalize"):
+            df, lei_col_name = self.prepare(df)
+        return self.write(df, lei_col_name, results)
+
+    def run_delta(self) -> str:
+        """
+        Only LEIs that are new since the previous output, or whose cache entry is
+        stale, go through resolve(); the rest reuse known values. Writes a change
+        report next to the output.
+        """
+        with self.metrics.stage("read"):
+            df = self.read()
+            prev = read_table(self.cfg.previous_output)
+        self.metrics.incr("rows", len(df))
+
+        with self.metrics.stage("normalize"):
+            df, lei_col_name = self.prepare(df)
+            unique_leis = self.unique_leis(df, lei_col_name)
+            prev_lei_col = find_lei_column(prev, self.cfg.lei_col)
+            prev[prev_lei_col] = normalize_lei_series(prev[prev_lei_col])
+            previous = previous_results(
+                prev, prev_lei_col, self.cfg.status_col, self.cfg.renewal_col
+            )
+            # checked before any lookups: a schema mismatch must not cost a whole run
+            key_col = self.cfg.delta_key_col
+            if key_col is not None and (key_col not in df.columns or key_col not in prev.columns):
+                raise ValueError(
+                    f"Key column {key_col!r} must exist in both the input and the previous output"
+                )
+
+        with self.metrics.stage("cache"):
+            cache = LeiCache(self.cfg.cache_db, wal=self.cfg.cache_wal, metrics=self.metrics)
+            carried = [lei for lei in unique_leis if lei in previous]
+            # stale_days=inf: tell "stale" (status may have changed) apart from "not cached"
+            fresh, stale = cache.get_many_swr(
+                carried, self.cfg.cache_days, float("inf"), policy=self.ttl_policy()
+            )
+            reuse = {
+                lei: LeiResult(c.entity_status, c.next_renewal_date, source="cache")
+                for lei, c in fresh.items()
+            }
+            if file_age_days(self.cfg.previous_output) <= self.cfg.cache_days:
+                for lei in carried:
+                    if lei not in fresh and lei not in stale:
+                        reuse[lei] = previous[lei]
+        to_resolve = [lei for lei in unique_leis if lei not in reuse]
+        self.on_message(
+            f"Delta: {len(reuse)} LEIs unchanged, {len(to_resolve)} new or due for a re-check"
+        )
+        self.metrics.incr("delta_reused", len(reuse))
+
+        results = self.resolve(to_resolve)
+        results.update(reuse)
+        self.on_results(reuse)
+        if self.cfg.parent_enrichment and reuse and not self.cancelled:
+            # resolve() only saw the new / due LEIs; reused ones need parents too (edges are cached)
+            with self.metrics.stage("parents"):
+                self.resolve_parents(sorted(reuse), results, cache)
+
+        with self.metrics.stage("write"):
+            self.fill(df, lei_col_name, results)
+            self.on_message("Writing results...")
+            self.write_output(df, lei_col_name)
+            input_cols = [c for c in df.columns if c not in self.result_columns()]
+            report = change_report(
+                prev, prev_lei_col, df, lei_col_name, self.cfg.status_col, self.cfg.renewal_col,
+                key_col, input_cols,
+            )
+            report_path = self.cfg.change_report_path or default_change_report_path(
+                self.cfg.output_path
+            )
+            write_table(report, report_path)
+            self.on_message(f"{len(report)} changed rows; change report: {report_path}")
+        return self.finish()
+
+    def run(self) -> str:
+        if self.cfg.previous_output:
+            return self.run_delta()
+        if self.cfg.stream_chunk_rows > 0:
+            if self.writes_back():
+                # write_back_xlsx loads the whole workbook; chunked output would drop it
+                raise ValueError("Write-back and streaming cannot be combined; drop one of them")
+            return self.run_streaming()
+        if is_columnar(self.cfg.input_path):
+            return self.run_projected()
+
+        with self.metrics.stage("read"):
+            df = self.read()
+        self.metrics.incr("rows", len(df))
+        with self.metrics.stage("normalize"):
+            df, lei_col_name = self.prepare(df)
+            unique_leis = self.unique_leis(df, lei_col_name)
+        results = self.resolve(unique_leis)
+        return self.write(df, lei_col_name, results)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import csv
+import io
+import sqlite3
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, Optional, Tuple
+
+IndexRow = Tuple[str, Optional[str], Optional[str]]   # lei, entity_status, next_renewal_date
+
+_IN_CHUNK = 500
+_WRITE_CHUNK = 5000
+
+# Column names used by the GLEIF golden-copy / delta CSV (LEI-CDF flattened)
+CSV_LEI = "LEI"
+CSV_STATUS = "Entity.EntityStatus"
+CSV_RENEWAL = "Registration.NextRenewalDate"
+
+
+class LeiIndex:
+    """
+    Local LEI index built from GLEIF golden-copy / delta files.
+    Lives in its own table, so it can share the cache SQLite file.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS lei_index (
+              lei TEXT PRIMARY KEY,
+              entity_status TEXT,
+              next_renewal_date TEXT
+            ) WITHOUT ROWID
+            """
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS lei_index_files (
+              file_name TEXT,
+              kind TEXT,
+              records INTEGER,
+              ingested_at TEXT
+            )
+            """
+        )
+        self.conn.commit()
+
+    def upsert_many(self, rows: Iterable[IndexRow]) -> int:
+        count = 0
+        buf = []
+        for row in rows:
+            buf.append(row)
+            if len(buf) >= _WRITE_CHUNK:
+                count += self._flush(buf)
+                buf = []
+        if buf:
+            count += self._flush(buf)
+        return count
+
+    def _flush(self, rows: list) -> int:
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO lei_index(lei, entity_status, next_renewal_date) VALUES(?,?,?)
+                ON CONFLICT(lei) DO UPDATE SET
+                  entity_status=excluded.entity_status,
+                  next_renewal_date=excluded.next_renewal_date
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def get_many(self, leis: Iterable[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        leis = list(leis)
+        out: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        for i in range(0, len(leis), _IN_CHUNK):
+            chunk = leis[i : i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                "SELECT lei, entity_status, next_renewal_date FROM lei_index "
+                f"WHERE lei IN ({placeholders})",
+                chunk,
+            )
+            for lei, status, renewal in rows:
+                out[lei] = (status, renewal)
+        return out
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM lei_index").fetchone()[0]
+
+    def record_file(self, file_name: str, kind: str, records: int) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO lei_index_files(file_name, kind, records, ingested_at) "
+                "VALUES(?,?,?,?)",
+                (file_name, kind, records, datetime.now(timezone.utc).isoformat()),
+            )
+
+
+def _clean(value: Optional[str], upper: bool = False) -> Optional[str]:
+    if value is None:
+        return None
+    value = value.strip()
+    if not value:
+        return None
+    return value.upper() if upper else value
+
+
+@contextmanager
+def _open_binary(path: str) -> Iterator[Tuple[IO[bytes], str]]:
+    """Yields (stream, inner suffix). GLEIF ships golden copies zipped."""
+    p = Path(path)
+    if p.suffix.lower() == ".zip":
+        with zipfile.ZipFile(p) as zf:
+            name = next(n for n in zf.namelist() if not n.endswith("/"))
+            with zf.open(name) as fh:
+                yield fh, Path(name).suffix.lower()
+    else:
+        with open(p, "rb") as fh:
+            yield fh, p.suffix.lower()
+
+
+def iter_csv_records(fh: IO[bytes]) -> Iterator[IndexRow]:
+    reader = csv.DictReader(io.TextIOWrapper(fh, encoding="utf-8-sig", newline=""))
+    for rec in reader:
+        lei = _clean(rec.get(CSV_LEI), upper=True)
+        if lei:
+            yield lei, _clean(rec.get(CSV_STATUS), upper=True), _clean(rec.get(CSV_RENEWAL))
+
+
+def iter_xml_records(fh: IO[bytes]) -> Iterator[IndexRow]:
+    from lxml import etree
+
+    for _, rec in etree.iterparse(fh, events=("end",), tag="{*}LEIRecord"):
+        lei = _clean(rec.findtext("{*}LEI"), upper=True)
+        status = _clean(rec.findtext("{*}Entity/{*}EntityStatus"), upper=True)
+        renewal = _clean(rec.findtext("{*}Registration/{*}NextRenewalDate"))
+        # keep memory flat: drop the record and anything already processed
+        rec.clear()
+        while rec.getprevious() is not None:
+            del rec.getparent()[0]
+        if lei:
+            yield lei, status, renewal
+
+
+def ingest_file(path: str, index: LeiIndex, kind: str = "golden") -> int:
+    """Stream a golden-copy or delta file (.csv/.xml, optionally zipped) into the index."""
+    with _open_binary(path) as (fh, suffix):
+        if suffix == ".csv":
+            records = iter_csv_records(fh)
+        elif suffix == ".xml":
+            records = iter_xml_records(fh)
+        else:
+            raise ValueError(f"Unsupported golden-copy file type: {suffix}")
+        count = index.upsert_many(records)
+
+    index.record_file(Path(path).name, kind, count)
+    return count
@@ -1,42 +1,43 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import time
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import pandas as pd
 from PySide6 import QtCore, QtWidgets
 
-from .cache import LeiCache
-from .core import GleifClient, LeiLookupFallback, LeiResult, is_valid_lei, normalize_lei, chunked
-from .io_excel import read_table, write_table
+from .config import JobConfig
 
+# pandas / requests / openpyxl load with the engine on the first job, not at startup
+if TYPE_CHECKING:
+    from .core import LeiResult
+    from .engine import EnrichEngine
 
-@dataclass
-class JobConfig:
-    input_path: str
-    output_path: str
-    sheet: Optional[str]
-    lei_col: Optional[str]
-    status_col: str
-    renewal_col: str
-    cache_db: str
-    cache_days: int
-    gleif_batch_size: int
-    gleif_throttle_s: float
-    fallback_enabled: bool
-    fallback_throttle_s: float
+# At most this many progress / result updates per second reach the event loop
+UI_UPDATE_INTERVAL_S = 0.1
 
 
 class EnrichWorker(QtCore.QThread):
     progress = QtCore.Signal(int, int)      # done, total
     message = QtCore.Signal(str)
+    results = QtCore.Signal(object)         # Dict[str, LeiResult], coalesced
     finished_ok = QtCore.Signal(str)        # output path
+    cancelled = QtCore.Signal()             # cancelled before the job started
     failed = QtCore.Signal(str)
 
     def __init__(self, cfg: JobConfig) -> None:
         super().__init__()
         self.cfg = cfg
+        self.engine: Optional["EnrichEngine"] = None
+        self._pending: Dict[str, "LeiResult"] = {}
+        self._last_flush = 0.0
+        self._cancel_requested = False
+
+    def cancel(self) -> None:
+        # the engine only exists once its imports are loaded; _do_work checks for an early request
+        self._cancel_requested = True
+        if self.engine is not None:
+            self.engine.cancel()
 
     def run(self) -> None:
         try:
@@ -44,104 +45,90 @@ class EnrichWorker(QtCore.QThread):
         except Exception as e:
             self.failed.emit(str(e))
 
-    def _find_lei_column(self, df: pd.DataFrame) -> str:
-        if self.cfg.lei_col and self.cfg.lei_col in df.columns:
-            return self.cfg.lei_col
-
-        # common names
-        for c in df.columns:
-            if str(c).strip().lower() in {"lei", "lei_number", "lei number", "lei code"}:
-                return c
-
-        for c in df.columns:
-            if "lei" in str(c).strip().lower():
-                return c
+    def _collect(self, batch: Dict[str, "LeiResult"]) -> None:
+        self._pending.update(batch)
+        if time.monotonic() - self._last_flush >= UI_UPDATE_INTERVAL_S:
+            self._flush()
 
-        raise ValueError("Δεν βρέθηκε στήλη LEI. Δήλωσε 'LEI column name'.")
+    def _flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if self._pending:
+            self.results.emit(self._pending)
+            self._pending = {}
 
     def _do_work(self) -> None:
-        self.message.emit("Reading input file...")
-        df = read_table(self.cfg.input_path, sheet=self.cfg.sheet)
-        lei_col_name = self._find_lei_column(df)
-
-        # Ensure output columns exist
-        if self.cfg.status_col not in df.columns:
-            df[self.cfg.status_col] = None
-        if self.cfg.renewal_col not in df.columns:
-            df[self.cfg.renewal_col] = None
-
-        # Put output columns immediately to the right of LEI col
-        cols = list(df.columns)
-        lei_idx = cols.index(lei_col_name)
-        cols.remove(self.cfg.status_col)
-        cols.remove(self.cfg.renewal_col)
-        cols = cols[:lei_idx + 1] + [self.cfg.status_col, self.cfg.renewal_col] + cols[lei_idx + 1:]
-        df = df[cols]
-
-        # Normalize and collect unique LEIs
-        df[lei_col_name] = df[lei_col_name].map(normalize_lei)
-        unique_leis = [x for x in df[lei_col_name].dropna().unique().tolist() if is_valid_lei(x)]
-        unique_leis.sort()
-
-        total = len(unique_leis)
-        done = 0
-        self.progress.emit(done, total)
-
-        cache = LeiCache(self.cfg.cache_db)
-        gleif = GleifClient(throttle_s=self.cfg.gleif_throttle_s)
-        fallback = LeiLookupFallback(throttle_s=self.cfg.fallback_throttle_s)
-
-        results: dict[str, LeiResult] = {}
-
-        # Cache first
-        self.message.emit("Cache lookup...")
-        for lei in unique_leis:
-            c = cache.get(lei, self.cfg.cache_days)
-            if c:
-                results[lei] = LeiResult(c.entity_status, c.next_renewal_date, source="cache")
-
-        to_fetch = [lei for lei in unique_leis if lei not in results]
-
-        # GLEIF batching
-        self.message.emit("Querying GLEIF API (batched)...")
-        for batch in chunked(to_fetch, self.cfg.gleif_batch_size):
-            batch_res = gleif.lookup_batch(batch)
-            for lei, res in batch_res.items():
-                results[lei] = res
-                cache.put(lei, res.entity_status, res.next_renewal_date, res.source or "gleif")
-
-            done = min(total, len(results))
-            self.progress.emit(done, total)
-
-        # Misses: missing both fields
-        misses = []
-        for lei in to_fetch:
-            r = results.get(lei)
-            if not r or (not r.entity_status and not r.next_renewal_date):
-                misses.append(lei)
-
-        if self.cfg.fallback_enabled and misses:
-            self.message.emit("Fallback to lei-lookup.com for misses (throttled)...")
-            for i, lei in enumerate(misses, start=1):
-                res = fallback.lookup(lei)
-                existing = results.get(lei, LeiResult())
-                merged = LeiResult(
-                    entity_status=existing.entity_status or res.entity_status,
-                    next_renewal_date=existing.next_renewal_date or res.next_renewal_date,
-                    source=res.source if (res.entity_status or res.next_renewal_date) else (existing.source or res.source),
-                )
-                results[lei] = merged
-                cache.put(lei, merged.entity_status, merged.next_renewal_date, merged.source or "lei-lookup")
-
-                self.progress.emit(done + i, total)
-
-        # Write results back
-        self.message.emit("Writing results...")
-        df[self.cfg.status_col] = df[lei_col_name].map(lambda x: results.get(x).entity_status if isinstance(x, str) and x in results else None)
-        df[self.cfg.renewal_col] = df[lei_col_name].map(lambda x: results.get(x).next_renewal_date if isinstance(x, str) and x in results else None)
-
-        write_table(df, self.cfg.output_path)
-        self.finished_ok.emit(self.cfg.output_path)
+        from .engine import EnrichEngine, ThrottledProgress
+
+        if self._cancel_requested:
+            self.cancelled.emit()
+            return
+        self.engine = EnrichEngine(
+            self.cfg,
+            on_progress=ThrottledProgress(self.progress.emit, UI_UPDATE_INTERVAL_S),
+            on_message=self.message.emit,
+            on_results=self._collect,
+        )
+        if self._cancel_requested:   # clicked while the engine was being built
+            self.engine.cancel()
+        output_path = self.engine.run()
+        self._flush()
+        self.finished_ok.emit(output_path)
+
+
+class ResultsModel(QtCore.QAbstractTableModel):
+    """Resolved LEIs, appended in bulk as the worker reports them (one row per unique LEI)."""
+
+    HEADERS = ("LEI", "Entity Status", "Next Renewal Date", "Source")
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._rows: List[List[Optional[str]]] = []
+        self._index: Dict[str, int] = {}
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole or not index.isValid():
+            return None
+        return self._rows[index.row()][index.column()]
+
+    def headerData(
+        self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.DisplayRole
+    ):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return section + 1
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._rows = []
+        self._index = {}
+        self.endResetModel()
+
+    def add_results(self, results: Dict[str, "LeiResult"]) -> None:
+        new: List[List[Optional[str]]] = []
+        for lei, res in results.items():
+            row = [lei, res.entity_status, res.next_renewal_date, res.source]
+            i = self._index.get(lei)
+            if i is None:
+                self._index[lei] = len(self._rows) + len(new)
+                new.append(row)
+            else:
+                # e.g. fallback filled in what GLEIF left empty
+                self._rows[i] = row
+                self.dataChanged.emit(self.index(i, 0), self.index(i, len(self.HEADERS) - 1))
+        if new:
+            # one insert per coalesced update keeps the view cheap at 100k+ rows
+            first = len(self._rows)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(new) - 1)
+            self._rows.extend(new)
+            self.endInsertRows()
 
 
 class MainWindow(QtWidgets.QWidget):
@@ -156,14 +143,29 @@ class MainWindow(QtWidgets.QWidget):
 
         self.fallback_chk = QtWidgets.QCheckBox("Enable fallback (lei-lookup.com) for misses")
         self.fallback_chk.setChecked(False)
+        self.write_back_chk = QtWidgets.QCheckBox(
+            "Keep original workbook (update result cells only, .xlsx)"
+        )
+        self.write_back_chk.setChecked(False)
 
         self.run_btn = QtWidgets.QPushButton("Run")
+        self.cancel_btn = QtWidgets.QPushButton("Cancel")
+        self.cancel_btn.setEnabled(False)
         self.pick_in_btn = QtWidgets.QPushButton("Browse...")
         self.pick_out_btn = QtWidgets.QPushButton("Save as...")
 
         self.progress = QtWidgets.QProgressBar()
         self.log = QtWidgets.QPlainTextEdit()
         self.log.setReadOnly(True)
+        self.log.setMaximumBlockCount(5000)
+
+        self.results_model = ResultsModel(self)
+        self.results_view = QtWidgets.QTableView()
+        self.results_view.setModel(self.results_model)
+        # fixed row heights: the view never measures rows, so 100k+ rows stay cheap
+        self.results_view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.results_view.verticalHeader().setDefaultSectionSize(22)
+        self.results_view.horizontalHeader().setStretchLastSection(True)
 
         form = QtWidgets.QFormLayout()
         in_row = QtWidgets.QHBoxLayout()
@@ -179,16 +181,22 @@ class MainWindow(QtWidgets.QWidget):
         form.addRow("LEI column name (optional)", self.lei_col_edit)
         form.addRow("Sheet name (optional)", self.sheet_edit)
         form.addRow("", self.fallback_chk)
+        form.addRow("", self.write_back_chk)
 
         v = QtWidgets.QVBoxLayout(self)
         v.addLayout(form)
-        v.addWidget(self.run_btn)
+        buttons = QtWidgets.QHBoxLayout()
+        buttons.addWidget(self.run_btn)
+        buttons.addWidget(self.cancel_btn)
+        v.addLayout(buttons)
         v.addWidget(self.progress)
-        v.addWidget(self.log)
+        v.addWidget(self.results_view, 3)
+        v.addWidget(self.log, 1)
 
         self.pick_in_btn.clicked.connect(self.pick_input)
         self.pick_out_btn.clicked.connect(self.pick_output)
         self.run_btn.clicked.connect(self.start_job)
+        self.cancel_btn.clicked.connect(self.cancel_job)
 
         self.worker: Optional[EnrichWorker] = None
 
@@ -243,19 +251,32 @@ class MainWindow(QtWidgets.QWidget):
             gleif_throttle_s=0.2,
             fallback_enabled=self.fallback_chk.isChecked(),
             fallback_throttle_s=1.0,
+            renewal_aware_ttl=True,
+            stale_while_revalidate_days=7,
+            xlsx_write_back=self.write_back_chk.isChecked(),
         )
 
         self.run_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
         self.progress.setValue(0)
+        self.results_model.clear()
         self.append_log("Starting...")
 
         self.worker = EnrichWorker(cfg)
         self.worker.message.connect(self.append_log)
         self.worker.progress.connect(self.on_progress)
+        self.worker.results.connect(self.results_model.add_results)
         self.worker.finished_ok.connect(self.on_finished_ok)
+        self.worker.cancelled.connect(self.on_cancelled)
         self.worker.failed.connect(self.on_failed)
         self.worker.start()
 
+    def cancel_job(self) -> None:
+        if self.worker is not None:
+            self.append_log("Cancelling after the current batch...")
+            self.cancel_btn.setEnabled(False)
+            self.worker.cancel()
+
     def on_progress(self, done: int, total: int) -> None:
         if total <= 0:
             self.progress.setValue(0)
@@ -266,10 +287,22 @@ class MainWindow(QtWidgets.QWidget):
     def on_finished_ok(self, output_path: str) -> None:
         self.append_log(f"Done. Output: {output_path}")
         self.run_btn.setEnabled(True)
-        QtWidgets.QMessageBox.information(self, "Completed", f"Saved: {output_path}")
+        self.cancel_btn.setEnabled(False)
+        cancelled = (
+            self.worker is not None
+            and self.worker.engine is not None
+            and self.worker.engine.cancelled
+        )
+        title = "Cancelled (partial results)" if cancelled else "Completed"
+        QtWidgets.QMessageBox.information(self, title, f"Saved: {output_path}")
+
+    def on_cancelled(self) -> None:
+        self.append_log("Cancelled before the job started; nothing was written.")
+        self.run_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
 
     def on_failed(self, err: str) -> None:
         self.append_log(f"FAILED: {err}")
         self.run_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
         QtWidgets.QMessageBox.critical(self, "Failed", err)
-        
\ No newline at end of file
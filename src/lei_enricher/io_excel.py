@@ -1,33 +1,106 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
 
-def read_table(path: str, sheet: Optional[str] = None) -> pd.DataFrame:
+# Arrow-based formats; require: pip install ".[parquet]"
+PARQUET_SUFFIXES = {".parquet", ".pq"}
+FEATHER_SUFFIXES = {".feather", ".arrow"}
+COLUMNAR_SUFFIXES = PARQUET_SUFFIXES | FEATHER_SUFFIXES
+
+
+def is_columnar(path: str) -> bool:
+    return Path(path).suffix.lower() in COLUMNAR_SUFFIXES
+
+
+def read_table(
+    path: str, sheet: Optional[str] = None, columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """`columns` projects the read; Parquet/Feather then skip the other columns entirely."""
     p = Path(path)
     suffix = p.suffix.lower()
 
     if suffix == ".csv":
-        return pd.read_csv(path)
+        return pd.read_csv(path, usecols=columns)
 
     if suffix in {".xlsx", ".xls"}:
         # If sheet is None, read FIRST sheet as DataFrame (not dict)
         if sheet is None:
-            return pd.read_excel(path)
-        return pd.read_excel(path, sheet_name=sheet)
+            return pd.read_excel(path, usecols=columns)
+        return pd.read_excel(path, sheet_name=sheet, usecols=columns)
 
     if suffix == ".ods":
         # requires: pip install ".[ods]"
         if sheet is None:
-            return pd.read_excel(path, engine="odf")
-        return pd.read_excel(path, sheet_name=sheet, engine="odf")
+            return pd.read_excel(path, engine="odf", usecols=columns)
+        return pd.read_excel(path, sheet_name=sheet, engine="odf", usecols=columns)
+
+    if suffix in PARQUET_SUFFIXES:
+        return pd.read_parquet(path, columns=columns)
+
+    if suffix in FEATHER_SUFFIXES:
+        return pd.read_feather(path, columns=columns)
 
     raise ValueError(f"Unsupported input file type: {suffix}")
 
 
+def table_columns(path: str, sheet: Optional[str] = None) -> List[str]:
+    """Header only: schema for Arrow formats, first row otherwise."""
+    suffix = Path(path).suffix.lower()
+    if suffix in PARQUET_SUFFIXES:
+        import pyarrow.parquet as pq
+
+        return list(pq.read_schema(path).names)
+    if suffix in FEATHER_SUFFIXES:
+        import pyarrow.ipc as ipc
+
+        with ipc.open_file(path) as reader:
+            return list(reader.schema.names)
+    if suffix == ".csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    if suffix == ".xlsx":
+        return list(next(iter_table_chunks(path, sheet=sheet, chunksize=1), pd.DataFrame()).columns)
+    return list(read_table(path, sheet=sheet).columns)
+
+
+def list_sheets(path: str) -> List[Optional[str]]:
+    """Sheet names of a workbook; [None] for single-table formats like CSV."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv" or suffix in COLUMNAR_SUFFIXES:
+        return [None]
+    if suffix in {".xlsx", ".xls", ".ods"}:
+        engine = "odf" if suffix == ".ods" else None
+        with pd.ExcelFile(path, engine=engine) as xl:
+            return list(xl.sheet_names)
+    raise ValueError(f"Unsupported input file type: {suffix}")
+
+
+def write_tables(frames: Dict[str, pd.DataFrame], path: str) -> None:
+    """Several named sheets into one workbook (a single frame may go to CSV)."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv" or suffix in COLUMNAR_SUFFIXES:
+        if len(frames) != 1:
+            raise ValueError(
+                f"{suffix} output holds a single table; use .xlsx for multi-sheet output"
+            )
+        write_table(next(iter(frames.values())), path)
+        return
+
+    if suffix in {".xlsx", ".xls"}:
+        with pd.ExcelWriter(path) as writer:
+            for name, df in frames.items():
+                df.to_excel(writer, sheet_name=name, index=False)
+        return
+
+    if suffix == ".ods":
+        raise ValueError("ODS output is not enabled. Please save output as .xlsx")
+
+    raise ValueError(f"Unsupported output file type: {suffix}")
+
+
 def write_table(df: pd.DataFrame, path: str) -> None:
     p = Path(path)
     suffix = p.suffix.lower()
@@ -40,9 +113,234 @@ def write_table(df: pd.DataFrame, path: str) -> None:
         df.to_excel(path, index=False)
         return
 
+    if suffix in PARQUET_SUFFIXES:
+        df.to_parquet(path, index=False)
+        return
+
+    if suffix in FEATHER_SUFFIXES:
+        df.reset_index(drop=True).to_feather(path)
+        return
+
     # safest default: force xlsx output
     if suffix == ".ods":
         raise ValueError("ODS output is not enabled. Please save output as .xlsx")
 
     raise ValueError(f"Unsupported output file type: {suffix}")
 
+
+def write_back_xlsx(
+    src_path: str,
+    out_path: str,
+    updates: Dict[Optional[str], Tuple[pd.DataFrame, str]],
+    columns: List[str],
+) -> None:
+    """
+    Writes only `columns` of each frame into the original workbook and saves to
+    out_path (may equal src_path). A result column already on row 1 is updated
+    in place; a missing one is appended after the last used column, so no
+    existing cell moves and formulas, widths and merged ranges stay valid.
+    Row i of a frame goes to sheet row i + 2 (header on row 1, as read_table
+    reads it).
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(src_path)
+    try:
+        for sheet, (df, lei_col) in updates.items():
+            ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+            header = {
+                str(c.value).strip(): c.column for c in ws[1] if c.value is not None
+            }
+            if lei_col not in header:
+                raise ValueError(f"LEI column {lei_col!r} not found on row 1 of sheet {ws.title!r}")
+
+            last = ws.max_column
+            for name in columns:
+                col = header.get(name)
+                if col is None:
+                    # insert_cols would not rewrite formulas, widths or merges
+                    last += 1
+                    ws.cell(row=1, column=last, value=name)
+                    header[name] = col = last
+                values = df[name].astype(object).where(df[name].notna(), None)
+                for i, value in enumerate(values, start=2):
+                    ws.cell(row=i, column=col, value=value)
+        wb.save(out_path)
+    finally:
+        wb.close()
+
+
+def _frame_from_rows(header: List[str], rows: List[tuple], start: int) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=header)
+    df.index = pd.RangeIndex(start, start + len(df))
+    return df
+
+
+def _iter_arrow_chunks(
+    path: str, chunksize: int, columns: Optional[List[str]]
+) -> Iterator[pd.DataFrame]:
+    suffix = Path(path).suffix.lower()
+    if suffix in PARQUET_SUFFIXES:
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns)
+    else:
+        import pyarrow.feather as feather
+
+        batches = feather.read_table(path, columns=columns, memory_map=True).to_batches(
+            max_chunksize=chunksize
+        )
+
+    start = 0
+    for batch in batches:
+        df = batch.to_pandas()
+        df.index = pd.RangeIndex(start, start + len(df))
+        start += len(df)
+        yield df
+
+
+def _iter_xlsx_chunks(path: str, sheet: Optional[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        first = next(rows, None)
+        if first is None:
+            return
+        header = [
+            str(v) if v is not None else f"Unnamed: {i}" for i, v in enumerate(first)
+        ]
+        width = len(header)
+
+        buf: List[tuple] = []
+        start = 0
+        blanks = 0
+        for row in rows:
+            # like read_excel: blank rows inside the data are kept, trailing ones dropped
+            if row is None or all(v is None for v in row):
+                blanks += 1
+                continue
+            buf.extend([(None,) * width] * blanks)
+            blanks = 0
+            buf.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            while len(buf) >= chunksize:
+                yield _frame_from_rows(header, buf[:chunksize], start)
+                start += chunksize
+                buf = buf[chunksize:]
+        if buf:
+            yield _frame_from_rows(header, buf, start)
+    finally:
+        wb.close()
+
+
+def iter_table_chunks(
+    path: str,
+    sheet: Optional[str] = None,
+    chunksize: int = 50_000,
+    columns: Optional[List[str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Streaming counterpart of read_table: yields DataFrames of at most `chunksize` rows.
+    CSV uses pandas chunked reading, XLSX openpyxl read-only iteration, Parquet /
+    Feather Arrow record batches (only `columns` are decoded).
+    """
+    suffix = Path(path).suffix.lower()
+
+    if suffix == ".csv":
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+        return
+
+    if suffix in COLUMNAR_SUFFIXES:
+        yield from _iter_arrow_chunks(path, chunksize, columns)
+        return
+
+    if suffix == ".xlsx":
+        for df in _iter_xlsx_chunks(path, sheet, chunksize):
+            yield df[columns] if columns is not None else df
+        return
+
+    # .xls / .ods have no streaming reader; slice the full frame
+    df = read_table(path, sheet=sheet, columns=columns)
+    for i in range(0, len(df), chunksize):
+        yield df.iloc[i : i + chunksize]
+
+
+def _cell_values(df: pd.DataFrame) -> Iterator[list]:
+    values = df.astype(object).where(df.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        yield list(row)
+
+
+class TableChunkWriter:
+    """
+    Streaming counterpart of write_table: append DataFrame chunks, then close().
+    XLSX output goes through an openpyxl write-only workbook.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.suffix = Path(path).suffix.lower()
+        self._header_written = False
+        self._wb = None
+        self._ws = None
+        self._arrow = None   # pyarrow ParquetWriter / RecordBatchFileWriter
+        self._schema = None
+
+        if self.suffix in COLUMNAR_SUFFIXES:
+            pass   # opened on the first chunk, which fixes the schema
+        elif self.suffix in {".xlsx", ".xls"}:
+            from openpyxl import Workbook
+
+            self._wb = Workbook(write_only=True)
+            self._ws = self._wb.create_sheet()
+        elif self.suffix == ".ods":
+            raise ValueError("ODS output is not enabled. Please save output as .xlsx")
+        elif self.suffix != ".csv":
+            raise ValueError(f"Unsupported output file type: {self.suffix}")
+
+    def _write_arrow(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+
+        if self._arrow is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._schema = table.schema
+            if self.suffix in PARQUET_SUFFIXES:
+                import pyarrow.parquet as pq
+
+                self._arrow = pq.ParquetWriter(self.path, self._schema)
+            else:
+                self._arrow = pa.ipc.new_file(self.path, self._schema)
+        else:
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._arrow.write_table(table)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.suffix in COLUMNAR_SUFFIXES:
+            self._write_arrow(df)
+        elif self.suffix == ".csv":
+            df.to_csv(self.path, index=False, mode="a" if self._header_written else "w",
+                      header=not self._header_written)
+        else:
+            if not self._header_written:
+                self._ws.append([str(c) for c in df.columns])
+            for row in _cell_values(df):
+                self._ws.append(row)
+        self._header_written = True
+
+    def close(self) -> None:
+        if self.suffix == ".csv" and not self._header_written:
+            Path(self.path).write_text("")
+        if self._arrow is not None:
+            self._arrow.close()
+            self._arrow = None
+        if self._wb is not None:
+            self._wb.save(self.path)
+            self._wb = None
+
+    def __enter__(self) -> "TableChunkWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
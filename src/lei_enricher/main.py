@@ -1,13 +1,23 @@
 from __future__ import annotations
 
 import sys
-from PySide6 import QtWidgets
-from .gui import MainWindow
 
 
 def main() -> None:
+    # `lei-enricher <command> ...` runs the headless CLI without loading Qt;
+    # other arguments (e.g. a file dropped on the executable) still open the GUI
+    from .cli import COMMANDS
+
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        from .cli import main as cli_main
+
+        sys.exit(cli_main(sys.argv[1:]))
+
+    from PySide6 import QtWidgets
+    from .gui import MainWindow
+
     app = QtWidgets.QApplication(sys.argv)
     w = MainWindow()
     w.resize(800, 520)
     w.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+STAGES = ("read", "normalize", "cache", "gleif", "fallback", "parents", "write")
+
+# Upper bounds (seconds) of the GLEIF batch latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# ... and of the per-response JSON decode time
+DECODE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += value
+        self.n += 1
+
+    def to_dict(self) -> dict:
+        labels = [str(b) for b in self.buckets] + ["+Inf"]
+        return {"buckets": dict(zip(labels, self.counts)), "sum": self.total, "count": self.n}
+
+
+class RunMetrics:
+    """
+    Per-run counters, stage timers and the GLEIF latency histogram.
+    Thread-safe: GLEIF / fallback workers report from their own threads.
+    """
+
+    def __init__(self) -> None:
+        self.stage_seconds: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.gleif_latency = Histogram()
+        self.gleif_decode = Histogram(DECODE_BUCKETS)
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe_gleif_batch(self, seconds: float) -> None:
+        with self._lock:
+            self.gleif_latency.observe(seconds)
+
+    def observe_gleif_decode(self, seconds: float, wire_bytes: int, body_bytes: int) -> None:
+        """One GLEIF response: JSON decode time, wire (compressed) bytes and decoded body size."""
+        with self._lock:
+            self.gleif_decode.observe(seconds)
+            self.counters["gleif_bytes_wire"] = (
+                self.counters.get("gleif_bytes_wire", 0) + wire_bytes
+            )
+            self.counters["gleif_bytes_body"] = (
+                self.counters.get("gleif_bytes_body", 0) + body_bytes
+            )
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stage_seconds[name] = (
+                    self.stage_seconds.get(name, 0.0) + time.perf_counter() - t0
+                )
+
+    @staticmethod
+    def _ratio(num: int, den: int) -> Optional[float]:
+        return num / den if den else None
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+            elapsed = time.perf_counter() - self.started
+            return {
+                "elapsed_seconds": elapsed,
+                "stage_seconds": {s: self.stage_seconds.get(s, 0.0) for s in STAGES},
+                "counters": c,
+                "cache_hit_ratio": self._ratio(c.get("cache_hits", 0), c.get("cache_lookups", 0)),
+                "fallback_success_rate": self._ratio(
+                    c.get("fallback_success", 0), c.get("fallback_attempts", 0)
+                ),
+                "rows_per_second": self._ratio(c.get("rows", 0), elapsed),
+                "leis_per_second": self._ratio(c.get("unique_leis", 0), elapsed),
+                "gleif_batch_latency": self.gleif_latency.to_dict(),
+                "gleif_decode_seconds": self.gleif_decode.to_dict(),
+                "gleif_wire_bytes_per_batch": self._ratio(
+                    c.get("gleif_bytes_wire", 0), c.get("gleif_batches", 0)
+                ),
+                "gleif_compression_ratio": self._ratio(
+                    c.get("gleif_bytes_body", 0), c.get("gleif_bytes_wire", 0)
+                ),
+            }
+
+    def summary(self) -> str:
+        d = self.to_dict()
+        stages = ", ".join(f"{k} {v:.1f}s" for k, v in d["stage_seconds"].items() if v)
+        ratio = d["cache_hit_ratio"]
+        hit = f"{ratio:.0%}" if ratio is not None else "n/a"
+        return f"Run took {d['elapsed_seconds']:.1f}s ({stages}); cache hit ratio {hit}"
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, indent=2)
+
+    def prometheus_lines(self, prefix: str = "lei_enricher") -> List[str]:
+        d = self.to_dict()
+        lines = [f"# TYPE {prefix}_stage_seconds gauge"]
+        for stage, secs in d["stage_seconds"].items():
+            lines.append(f'{prefix}_stage_seconds{{stage="{stage}"}} {secs:.6f}')
+        for name, value in sorted(d["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name in (
+            "cache_hit_ratio",
+            "fallback_success_rate",
+            "rows_per_second",
+            "leis_per_second",
+            "gleif_wire_bytes_per_batch",
+            "gleif_compression_ratio",
+        ):
+            if d[name] is not None:
+                lines.append(f"# TYPE {prefix}_{name} gauge")
+                lines.append(f"{prefix}_{name} {d[name]:.6f}")
+
+        histograms = (
+            ("gleif_batch_latency", "gleif_batch_seconds"),
+            ("gleif_decode_seconds", "gleif_decode_seconds"),
+        )
+        for key, metric in histograms:
+            hist = d[key]
+            lines.append(f"# TYPE {prefix}_{metric} histogram")
+            cumulative = 0
+            for le, count in hist["buckets"].items():
+                cumulative += count
+                lines.append(f'{prefix}_{metric}_bucket{{le="{le}"}} {cumulative}')
+            lines.append(f"{prefix}_{metric}_sum {hist['sum']:.6f}")
+            lines.append(f"{prefix}_{metric}_count {hist['count']}")
+        return lines
+
+    def write_prometheus(self, path: str) -> None:
+        # textfile collector reads whole files: write then rename
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(self.prometheus_lines()) + "\n")
+        os.replace(tmp, path)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from .checkpoint import file_sha256
+from .engine import (
+    EnrichEngine,
+    JobConfig,
+    MessageCallback,
+    ProgressCallback,
+    find_lei_column,
+)
+from .io_excel import (
+    COLUMNAR_SUFFIXES,
+    is_columnar,
+    list_sheets,
+    read_table,
+    write_back_xlsx,
+    write_tables,
+)
+
+INPUT_SUFFIXES = {".csv", ".xlsx", ".xls", ".ods"} | COLUMNAR_SUFFIXES
+
+
+@dataclass
+class InputFile:
+    path: str
+    sheets: List[Optional[str]]   # [None] = first sheet / CSV
+    output_path: str
+
+
+def expand_inputs(specs: List[str]) -> List[str]:
+    """Files, directories (non-recursive) and glob patterns -> sorted, de-duplicated file list."""
+    paths: List[str] = []
+    for spec in specs:
+        p = Path(spec)
+        if p.is_dir():
+            matches = [str(c) for c in p.iterdir() if c.suffix.lower() in INPUT_SUFFIXES]
+        elif p.exists():
+            matches = [spec]
+        else:
+            matches = glob.glob(spec, recursive=True)
+        # skip Excel lock files (~$book.xlsx)
+        paths.extend(m for m in matches if not Path(m).name.startswith("~$"))
+    return sorted(dict.fromkeys(str(Path(m)) for m in paths))
+
+
+def plan_outputs(
+    paths: List[str], output_dir: str, all_sheets: bool, sheet: Optional[str]
+) -> List[InputFile]:
+    out_dir = Path(output_dir)
+    used: Set[str] = set()
+    plan: List[InputFile] = []
+    for path in paths:
+        p = Path(path)
+        # single-table formats keep their format, workbooks become .xlsx
+        ext = p.suffix.lower() if p.suffix.lower() in {".csv"} | COLUMNAR_SUFFIXES else ".xlsx"
+        name = f"{p.stem}_enriched{ext}"
+        n = 2
+        while name in used:
+            name = f"{p.stem}_enriched_{n}{ext}"
+            n += 1
+        used.add(name)
+        sheets = list_sheets(path) if all_sheets else [sheet]
+        plan.append(InputFile(path=path, sheets=sheets, output_path=str(out_dir / name)))
+    return plan
+
+
+class MultiFileEngine(EnrichEngine):
+    """
+    One job over many files / sheets: reads everything, resolves the union of
+    unique LEIs once (cache -> GLEIF -> fallback), then writes every output.
+    HTTP calls scale with distinct LEIs, not with the number of files.
+    Sheets without an LEI column (notes, summaries) are copied unchanged.
+    """
+
+    def __init__(
+        self,
+        cfg: JobConfig,
+        inputs: List[InputFile],
+        on_progress: Optional[ProgressCallback] = None,
+        on_message: Optional[MessageCallback] = None,
+    ) -> None:
+        super().__init__(cfg, on_progress=on_progress, on_message=on_message)
+        self.inputs = inputs
+
+    def input_fingerprint(self) -> str:
+        h = hashlib.sha256()
+        for item in self.inputs:
+            h.update(item.path.encode("utf-8"))
+            h.update(file_sha256(item.path).encode("ascii"))
+        return h.hexdigest()
+
+    def run_all(self) -> List[str]:
+        # lei_col_name None: the sheet has no LEI column and is written back as read
+        Frames = Dict[Optional[str], Tuple[pd.DataFrame, Optional[str]]]
+        loaded: List[Tuple[InputFile, Frames]] = []
+        leis: Set[str] = set()
+
+        for item in self.inputs:
+            self.on_message(f"Reading {item.path}...")
+            frames: Frames = {}
+            for sheet in item.sheets:
+                with self.metrics.stage("read"):
+                    df = read_table(item.path, sheet=sheet)
+                try:
+                    find_lei_column(df, self.cfg.lei_col)
+                except ValueError:
+                    self.on_message(
+                        f"{item.path} [{sheet or 'first sheet'}]: no LEI column, copied unchanged"
+                    )
+                    frames[sheet] = (df, None)
+                    continue
+                self.metrics.incr("rows", len(df))
+                with self.metrics.stage("normalize"):
+                    df, lei_col_name = self.prepare(df)
+                    leis.update(self.unique_leis(df, lei_col_name))
+                frames[sheet] = (df, lei_col_name)
+            loaded.append((item, frames))
+
+        self.on_message(f"{len(leis)} distinct LEIs across {len(self.inputs)} file(s)")
+        results = self.resolve(sorted(leis))
+
+        outputs = []
+        with self.metrics.stage("write"):
+            for item, frames in loaded:
+                self.on_message(f"Writing {item.output_path}...")
+                for sheet, (df, lei_col_name) in frames.items():
+                    if lei_col_name is None:
+                        continue
+                    self.fill(df, lei_col_name, results)
+                    if is_columnar(item.output_path):
+                        frames[sheet] = (self.typed(df), lei_col_name)
+                Path(item.output_path).parent.mkdir(parents=True, exist_ok=True)
+                if self.writes_back(item.path, item.output_path):
+                    updates = {k: v for k, v in frames.items() if v[1] is not None}
+                    write_back_xlsx(item.path, item.output_path, updates, self.result_columns())
+                else:
+                    write_tables(
+                        {name or "Sheet1": df for name, (df, _) in frames.items()}, item.output_path
+                    )
+                outputs.append(item.output_path)
+
+        self.finish()
+        return outputs
+
+    def run(self) -> str:
+        return "\n".join(self.run_all())
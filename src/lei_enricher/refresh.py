@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, time as dtime
+from typing import Callable, Optional, Tuple
+
+import requests
+
+from .cache import LeiCache, TtlPolicy
+from .core import GleifBatchError, GleifClient, chunked
+from .metrics import RunMetrics
+
+
+def parse_window(spec: str) -> Tuple[dtime, dtime]:
+    """'22:00-06:00' -> (22:00, 06:00). The window may wrap past midnight."""
+    start, _, end = spec.partition("-")
+    try:
+        return dtime.fromisoformat(start.strip()), dtime.fromisoformat(end.strip())
+    except ValueError:
+        raise ValueError(f"Invalid time window {spec!r}; expected HH:MM-HH:MM") from None
+
+
+def in_window(window: Optional[Tuple[dtime, dtime]], now: Optional[datetime] = None) -> bool:
+    if window is None:
+        return True
+    t = (now or datetime.now()).time()
+    start, end = window
+    if start <= end:
+        return start <= t < end
+    return t >= start or t < end
+
+
+@dataclass
+class RefreshConfig:
+    cache_db: str
+    cache_days: int = 14
+    renewal_aware_ttl: bool = False
+    horizon_days: float = 1          # refresh what expires within this many days
+    max_requests: int = 100  # GLEIF HTTP requests for one run (pages and bisected parts count)
+    batch_size: int = 200
+    window: Optional[str] = None     # local time, e.g. "22:00-06:00"; None = any time
+    cache_wal: bool = False
+
+
+def refresh_cache(
+    cfg: RefreshConfig,
+    gleif: GleifClient,
+    metrics: Optional[RunMetrics] = None,
+    on_message: Optional[Callable[[str], None]] = None,
+) -> dict:
+    """
+    Proactively re-fetches cache entries that are stale or about to expire,
+    most urgent first, in batches, stopping at the request budget or when the
+    off-hours window closes. The budget counts every HTTP request the client
+    sends and is enforced on `gleif` itself. Returns a summary.
+    """
+    on_message = on_message or (lambda msg: None)
+    metrics = metrics or RunMetrics()
+    window = parse_window(cfg.window) if cfg.window else None
+    summary = {"due": 0, "selected": 0, "refreshed": 0, "requests": 0, "stopped": None}
+
+    if not in_window(window):
+        summary["stopped"] = "outside window"
+        on_message(f"Outside the refresh window {cfg.window}; nothing to do.")
+        return summary
+
+    cache = LeiCache(cfg.cache_db, wal=cfg.cache_wal, metrics=metrics)
+    policy = TtlPolicy(default_days=cfg.cache_days) if cfg.renewal_aware_ttl else None
+    due = cache.due_for_refresh(cfg.cache_days, policy, cfg.horizon_days)
+    selected = due[: cfg.max_requests * cfg.batch_size]
+    summary["due"], summary["selected"] = len(due), len(selected)
+    on_message(f"{len(due)} entries due for refresh; refreshing {len(selected)}...")
+
+    sent = gleif.requests
+    gleif.request_budget = sent + cfg.max_requests
+    try:
+        for batch in chunked(selected, cfg.batch_size):
+            if not in_window(window):
+                summary["stopped"] = "window closed"
+                on_message("Refresh window closed; stopping.")
+                break
+            if gleif.requests >= gleif.request_budget:
+                break
+            try:
+                res = gleif.lookup_batch(batch)
+            except (GleifBatchError, requests.RequestException) as e:
+                if gleif.requests >= gleif.request_budget:
+                    break
+                summary["stopped"] = "GLEIF unavailable"
+                on_message(f"GLEIF unavailable ({e}); stopping.")
+                break
+            cache.put_many(res, default_source="gleif")
+            summary["refreshed"] += len(res)
+            metrics.incr("cache_revalidated", len(res))
+        budget_spent = gleif.requests >= gleif.request_budget
+    finally:
+        gleif.request_budget = None
+    summary["requests"] = gleif.requests - sent
+
+    if summary["stopped"] is None and (budget_spent or len(selected) < len(due)):
+        summary["stopped"] = "request budget"
+    on_message(
+        f"Refreshed {summary['refreshed']} entries with {summary['requests']} GLEIF requests."
+    )
+    return summary
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from .cache import MISS_INVALID, MISS_NOT_FOUND, LeiCache, TtlPolicy
+from .core import (
+    GleifBatchError,
+    GleifClient,
+    LeiResult,
+    is_valid_lei,
+    lei_checksum_ok,
+    normalize_lei,
+)
+from .metrics import RunMetrics
+
+# batch, found, rejected, failed (no answer from GLEIF)
+ResultsCallback = Callable[[List[str], Dict[str, LeiResult], List[str], List[str]], None]
+
+
+class LookupCoalescer:
+    """
+    Turns many concurrent single-LEI misses into few GLEIF calls: pending LEIs
+    are collected for `window_s` (or until `max_batch` are queued) and sent as one
+    lookup_batch from a single dispatcher thread, so all callers share one rate
+    budget. Callers asking for an LEI already in flight share its Future.
+    """
+
+    def __init__(
+        self,
+        gleif: GleifClient,
+        on_results: Optional[ResultsCallback] = None,
+        window_s: float = 0.05,
+        max_batch: int = 200,
+        metrics: Optional[RunMetrics] = None,
+    ) -> None:
+        self.gleif = gleif
+        self.on_results = on_results
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self.metrics = metrics
+        self._queue: List[str] = []
+        self._inflight: Dict[str, Future] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="lei-coalescer", daemon=True)
+        self._thread.start()
+
+    def submit(self, leis: List[str]) -> Dict[str, Future]:
+        out: Dict[str, Future] = {}
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("coalescer is closed")
+            for lei in leis:
+                fut = self._inflight.get(lei)
+                if fut is None:
+                    fut = self._inflight[lei] = Future()
+                    self._queue.append(lei)
+                elif self.metrics is not None:
+                    self.metrics.incr("service_deduplicated")
+                out[lei] = fut
+            self._cond.notify_all()
+        return out
+
+    def _next_batch(self) -> Optional[List[str]]:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            deadline = time.monotonic() + self.window_s
+            while len(self._queue) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[: self.max_batch]
+            del self._queue[: self.max_batch]
+            return batch
+
+    def _settle(
+        self,
+        batch: List[str],
+        found: Dict[str, LeiResult],
+        failed: List[str],
+        error: Optional[BaseException],
+    ) -> None:
+        failed_set = set(failed)
+        with self._cond:
+            futures = [self._inflight.pop(lei) for lei in batch]
+        for lei, fut in zip(batch, futures):
+            if error is not None:
+                fut.set_exception(error)
+            elif lei in failed_set:
+                # GLEIF gave no answer: the caller gets an error, not "not found"
+                fut.set_exception(GleifBatchError(None, "GLEIF did not answer"))
+            else:
+                fut.set_result(found.get(lei))
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if self.metrics is not None:
+                self.metrics.incr("service_gleif_batches")
+            try:
+                found = self.gleif.lookup_batch(batch)
+                # only this thread uses the client: everything rejected / failed is from this batch
+                rejected, failed = list(self.gleif.rejected), list(self.gleif.failed)
+                if self.on_results is not None:
+                    self.on_results(batch, found, rejected, failed)
+            except Exception as e:
+                self._settle(batch, {}, [], e)
+                continue
+            finally:
+                del self.gleif.rejected[:], self.gleif.failed[:]
+            self._settle(batch, found, failed, None)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+
+@dataclass
+class ServiceConfig:
+    cache_db: str
+    cache_days: int = 14
+    negative_cache_days: float = 2
+    renewal_aware_ttl: bool = False
+    verify_checksum: bool = True
+    window_s: float = 0.05
+    max_batch: int = 200
+    timeout_s: float = 60.0   # how long a request waits for GLEIF
+
+
+class LeiService:
+    """Cache-first LEI lookups for other systems; misses go through a LookupCoalescer."""
+
+    def __init__(
+        self, cfg: ServiceConfig, gleif: GleifClient, metrics: Optional[RunMetrics] = None
+    ) -> None:
+        self.cfg = cfg
+        self.metrics = metrics or RunMetrics()
+        self.policy = TtlPolicy(default_days=cfg.cache_days) if cfg.renewal_aware_ttl else None
+        # one connection for all handler threads (ThreadingHTTPServer starts one per
+        # connection), opened and set up once; _cache_lock serializes its use
+        self._cache = LeiCache(cfg.cache_db, metrics=self.metrics, check_same_thread=False)
+        self._cache_lock = threading.Lock()
+        self.coalescer = LookupCoalescer(
+            gleif,
+            on_results=self._store,
+            window_s=cfg.window_s,
+            max_batch=cfg.max_batch,
+            metrics=self.metrics,
+        )
+
+    def _store(
+        self, batch: List[str], found: Dict[str, LeiResult], rejected: List[str], failed: List[str]
+    ) -> None:
+        # runs on the dispatcher thread; LEIs GLEIF didn't answer for are not misses
+        skip = set(rejected) | set(failed)
+        with self._cache_lock:
+            self._cache.put_many(found, default_source="gleif")
+            if self.cfg.negative_cache_days > 0:
+                self._cache.put_misses(rejected, MISS_INVALID)
+                self._cache.put_misses(
+                    [lei for lei in batch if lei not in found and lei not in skip], MISS_NOT_FOUND
+                )
+
+    def valid(self, lei: Optional[str]) -> bool:
+        # normalize_lei("") is None
+        return (
+            lei is not None
+            and is_valid_lei(lei)
+            and (not self.cfg.verify_checksum or lei_checksum_ok(lei))
+        )
+
+    def lookup(self, leis: List[str]) -> Dict[str, Optional[LeiResult]]:
+        """normalized LEI -> result, None when GLEIF doesn't know it. Invalid LEIs are left out."""
+        wanted = [lei for lei in dict.fromkeys(normalize_lei(x) for x in leis) if self.valid(lei)]
+        self.metrics.incr("service_lookups", len(wanted))
+
+        out: Dict[str, Optional[LeiResult]] = {}
+        with self._cache_lock:
+            for lei, c in self._cache.get_many(
+                wanted, self.cfg.cache_days, policy=self.policy
+            ).items():
+                out[lei] = LeiResult(c.entity_status, c.next_renewal_date, source="cache")
+            pending = [lei for lei in wanted if lei not in out]
+            if pending and self.cfg.negative_cache_days > 0:
+                for lei in self._cache.get_misses(pending, self.cfg.negative_cache_days):
+                    out[lei] = None
+                pending = [lei for lei in pending if lei not in out]
+
+        deadline = time.monotonic() + self.cfg.timeout_s
+        for lei, fut in self.coalescer.submit(pending).items():
+            out[lei] = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+        return out
+
+    def close(self) -> None:
+        self.coalescer.close()
+        self._cache.conn.close()
+
+
+def _result_json(lei: str, res: Optional[LeiResult]) -> Optional[dict]:
+    if res is None:
+        return None
+    return {
+        "lei": lei,
+        "entity_status": res.entity_status,
+        "next_renewal_date": res.next_renewal_date,
+        "source": res.source,
+    }
+
+
+def make_server(
+    service: LeiService, host: str = "127.0.0.1", port: int = 8080
+) -> ThreadingHTTPServer:
+    """
+    GET  /lei/<lei>     -> 200 record, 404 unknown, 400 invalid, 503 GLEIF unavailable
+    POST /lei/batch     {"leis": [...]} -> {"results": {lei: record | null}}
+    GET  /metrics       Prometheus text format
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def _json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _lookup(self, leis: List[str]) -> Optional[Dict[str, Optional[LeiResult]]]:
+            try:
+                return service.lookup(leis)
+            except FutureTimeout:
+                self._json(504, {"error": "GLEIF lookup timed out"})
+            except (GleifBatchError, requests.RequestException) as e:
+                self._json(503, {"error": f"GLEIF unavailable: {e}"})
+            except Exception as e:
+                self._json(502, {"error": f"GLEIF lookup failed: {e}"})
+            return None
+
+        def do_GET(self) -> None:
+            path = self.path.split("?", 1)[0].rstrip("/")
+            if path == "/metrics":
+                body = ("\n".join(service.metrics.prometheus_lines()) + "\n").encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            if not path.startswith("/lei/"):
+                self._json(404, {"error": "not found"})
+                return
+
+            lei = normalize_lei(path[len("/lei/"):])
+            if not service.valid(lei):
+                self._json(400, {"lei": lei, "error": "invalid LEI"})
+                return
+            results = self._lookup([lei])
+            if results is None:
+                return
+            res = results.get(lei)
+            if res is None:
+                self._json(404, {"lei": lei, "error": "not found"})
+            else:
+                self._json(200, _result_json(lei, res))
+
+        def do_POST(self) -> None:
+            if self.path.rstrip("/") != "/lei/batch":
+                self._json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                leis = payload.get("leis") if isinstance(payload, dict) else payload
+                if not isinstance(leis, list) or not all(isinstance(x, str) for x in leis):
+                    raise ValueError
+            except ValueError:
+                self._json(400, {"error": 'expected {"leis": ["<lei>", ...]}'})
+                return
+
+            results = self._lookup(leis)
+            if results is None:
+                return
+            self._json(
+                200, {"results": {lei: _result_json(lei, res) for lei, res in results.items()}}
+            )
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,4 @@
+"""Test data shared by conftest and the test modules."""
+
+LEI_OK = "213800NZT1VX6PZ7BT53"
+LEI_MISS = "AAAABBBBCCCCDDDDEE34"   # checksum-valid, unknown to GLEIF
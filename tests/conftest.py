@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from lei_enricher.engine import JobConfig
+from tests._data import LEI_MISS, LEI_OK
+
+
+@pytest.fixture
+def make_cfg(tmp_path):
+    """JobConfig factory over a 3-row CSV (known LEI, unknown LEI, invalid value) in tmp_path."""
+
+    def factory(**overrides):
+        src = tmp_path / "in.csv"
+        pd.DataFrame(
+            {"Name": ["a", "b", "c"], "LEI": [f" {LEI_OK.lower()} ", LEI_MISS, "bad"]}
+        ).to_csv(src, index=False)
+        cfg = JobConfig(
+            input_path=str(src),
+            output_path=str(tmp_path / "out.csv"),
+            sheet=None,
+            lei_col=None,
+            status_col="Entity Status",
+            renewal_col="Next Renewal Date",
+            cache_db=str(tmp_path / "cache.sqlite"),
+            cache_days=14,
+            gleif_batch_size=200,
+            gleif_throttle_s=0.0,
+            fallback_enabled=False,
+            fallback_throttle_s=0.0,
+        )
+        for k, v in overrides.items():
+            setattr(cfg, k, v)
+        return cfg
+
+    return factory
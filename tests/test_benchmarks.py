@@ -0,0 +1,42 @@
+import pandas as pd
+
+from benchmarks.generate import generate_input
+from benchmarks.standin import StandinServer, record_for
+from lei_enricher.core import lei_checksum_ok
+from lei_enricher.engine import EnrichEngine
+
+
+def test_generator_ratios(tmp_path):
+    path = generate_input(str(tmp_path / "bench.csv"), rows=2000, dup_ratio=0.5, invalid_ratio=0.1)
+    leis = pd.read_csv(path, keep_default_na=False)["LEI"].str.strip().str.upper()
+    valid = leis[leis.map(lei_checksum_ok)]
+    assert 0.8 < len(valid) / len(leis) < 0.95
+    assert valid.nunique() < 0.6 * len(valid)
+
+
+def test_pipeline_against_standin(tmp_path, make_cfg):
+    src = generate_input(str(tmp_path / "bench.csv"), rows=500, dup_ratio=0.3, invalid_ratio=0.05)
+    with StandinServer(unknown_ratio=0.1) as srv:
+        cfg = make_cfg(input_path=src, gleif_batch_size=50, gleif_workers=2,
+                       fallback_enabled=True, fallback_workers=2,
+                       gleif_base_url=srv.gleif_url, fallback_base_url=srv.fallback_url)
+        out = pd.read_csv(EnrichEngine(cfg).run())
+        counts = dict(srv.counts)
+
+    unique_valid = out["LEI"][out["LEI"].fillna("").map(lei_checksum_ok)].nunique()
+    assert counts["gleif"] == -(-unique_valid // 50)
+    assert 0 < counts["fallback"] < unique_valid
+    resolved = out.dropna(subset=["Entity Status"])
+    row = resolved.iloc[0]
+    assert row["Entity Status"] == record_for(row["LEI"])["status"]
+
+
+def test_startup_stays_within_the_import_budget():
+    from benchmarks.bench_import import BUDGET_MS, measure_imports
+
+    for module, budget in BUDGET_MS.items():
+        runs = [measure_imports(module) for _ in range(3)]
+        assert runs[-1][1] == [], f"{module} imports {runs[-1][1]} at startup"
+        # best of 3, with 3x headroom for slow / busy CI machines
+        best = min(ms for ms, _ in runs)
+        assert 0 < best < 3 * budget, f"{module} took {best:.0f} ms to import"
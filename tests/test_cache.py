@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+
+import responses
+
+from lei_enricher.cache import LeiCache
+from lei_enricher.core import LeiResult
+
+
+def test_put_many_get_many_roundtrip(tmp_path):
+    cache = LeiCache(str(tmp_path / "c.sqlite"), wal=True)
+    results = {f"{i:020d}": LeiResult("ACTIVE", "2026-01-01", None) for i in range(1200)}
+    cache.put_many(results)
+
+    got = cache.get_many(list(results) + ["NOTCACHED0000000000X"], max_age_days=14)
+    assert len(got) == 1200
+    assert got["00000000000000000007"].source == "gleif"
+    assert cache.get("00000000000000000007", 14).entity_status == "ACTIVE"
+    assert cache.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_get_many_skips_expired(tmp_path):
+    cache = LeiCache(str(tmp_path / "c.sqlite"))
+    cache.put("213800NZT1VX6PZ7BT53", "ACTIVE", None, "gleif")
+    old = (datetime.utcnow() - timedelta(days=30)).isoformat()
+    cache.conn.execute("UPDATE lei_cache SET fetched_at=?", (old,))
+    assert cache.get_many(["213800NZT1VX6PZ7BT53"], max_age_days=14) == {}
+
+
+def test_ttl_policy_follows_renewal_and_status():
+    from lei_enricher.cache import TtlPolicy
+
+    now = datetime(2026, 1, 1)
+    policy = TtlPolicy(default_days=14, max_days=90, min_days=1, near_renewal_days=30)
+    assert policy.ttl_days("ACTIVE", "2027-06-01T00:00:00Z", now) == 90
+    assert policy.ttl_days("ACTIVE", "2026-03-02", now) == 30
+    assert policy.ttl_days("ACTIVE", "2026-01-20", now) == 1
+    assert policy.ttl_days("ACTIVE", "2025-06-01", now) == 1
+    assert policy.ttl_days("ACTIVE", None, now) == 14
+    assert policy.ttl_days("RETIRED", "2025-06-01", now) == 180
+
+
+def test_get_many_swr_splits_fresh_and_stale(tmp_path):
+    from lei_enricher.cache import TtlPolicy
+
+    cache = LeiCache(str(tmp_path / "c.sqlite"))
+    far = (datetime.utcnow() + timedelta(days=400)).date().isoformat()
+    cache.put_many({
+        "FARRENEWAL0000000000": LeiResult("ACTIVE", far, "gleif"),
+        "NORENEWAL00000000000": LeiResult("ACTIVE", None, "gleif"),
+        "VERYOLD0000000000000": LeiResult("ACTIVE", None, "gleif"),
+    })
+    ages = {"FARRENEWAL0000000000": 40, "NORENEWAL00000000000": 16, "VERYOLD0000000000000": 40}
+    for lei, days in ages.items():
+        cache.conn.execute("UPDATE lei_cache SET fetched_at=? WHERE lei=?",
+                           ((datetime.utcnow() - timedelta(days=days)).isoformat(), lei))
+
+    fresh, stale = cache.get_many_swr(
+        list(ages), 14, stale_days=5, policy=TtlPolicy(default_days=14)
+    )
+    assert set(fresh) == {"FARRENEWAL0000000000"}
+    assert set(stale) == {"NORENEWAL00000000000"}
+    assert cache.get_many(list(ages), 14) == {}
+
+
+def test_registration_status_ttl_from_gleif_records(tmp_path):
+    from lei_enricher.cache import TtlPolicy
+    from lei_enricher.core import parse_gleif_item
+
+    far = (datetime.utcnow() + timedelta(days=400)).strftime("%Y-%m-%dT00:00:00Z")
+    items = {
+        lei: {"attributes": {"lei": lei, "entity": {"status": "ACTIVE"},
+                             "registration": {"status": status, "nextRenewalDate": far}}}
+        for lei, status in (("ISSUED00000000000000", "ISSUED"), ("LAPSED00000000000000", "lapsed"))
+    }
+    cache = LeiCache(str(tmp_path / "c.sqlite"))
+    cache.put_many(dict(parse_gleif_item(item) for item in items.values()))
+    cache.conn.execute(
+        "UPDATE lei_cache SET fetched_at=?", ((datetime.utcnow() - timedelta(days=5)).isoformat(),)
+    )
+
+    # entity.status is ACTIVE for both; only the lapsed registration expires after 3 days
+    fresh = cache.get_many(list(items), 14, policy=TtlPolicy(default_days=14))
+    assert set(fresh) == {"ISSUED00000000000000"}
+    assert fresh["ISSUED00000000000000"].registration_status == "ISSUED"
+    assert cache.due_for_refresh(14, TtlPolicy(default_days=14)) == ["LAPSED00000000000000"]
+
+
+def test_negative_entries_and_schema_migration(tmp_path):
+    import sqlite3
+
+    from lei_enricher.cache import MISS_NOT_FOUND
+
+    db = str(tmp_path / "old.sqlite")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE lei_cache (lei TEXT PRIMARY KEY, entity_status TEXT, "
+                 "next_renewal_date TEXT, source TEXT, fetched_at TEXT)")
+    conn.commit()
+    conn.close()
+
+    cache = LeiCache(db)
+    cache.put_misses(["AAAABBBBCCCCDDDDEE34"], MISS_NOT_FOUND)
+    assert cache.get_misses(["AAAABBBBCCCCDDDDEE34"], 2) == {"AAAABBBBCCCCDDDDEE34": MISS_NOT_FOUND}
+    assert cache.get_many(["AAAABBBBCCCCDDDDEE34"], 14) == {}
+
+    cache.put_many({"AAAABBBBCCCCDDDDEE34": LeiResult("ACTIVE", None, "gleif")})
+    assert cache.get_misses(["AAAABBBBCCCCDDDDEE34"], 2) == {}
+    assert cache.get("AAAABBBBCCCCDDDDEE34", 14).entity_status == "ACTIVE"
+    cols = {row[1] for row in cache.conn.execute("PRAGMA table_info(lei_cache)")}
+    assert {"miss_reason", "registration_status"} <= cols
+
+
+def test_refresh_picks_expiring_entries_within_budget(tmp_path):
+    from benchmarks.standin import StandinServer
+    from lei_enricher.core import GleifClient
+    from lei_enricher.refresh import RefreshConfig, in_window, parse_window, refresh_cache
+
+    db = str(tmp_path / "c.sqlite")
+    cache = LeiCache(db)
+    now = datetime.utcnow()
+    ages = {"213800NZT1VX6PZ7BT53": 13.5, "AAAABBBBCCCCDDDDEE34": 20, "529900T8BM49AURSDO55": 1}
+    for lei, age in ages.items():
+        cache.put(lei, "ACTIVE", None, "gleif")
+        cache.conn.execute(
+            "UPDATE lei_cache SET fetched_at=? WHERE lei=?",
+            ((now - timedelta(days=age)).isoformat(), lei),
+        )
+    cache.conn.commit()
+    cache.put_misses(["HWUPKR0MPOU8FGXBT394"], "not_found")
+
+    # stalest first; the fresh entry and the negative one are left alone
+    assert cache.due_for_refresh(14, horizon_days=1) == [
+        "AAAABBBBCCCCDDDDEE34",
+        "213800NZT1VX6PZ7BT53",
+    ]
+    stats = cache.stats(14)
+    assert stats["entries"] == 4 and stats["stale"] == 1 and stats["due_for_refresh"] == 2
+    assert stats["negative_entries"] == {"not_found": 1} and stats["age_days"]["14-30d"] == 1
+
+    with StandinServer() as srv:
+        gleif = GleifClient(throttle_s=0.0, base_url=srv.gleif_url)
+        cfg = RefreshConfig(cache_db=db, max_requests=1, batch_size=1)
+        summary = refresh_cache(cfg, gleif)
+    assert summary["requests"] == 1 and summary["stopped"] == "request budget"
+    assert LeiCache(db).due_for_refresh(14) == ["213800NZT1VX6PZ7BT53"]
+
+    night = parse_window("22:00-06:00")
+    assert in_window(night, datetime(2026, 1, 1, 23, 30)) and not in_window(
+        night, datetime(2026, 1, 1, 12)
+    )
+
+
+@responses.activate
+def test_refresh_budget_counts_http_requests(tmp_path):
+    from lei_enricher.core import AdaptiveBatchSizer, GleifClient
+    from lei_enricher.refresh import RefreshConfig, refresh_cache
+
+    db = str(tmp_path / "c.sqlite")
+    cache = LeiCache(db)
+    cache.put_many({f"{i:020d}": LeiResult("ACTIVE", None, "gleif") for i in range(8)})
+    cache.conn.execute(
+        "UPDATE lei_cache SET fetched_at=?", ((datetime.utcnow() - timedelta(days=20)).isoformat(),)
+    )
+    cache.conn.commit()
+
+    # every batch is "too long": bisection would send 15 requests for one batch of 8
+    responses.add(responses.GET, "https://api.gleif.org/api/v1/lei-records", status=414)
+    gleif = GleifClient(throttle_s=0.0, sizer=AdaptiveBatchSizer(max_size=8))
+    summary = refresh_cache(RefreshConfig(cache_db=db, max_requests=3, batch_size=8), gleif)
+
+    assert len(responses.calls) == 3
+    assert summary["requests"] == 3 and summary["stopped"] == "request budget"
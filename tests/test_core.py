@@ -20,4 +20,27 @@ def test_parse_gleif_item():
     assert lei == "213800NZT1VX6PZ7BT53"
     assert res.entity_status == "ACTIVE"
     assert res.next_renewal_date == "2026-09-29"
-    
\ No newline at end of file
+    
+def test_lei_checksum():
+    from lei_enricher.core import lei_checksum_ok
+    assert lei_checksum_ok("213800NZT1VX6PZ7BT53") is True
+    assert lei_checksum_ok("213800NZT1VX6PZ7BT54") is False
+    assert lei_checksum_ok("123") is False
+
+def test_vectorized_validation_matches_scalar():
+    import pandas as pd
+    from lei_enricher.core import lei_checksum_ok
+    from lei_enricher.validate import (
+        lei_validation_reasons,
+        normalize_lei_series,
+        valid_unique_leis,
+    )
+
+    raw = pd.Series([" 213800nzt1vx6pz7bt53 ", "213800NZT1VX6PZ7BT54", "abc", None, "  ",
+                     "5493001KJTIIGC8Y1R12", "213800NZT1VX6PZ7BT53"])
+    norm = normalize_lei_series(raw)
+    assert norm.tolist()[:4] == ["213800NZT1VX6PZ7BT53", "213800NZT1VX6PZ7BT54", "ABC", None]
+    assert lei_validation_reasons(norm).tolist() == [
+        "ok", "bad_checksum", "bad_format", "empty", "empty", "ok", "ok"]
+    assert sorted(valid_unique_leis(norm)) == sorted(
+        x for x in set(norm.dropna()) if lei_checksum_ok(x))
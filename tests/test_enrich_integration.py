@@ -0,0 +1,639 @@
+import json
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+import requests
+import responses
+
+from lei_enricher.engine import EnrichEngine
+from tests._data import LEI_MISS, LEI_OK
+
+
+def _gleif_payload(lei):
+    return {
+        "data": [
+            {"id": lei,
+             "attributes": {"lei": lei,
+                            "entity": {"status": "ACTIVE"},
+                            "registration": {"nextRenewalDate": "2026-09-29"}}}
+        ]
+    }
+
+
+@responses.activate
+def test_engine_end_to_end(make_cfg):
+    responses.add(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+
+    cfg = make_cfg()
+    progress = []
+    out = EnrichEngine(cfg, on_progress=lambda d, t: progress.append((d, t))).run()
+
+    df = pd.read_csv(out)
+    assert list(df.columns) == ["Name", "LEI", "Entity Status", "Next Renewal Date"]
+    assert df.loc[0, "Entity Status"] == "ACTIVE"
+    assert df.loc[0, "Next Renewal Date"] == "2026-09-29"
+    assert pd.isna(df.loc[1, "Entity Status"])
+    assert progress[-1] == (1, 2)
+
+
+def test_batch_cli_does_not_import_qt():
+    code = "import sys, lei_enricher.cli; sys.exit(1 if 'PySide6' in sys.modules else 0)"
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
+
+
+def test_main_dispatches_only_known_commands():
+    from lei_enricher.cli import COMMANDS, build_parser
+
+    sub = next(a for a in build_parser()._actions if a.dest == "command")
+    assert set(sub.choices) == set(COMMANDS)   # anything else, e.g. a dropped file, opens the GUI
+
+
+@responses.activate
+def test_streaming_matches_in_memory(tmp_path, make_cfg):
+    responses.add(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+
+    cfg = make_cfg()
+    expected = pd.read_csv(EnrichEngine(cfg).run())
+
+    src = tmp_path / "in.xlsx"
+    pd.read_csv(cfg.input_path).to_excel(src, index=False)
+    for out_name, in_path in (("stream.csv", cfg.input_path), ("stream.xlsx", str(src))):
+        cfg_s = make_cfg(input_path=in_path, output_path=str(tmp_path / out_name),
+                         stream_chunk_rows=2)
+        out = EnrichEngine(cfg_s).run()
+        got = pd.read_csv(out) if out.endswith(".csv") else pd.read_excel(out)
+        pd.testing.assert_frame_equal(got, expected)
+
+
+@responses.activate
+def test_streaming_keeps_blank_xlsx_rows(tmp_path, make_cfg):
+    from openpyxl import Workbook, load_workbook
+
+    responses.add(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+
+    src = tmp_path / "gaps.xlsx"
+    wb = Workbook()
+    for row in (["Name", "LEI"], ["a", LEI_OK], [None, None], ["b", LEI_MISS], [None, None]):
+        wb.active.append(row)
+    wb.save(src)
+
+    rows = {}
+    for chunk in (0, 2):
+        cfg = make_cfg(input_path=str(src), output_path=str(tmp_path / f"out{chunk}.xlsx"),
+                       stream_chunk_rows=chunk)
+        ws = load_workbook(EnrichEngine(cfg).run()).active
+        rows[chunk] = [[c.value for c in r] for r in ws.iter_rows()]
+    assert rows[2] == rows[0]
+    assert [r[1] for r in rows[0]] == [
+        "LEI",
+        LEI_OK,
+        None,
+        LEI_MISS,
+    ]  # same rows as the source sheet
+
+
+@responses.activate
+def test_resume_skips_completed_batches(tmp_path, make_cfg):
+    url = "https://api.gleif.org/api/v1/lei-records"
+    responses.add(responses.GET, url, json=_gleif_payload(LEI_OK))
+    responses.add(responses.GET, url, body=requests.ConnectionError("network down"))
+
+    cfg = make_cfg(gleif_batch_size=1, checkpoint_path=str(tmp_path / "job.ckpt"))
+    EnrichEngine(cfg).run()   # the failed batch is left unanswered, not written as a miss
+    assert (tmp_path / "job.ckpt").exists()
+
+    responses.replace(responses.GET, url, json={"data": []})
+    responses.calls.reset()
+    cfg.resume = True
+    engine = EnrichEngine(cfg)
+    df = pd.read_csv(engine.run())
+
+    assert len(responses.calls) == 1
+    # work done before the interruption is not a cache hit
+    assert engine.metrics.counters["resumed"] == 1
+    assert engine.metrics.counters.get("cache_hits", 0) == 0
+    assert LEI_MISS in responses.calls[0].request.url
+    assert df.loc[0, "Entity Status"] == "ACTIVE"
+    assert not (tmp_path / "job.ckpt").exists()
+    assert not (tmp_path / "job.ckpt.journal").exists()
+
+
+def test_checkpoint_progress_is_journaled(tmp_path):
+    from lei_enricher.checkpoint import JobCheckpoint
+
+    path = str(tmp_path / "job.ckpt")
+    cp = JobCheckpoint.new("hash", 1, ["A", "B", "C"])
+    cp.save(path)
+    manifest = (tmp_path / "job.ckpt").read_text()
+    cp.complete_batch(path, 0)
+    cp.complete_batch(path, 2)
+    with open(path + ".journal", "a") as fh:
+        fh.write('{"batch": 1')   # torn write from a crash
+
+    assert (tmp_path / "job.ckpt").read_text() == manifest   # progress doesn't rewrite the plan
+    loaded = JobCheckpoint.load(path)
+    assert loaded.completed_batches == [0, 2] and loaded.done_leis() == ["A", "C"]
+    loaded.complete_batch(path, 1)
+    assert JobCheckpoint.load(path).completed_batches == [0, 2, 1]
+
+
+@responses.activate
+def test_metrics_report(tmp_path, make_cfg):
+    responses.add(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+
+    cfg = make_cfg(metrics_json=str(tmp_path / "run.json"), metrics_prom=str(tmp_path / "run.prom"))
+    EnrichEngine(cfg).run()
+
+    report = json.loads((tmp_path / "run.json").read_text())
+    assert report["counters"]["rows"] == 3
+    assert report["counters"]["gleif_requests"] == 1
+    assert report["cache_hit_ratio"] == 0.0
+    assert report["gleif_batch_latency"]["count"] == 1
+    assert set(report["stage_seconds"]) == {
+        "read",
+        "normalize",
+        "cache",
+        "gleif",
+        "fallback",
+        "parents",
+        "write",
+    }
+
+    prom = (tmp_path / "run.prom").read_text()
+    assert 'lei_enricher_gleif_batch_seconds_bucket{le="+Inf"} 1' in prom
+    assert "lei_enricher_cache_hits_total 0" in prom
+
+
+@responses.activate
+def test_stale_while_revalidate_serves_then_refreshes(make_cfg):
+    from datetime import datetime, timedelta
+
+    from lei_enricher.cache import LeiCache
+
+    responses.add(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+
+    cfg = make_cfg(renewal_aware_ttl=True, stale_while_revalidate_days=30)
+    cache = LeiCache(cfg.cache_db)
+    cache.put(LEI_OK, "ACTIVE", "2020-01-01", "gleif")   # renewal past -> 1 day TTL
+    old = (datetime.utcnow() - timedelta(days=20)).isoformat()
+    cache.conn.execute("UPDATE lei_cache SET fetched_at=?", (old,))
+    cache.conn.commit()
+
+    engine = EnrichEngine(cfg)
+    results = engine.resolve([LEI_OK])
+    assert results[LEI_OK].next_renewal_date == "2020-01-01"   # served stale, no waiting
+    engine.wait_background()
+
+    assert LeiCache(cfg.cache_db).get(LEI_OK, 1).next_renewal_date == "2026-09-29"
+    assert engine.metrics.counters["cache_revalidated"] == 1
+
+
+@responses.activate
+def test_job_does_not_wait_for_the_background_refresh(make_cfg):
+    import threading
+    from datetime import datetime, timedelta
+
+    from lei_enricher.cache import LeiCache
+
+    release = threading.Event()
+
+    def gleif(request):
+        if LEI_OK in request.url:   # the background refresh of the stale entry
+            release.wait(10)
+            return 200, {}, json.dumps(_gleif_payload(LEI_OK))
+        return 200, {}, json.dumps({"data": []})
+
+    responses.add_callback(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", callback=gleif
+    )
+    cfg = make_cfg(stale_while_revalidate_days=30)
+    cache = LeiCache(cfg.cache_db)
+    cache.put(LEI_OK, "ACTIVE", "2020-01-01", "gleif")
+    old = (datetime.utcnow() - timedelta(days=20)).isoformat()
+    cache.conn.execute("UPDATE lei_cache SET fetched_at=?", (old,))
+    cache.conn.commit()
+
+    engine = EnrichEngine(cfg)
+    engine.run()   # would hang until release if finish() joined the refresh
+    assert engine.metrics.counters.get("cache_revalidated", 0) == 0
+    release.set()
+    engine.wait_background()
+    assert engine.metrics.counters["cache_revalidated"] == 1
+
+
+@responses.activate
+def test_negative_cache_skips_known_misses(make_cfg):
+    responses.add(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+
+    cfg = make_cfg()
+    EnrichEngine(cfg).run()
+    assert len(responses.calls) == 1
+
+    engine = EnrichEngine(cfg)
+    engine.run()
+    assert len(responses.calls) == 1   # LEI_OK cached, LEI_MISS negatively cached
+    assert engine.metrics.counters["cache_negative_hits"] == 1
+
+    cfg.negative_cache_days = 0
+    EnrichEngine(cfg).run()
+    assert len(responses.calls) == 2
+
+
+@pytest.mark.parametrize("adaptive", [True, False])
+@responses.activate
+def test_gleif_outage_is_not_negatively_cached(make_cfg, adaptive):
+    from lei_enricher.cache import LeiCache
+
+    responses.add(responses.GET, "https://api.gleif.org/api/v1/lei-records", status=503)
+    cfg = make_cfg(gleif_adaptive=adaptive)
+    EnrichEngine(cfg).run()
+    if not adaptive:
+        assert all(
+            LEI_MISS in c.request.url and LEI_OK in c.request.url for c in responses.calls
+        )  # not bisected
+    assert LeiCache(cfg.cache_db).get_misses([LEI_OK, LEI_MISS], 30) == {}
+
+    responses.replace(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+    responses.calls.reset()
+    df = pd.read_csv(EnrichEngine(cfg).run())
+    assert len(responses.calls) == 1
+    assert df.loc[0, "Entity Status"] == "ACTIVE"
+
+
+@responses.activate
+def test_known_gleif_miss_still_gets_fallback(make_cfg):
+    from pathlib import Path
+
+    from lei_enricher.cache import LeiCache
+
+    responses.add(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+    cfg = make_cfg()
+    EnrichEngine(cfg).run()   # LEI_MISS is now a known GLEIF miss
+
+    html = (Path(__file__).parents[1] / "benchmarks" / "samples" / "record_active.html").read_text(
+        encoding="utf-8"
+    )
+    responses.add(responses.GET, f"https://www.lei-lookup.com/record/{LEI_MISS}/", body=html)
+    cfg.fallback_enabled = True
+    engine = EnrichEngine(cfg)
+    df = pd.read_csv(engine.run())
+
+    assert [c.request.url for c in responses.calls][-1].endswith(f"/record/{LEI_MISS}/")
+    assert df.loc[1, "Entity Status"] == "ACTIVE"
+    assert len(responses.calls) == 2   # GLEIF was not asked again
+    # fallback results are written in bulk (put_many) like GLEIF's
+    assert engine.metrics.counters["cache_writes"] == 1
+    assert LeiCache(cfg.cache_db).get(LEI_MISS, 1).source == "lei-lookup"
+
+
+@responses.activate
+def test_multi_file_job_fetches_each_lei_once(tmp_path, make_cfg):
+    from lei_enricher.multi import MultiFileEngine, expand_inputs, plan_outputs
+
+    responses.add(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+
+    cfg = make_cfg()
+    src_dir = tmp_path / "inputs"
+    src_dir.mkdir()
+    df = pd.read_csv(cfg.input_path)
+    df.to_csv(src_dir / "a.csv", index=False)
+    with pd.ExcelWriter(src_dir / "b.xlsx") as writer:
+        df.to_excel(writer, sheet_name="One", index=False)
+        df.iloc[:1].to_excel(writer, sheet_name="Two", index=False)
+
+    plan = plan_outputs(
+        expand_inputs([str(src_dir)]), str(tmp_path / "out"), all_sheets=True, sheet=None
+    )
+    outputs = MultiFileEngine(cfg, plan).run_all()
+
+    assert len(responses.calls) == 1   # 2 distinct LEIs across 3 sheets -> one GLEIF batch
+    assert [p.rsplit("/", 1)[-1] for p in outputs] == ["a_enriched.csv", "b_enriched.xlsx"]
+    sheets = pd.read_excel(outputs[1], sheet_name=None)
+    assert list(sheets) == ["One", "Two"]
+    assert sheets["Two"].loc[0, "Entity Status"] == "ACTIVE"
+    assert pd.read_csv(outputs[0]).loc[0, "Entity Status"] == "ACTIVE"
+
+
+@responses.activate
+def test_multi_sheet_job_copies_sheets_without_an_lei_column(tmp_path, make_cfg):
+    from lei_enricher.multi import MultiFileEngine, plan_outputs
+
+    responses.add(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+
+    cfg = make_cfg()
+    src = tmp_path / "book.xlsx"
+    notes = pd.DataFrame({"Note": ["reviewed", "by ops"]})
+    with pd.ExcelWriter(src) as writer:
+        pd.read_csv(cfg.input_path).to_excel(writer, sheet_name="Data", index=False)
+        notes.to_excel(writer, sheet_name="Notes", index=False)
+
+    messages = []
+    plan = plan_outputs([str(src)], str(tmp_path / "out"), all_sheets=True, sheet=None)
+    outputs = MultiFileEngine(cfg, plan, on_message=messages.append).run_all()
+
+    sheets = pd.read_excel(outputs[0], sheet_name=None)
+    assert list(sheets) == ["Data", "Notes"]
+    assert sheets["Data"].loc[0, "Entity Status"] == "ACTIVE"
+    pd.testing.assert_frame_equal(sheets["Notes"], notes)
+    assert any("[Notes]: no LEI column" in m for m in messages)
+
+
+@responses.activate
+def test_xlsx_write_back_keeps_workbook(tmp_path, make_cfg):
+    from openpyxl import Workbook, load_workbook
+    from openpyxl.styles import Font
+
+    responses.add(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+
+    src = tmp_path / "book.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Data"
+    ws.append(["Name", "LEI", "Exposure"])
+    ws.append(["a", LEI_OK.lower(), 10])
+    ws.append(["b", LEI_MISS, 20])
+    ws["D1"] = "Total"
+    ws["D2"] = "=SUM(C2:C3)"
+    ws["A1"].font = Font(bold=True)
+    ws.column_dimensions["A"].width = 33
+    ws.column_dimensions["C"].width = 21
+    wb.create_sheet("Notes")["A1"] = "keep me"
+    wb.save(src)
+
+    cfg = make_cfg(input_path=str(src), output_path=str(tmp_path / "out.xlsx"),
+                   sheet="Data", xlsx_write_back=True)
+    EnrichEngine(cfg).run()
+
+    out = load_workbook(cfg.output_path)
+    ws = out["Data"]
+    # result columns are appended, so no existing cell moves
+    assert [c.value for c in ws[1]] == [
+        "Name",
+        "LEI",
+        "Exposure",
+        "Total",
+        "Entity Status",
+        "Next Renewal Date",
+    ]
+    assert ws["B2"].value == LEI_OK.lower()   # input cells are left as typed
+    assert ws["E2"].value == "ACTIVE" and ws["F2"].value == "2026-09-29"
+    assert ws["E3"].value is None
+    assert ws["D2"].value == "=SUM(C2:C3)"
+    assert ws["A1"].font.bold and ws.column_dimensions["A"].width == 33
+    assert ws.column_dimensions["C"].width == 21
+    assert out["Notes"]["A1"].value == "keep me"
+
+
+def test_write_back_refuses_to_stream(tmp_path, make_cfg):
+    from openpyxl import Workbook
+
+    from lei_enricher.cli import main
+
+    src = tmp_path / "book.xlsx"
+    wb = Workbook()
+    wb.active.append(["LEI"])
+    wb.save(src)
+    out = tmp_path / "out.xlsx"
+
+    cfg = make_cfg(input_path=str(src), output_path=str(out), xlsx_write_back=True,
+                   stream_chunk_rows=2)
+    with pytest.raises(ValueError, match="Write-back and streaming"):
+        EnrichEngine(cfg).run()
+    assert main(["run", str(src), "-o", str(out), "--write-back", "--stream-chunk-rows", "2"]) == 2
+    assert not out.exists()
+
+
+@responses.activate
+@pytest.mark.parametrize("suffix,stream", [(".parquet", 0), (".feather", 0), (".parquet", 2)])
+def test_columnar_io_is_typed(tmp_path, make_cfg, suffix, stream):
+    import datetime
+
+    import pyarrow.parquet as pq
+
+    payload = _gleif_payload(LEI_OK)
+    # golden-copy style timestamp: the calendar date must not shift to UTC
+    payload["data"][0]["attributes"]["registration"][
+        "nextRenewalDate"
+    ] = "2026-09-29T00:00:00+02:00"
+    responses.add(responses.GET, "https://api.gleif.org/api/v1/lei-records", json=payload)
+
+    cfg = make_cfg(stream_chunk_rows=stream)
+    src = tmp_path / f"in{suffix}"
+    df = pd.read_csv(cfg.input_path)
+    df.to_parquet(src, index=False) if suffix == ".parquet" else df.to_feather(src)
+    cfg.input_path, cfg.output_path = str(src), str(tmp_path / f"out{suffix}")
+
+    EnrichEngine(cfg).run()
+
+    out = (
+        pd.read_parquet(cfg.output_path)
+        if suffix == ".parquet"
+        else pd.read_feather(cfg.output_path)
+    )
+    assert list(out.columns) == ["Name", "LEI", "Entity Status", "Next Renewal Date"]
+    assert out.loc[0, "Next Renewal Date"] == datetime.date(2026, 9, 29)
+    assert pd.isna(out.loc[1, "Next Renewal Date"])
+    if suffix == ".parquet":
+        schema = pq.read_schema(cfg.output_path)
+        assert str(schema.field("Next Renewal Date").type) == "date32[day]"
+        assert str(schema.field("Entity Status").type) in {"string", "large_string"}
+
+
+@responses.activate
+def test_cancel_writes_partial_results_and_keeps_checkpoint(tmp_path, make_cfg):
+    from lei_enricher.cache import LeiCache
+
+    responses.add(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", json=_gleif_payload(LEI_OK)
+    )
+
+    cfg = make_cfg(gleif_batch_size=1, checkpoint_path=str(tmp_path / "job.checkpoint.json"))
+    seen = {}
+
+    def on_results(batch):
+        seen.update(batch)
+        engine.cancel()
+
+    engine = EnrichEngine(cfg, on_results=on_results)
+    df = pd.read_csv(engine.run())
+
+    assert len(responses.calls) == 1   # second batch never sent
+    assert df.loc[0, "Entity Status"] == "ACTIVE" and LEI_OK in seen
+    assert (tmp_path / "job.checkpoint.json").exists()
+    assert LeiCache(cfg.cache_db).get_misses([LEI_MISS], 30) == {}   # not fetched, so not a miss
+
+
+def test_parent_enrichment_batches_and_dedups_parents(tmp_path, make_cfg):
+    import random
+
+    from benchmarks.generate import make_lei
+    from benchmarks.standin import StandinServer, record_for
+
+    rng = random.Random(11)
+    children = [make_lei(rng) for _ in range(6)]
+    holdco, topco = make_lei(rng), make_lei(rng)
+    parents = {c: (holdco, topco) for c in children[:4]}
+    parents[holdco] = (topco, topco)
+
+    src = tmp_path / "kyc.csv"
+    pd.DataFrame({"LEI": children + [holdco]}).to_csv(src, index=False)
+    with StandinServer(parents=parents) as srv:
+        cfg = make_cfg(input_path=str(src), parent_enrichment=True, gleif_base_url=srv.gleif_url)
+        df = pd.read_csv(EnrichEngine(cfg).run())
+        counts = dict(srv.counts)
+
+        # second run: edges and parent statuses come from the cache
+        EnrichEngine(cfg).run()
+        assert dict(srv.counts) == counts
+
+    assert counts == {"gleif": 2, "relationships": 1}   # sheet batch, parents batch (topco), edges
+    assert list(df["Direct Parent LEI"][:4]) == [holdco] * 4
+    assert df.loc[0, "Ultimate Parent Status"] == record_for(topco)["status"]
+    assert df.loc[6, "Direct Parent Status"] == record_for(topco)["status"]
+    assert pd.isna(df.loc[5, "Direct Parent LEI"])
+
+
+def test_delta_run_looks_up_only_changes_and_reports_them(tmp_path, make_cfg):
+    import random
+    from datetime import datetime, timedelta
+
+    from benchmarks.generate import make_lei
+    from benchmarks.standin import StandinServer
+    from lei_enricher.cache import LeiCache
+
+    rng = random.Random(5)
+    a, b, c, d = (make_lei(rng) for _ in range(4))
+    day1, day2 = tmp_path / "day1.csv", tmp_path / "day2.csv"
+    pd.DataFrame({"Id": [1, 2, 3], "LEI": [a, b, c]}).to_csv(day1, index=False)
+    pd.DataFrame({"Id": [1, 2, 3, 4], "LEI": [a, b, c, d]}).to_csv(day2, index=False)
+
+    with StandinServer() as srv:
+        cfg = make_cfg(input_path=str(day1), output_path=str(tmp_path / "out1.csv"),
+                       gleif_base_url=srv.gleif_url)
+        EnrichEngine(cfg).run()
+
+        # b's cache entry went stale and GLEIF now reports it inactive, registration lapsed
+        old = (datetime.utcnow() - timedelta(days=30)).isoformat()
+        cache = LeiCache(cfg.cache_db)
+        cache.conn.execute("UPDATE lei_cache SET fetched_at=? WHERE lei=?", (old, b))
+        cache.conn.commit()
+        srv.config.extra[b] = {
+            "attributes": {
+                "lei": b,
+                "entity": {"status": "INACTIVE"},
+                "registration": {"status": "LAPSED", "nextRenewalDate": "2030-01-01T00:00:00Z"},
+            }
+        }
+        before = srv.counts["gleif"]
+
+        cfg.input_path, cfg.output_path = str(day2), str(tmp_path / "out2.csv")
+        cfg.previous_output, cfg.delta_key_col = str(tmp_path / "out1.csv"), "Id"
+        engine = EnrichEngine(cfg)
+        engine.run()
+
+    assert srv.counts["gleif"] - before == 1
+    assert engine.metrics.counters["unique_leis"] == 2   # b (stale) and d (new)
+    assert engine.metrics.counters["delta_reused"] == 2
+    out = pd.read_csv(cfg.output_path)
+    assert len(out) == 4 and out.loc[1, "Entity Status"] == "INACTIVE"
+    # a, c reused from out1.csv; b, d fetched: one renewal date format for all of them
+    assert out["Next Renewal Date"].str.len().nunique() == 1
+
+    report = pd.read_csv(tmp_path / "out2_changes.csv")
+    assert list(report["Change"]) == ["changed", "added"]
+    assert list(report["Id"]) == [2, 4]
+    assert report.loc[0, "Entity Status (new)"] == "INACTIVE"
+
+
+def test_delta_run_survives_an_added_input_column(tmp_path, make_cfg):
+    import random
+
+    from benchmarks.generate import make_lei
+    from benchmarks.standin import StandinServer
+
+    rng = random.Random(21)
+    a, b = (make_lei(rng) for _ in range(2))
+    day1, day2 = tmp_path / "day1.csv", tmp_path / "day2.csv"
+    pd.DataFrame({"Name": ["x"], "LEI": [a]}).to_csv(day1, index=False)
+    pd.DataFrame({"Name": ["x", "y"], "Desk": ["FX", "FX"], "LEI": [a, b]}).to_csv(
+        day2, index=False
+    )
+
+    with StandinServer() as srv:
+        cfg = make_cfg(input_path=str(day1), output_path=str(tmp_path / "out1.csv"),
+                       gleif_base_url=srv.gleif_url)
+        EnrichEngine(cfg).run()
+
+        # no key column: rows are matched on the columns both days have
+        cfg.input_path, cfg.output_path = str(day2), str(tmp_path / "out2.csv")
+        cfg.previous_output = str(tmp_path / "out1.csv")
+        EnrichEngine(cfg).run()
+
+    out = pd.read_csv(cfg.output_path)
+    assert list(out["Desk"]) == ["FX", "FX"] and out["Entity Status"].notna().all()
+    report = pd.read_csv(tmp_path / "out2_changes.csv")
+    assert list(report["Change"]) == ["added"] and list(report["LEI (new)"]) == [b]
+
+
+def test_delta_run_checks_the_key_column_before_any_lookup(tmp_path, make_cfg):
+    cfg = make_cfg()
+    pd.DataFrame(
+        {"LEI": [LEI_OK], "Entity Status": ["ACTIVE"], "Next Renewal Date": ["2027-01-01"]}
+    ).to_csv(tmp_path / "prev.csv", index=False)
+    cfg.previous_output, cfg.delta_key_col = str(tmp_path / "prev.csv"), "Id"
+    with responses.RequestsMock():   # any GLEIF call would fail the test
+        with pytest.raises(ValueError, match="Key column 'Id'"):
+            EnrichEngine(cfg).run()
+    assert not (tmp_path / "out.csv").exists()
+
+
+def test_delta_run_keeps_parents_of_reused_rows(tmp_path, make_cfg):
+    import random
+
+    from benchmarks.generate import make_lei
+    from benchmarks.standin import StandinServer, record_for
+
+    rng = random.Random(13)
+    a, b, topco = (make_lei(rng) for _ in range(3))
+    day1, day2 = tmp_path / "day1.csv", tmp_path / "day2.csv"
+    pd.DataFrame({"Id": [1], "LEI": [a]}).to_csv(day1, index=False)
+    pd.DataFrame({"Id": [1, 2], "LEI": [a, b]}).to_csv(day2, index=False)
+
+    with StandinServer(parents={a: (topco, topco), b: (topco, topco)}) as srv:
+        cfg = make_cfg(input_path=str(day1), output_path=str(tmp_path / "out1.csv"),
+                       parent_enrichment=True, gleif_base_url=srv.gleif_url)
+        EnrichEngine(cfg).run()
+
+        cfg.input_path, cfg.output_path = str(day2), str(tmp_path / "out2.csv")
+        cfg.previous_output, cfg.delta_key_col = str(tmp_path / "out1.csv"), "Id"
+        engine = EnrichEngine(cfg)
+        engine.run()
+
+    assert engine.metrics.counters["delta_reused"] == 1
+    out = pd.read_csv(cfg.output_path)
+    assert list(out["Direct Parent LEI"]) == [topco, topco]  # a was reused from the previous output
+    assert list(out["Ultimate Parent Status"]) == [record_for(topco)["status"]] * 2
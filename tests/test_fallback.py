@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+import responses
+
+from lei_enricher.core import (
+    LeiLookupFallback,
+    PerHostRateLimiter,
+    make_session,
+    parse_fallback_html,
+    parse_fallback_html_soup,
+)
+
+SAMPLES = Path(__file__).resolve().parent.parent / "benchmarks" / "samples"
+
+
+@pytest.mark.parametrize("page", sorted(SAMPLES.glob("*.html")), ids=lambda p: p.name)
+def test_fast_parser_matches_soup(page):
+    html = page.read_text(encoding="utf-8")
+    assert parse_fallback_html(html) == parse_fallback_html_soup(html)
+
+
+# Label / value layouts not produced by benchmarks/generate.py: tails, inline markup, colons
+MARKUP = [
+    ("<div><span>Prefix</span> Entity status ACTIVE Next renewal date 2027-01-01</div>",
+     "ACTIVE", "2027-01-01"),
+    ("<div><span>x</span>Entity status <em>ACTIVE</em></div>", "ACTIVE", None),
+    ("<p>Entity status: <b>ACTIVE</b></p>", "ACTIVE", None),
+    ("<table><tr><th>Entity status</th><td><span class='badge'>LAPSED</span></td></tr>"
+     "<tr><th>Next renewal date:</th><td>\n  2024-01-15\n</td></tr></table>",
+     "LAPSED", "2024-01-15"),
+    ("<dl><dt>Next renewal date,</dt><!-- updated nightly --><dd>2026-03-31</dd></dl>",
+     None, "2026-03-31"),
+    ("<script>var label = 'Entity status FAKE';</script><p>Entity status. <br/>RETIRED</p>",
+     "RETIRED", None),
+    ("<p>No record found for this LEI.</p>", None, None),
+]
+
+
+@pytest.mark.parametrize("html,status,renewal", MARKUP)
+def test_fast_parser_matches_soup_on_other_markup(html, status, renewal):
+    res = parse_fallback_html(html)
+    assert (res.entity_status, res.next_renewal_date) == (status, renewal)
+    assert res == parse_fallback_html_soup(html)
+
+
+def test_fast_parser_fields():
+    res = parse_fallback_html((SAMPLES / "record_lapsed.html").read_text(encoding="utf-8"))
+    assert res.entity_status == "LAPSED"
+    assert res.next_renewal_date == "2024-01-15"
+
+
+@responses.activate
+def test_lookup_many_concurrent():
+    html = (SAMPLES / "record_active.html").read_text(encoding="utf-8")
+    leis = [f"{i:020d}" for i in range(6)]
+    for lei in leis:
+        responses.add(responses.GET, f"https://www.lei-lookup.com/record/{lei}/", body=html)
+
+    client = LeiLookupFallback(session=make_session(), throttle_s=0.0,
+                               rate_limiter=PerHostRateLimiter(1000.0))
+    out = dict(client.lookup_many(leis, workers=3))
+
+    assert set(out) == set(leis)
+    assert all(
+        r.entity_status == "ACTIVE" and r.next_renewal_date == "2026-09-29" for r in out.values()
+    )
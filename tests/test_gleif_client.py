@@ -1,5 +1,9 @@
+import json
+from urllib.parse import parse_qs, urlparse
+
+import requests
 import responses
-from lei_enricher.core import GleifClient, make_session
+from lei_enricher.core import GleifClient, TokenBucket, make_session, parse_gleif_item
 
 @responses.activate
 def test_gleif_batch_lookup():
@@ -20,4 +24,200 @@ def test_gleif_batch_lookup():
 
     client = GleifClient(session=make_session(), throttle_s=0.0)
     out = client.lookup_batch(["AAAABBBBCCCCDDDDEEEE", "213800NZT1VX6PZ7BT53"])
-    assert out["213800NZT1VX6PZ7BT53"].entity_status == "ACTIVE"
\ No newline at end of file
+    assert out["213800NZT1VX6PZ7BT53"].entity_status == "ACTIVE"
+
+def _item(lei):
+    return {"id": lei, "attributes": {"lei": lei, "entity": {"status": "ACTIVE"},
+                                      "registration": {"nextRenewalDate": "2026-09-29"}}}
+
+
+def test_token_bucket_spaces_calls_and_honours_pause():
+    now = [0.0]
+    slept = []
+
+    def sleep(s):
+        slept.append(s)
+        now[0] += s
+
+    bucket = TokenBucket(rate_per_s=2.0, clock=lambda: now[0], sleep=sleep)
+    bucket.acquire()
+    bucket.acquire()
+    assert slept == [0.5]
+
+    bucket.pause(3.0)
+    bucket.acquire()
+    assert now[0] >= 3.5
+
+
+@responses.activate
+def test_concurrent_batches_match_sequential():
+    def callback(request):
+        leis = parse_qs(urlparse(request.url).query)["filter[lei]"][0].split(",")
+        return (
+            200,
+            {},
+            json.dumps({"data": [_item(lei) for lei in leis if not lei.startswith("X")]}),
+        )
+
+    responses.add_callback(
+        responses.GET, "https://api.gleif.org/api/v1/lei-records", callback=callback
+    )
+
+    leis = [f"{i:020d}" for i in range(30)] + ["X" * 20]
+    batches = [leis[i:i + 4] for i in range(0, len(leis), 4)]
+
+    client = GleifClient(session=make_session(), throttle_s=0.0)
+    sequential = {}
+    for _, res in client.lookup_batches(batches, workers=1):
+        sequential.update(res)
+
+    client = GleifClient(session=make_session(), throttle_s=0.0, rate_limiter=TokenBucket(1000.0))
+    concurrent = {}
+    for _, res in client.lookup_batches(batches, workers=4):
+        concurrent.update(res)
+
+    assert concurrent == sequential
+    assert len(concurrent) == 30
+    assert parse_gleif_item(_item(leis[0]))[1] == concurrent[leis[0]]
+
+
+@responses.activate
+def test_429_retry_after_pauses_shared_bucket():
+    url = "https://api.gleif.org/api/v1/lei-records"
+    responses.add(responses.GET, url, status=429, headers={"Retry-After": "0"})
+    responses.add(responses.GET, url, json={"data": [_item("213800NZT1VX6PZ7BT53")]})
+
+    session = make_session()
+    session.mount("https://", requests.adapters.HTTPAdapter())  # no urllib3 retries
+    client = GleifClient(session=session, throttle_s=0.0, rate_limiter=TokenBucket(1000.0))
+    out = client.lookup_batch(["213800NZT1VX6PZ7BT53"])
+    assert out["213800NZT1VX6PZ7BT53"].entity_status == "ACTIVE"
+
+
+@responses.activate
+def test_adaptive_bisects_failed_batch_and_follows_next():
+    from lei_enricher.core import AdaptiveBatchSizer
+
+    bad = "BADBADBADBADBADBAD00"
+    base = "https://api.gleif.org/api/v1/lei-records"
+
+    def callback(request):
+        query = parse_qs(urlparse(request.url).query)
+        if "page[number]" in query:
+            return 200, {}, json.dumps({"data": [_item("PAGE2PAGE2PAGE2PAGE2")]})
+        leis = query["filter[lei]"][0].split(",")
+        if bad in leis:
+            return 414, {}, ""
+        body = {"data": [_item(lei) for lei in leis]}
+        if len(leis) == 1 and leis[0].startswith("0"):
+            body["links"] = {"next": base + "?page[number]=2"}
+        return 200, {}, json.dumps(body)
+
+    responses.add_callback(responses.GET, base, callback=callback)
+
+    session = make_session()
+    session.mount("https://", requests.adapters.HTTPAdapter())  # no urllib3 retries
+    sizer = AdaptiveBatchSizer(max_size=8)
+    client = GleifClient(session=session, throttle_s=0.0, sizer=sizer)
+
+    leis = [f"{i:020d}" for i in range(7)] + [bad]
+    out = client.lookup_batch(leis)
+
+    assert set(leis[:7]) <= set(out)
+    assert bad not in out
+    assert "PAGE2PAGE2PAGE2PAGE2" in out   # followed links.next
+    assert 1 <= sizer.current() <= 8
+
+
+def test_lean_fetch_uses_sparse_fields_and_gzip():
+    import random
+
+    from benchmarks.generate import make_lei
+    from benchmarks.standin import StandinServer
+    from lei_enricher.metrics import RunMetrics
+
+    rng = random.Random(3)
+    leis = [make_lei(rng) for _ in range(50)]
+    wire = {}
+    with StandinServer() as srv:
+        for lean in (False, True):
+            m = RunMetrics()
+            out = GleifClient(
+                throttle_s=0.0, base_url=srv.gleif_url, metrics=m, lean=lean
+            ).lookup_batch(leis)
+            assert len(out) == 50 and all(r.next_renewal_date for r in out.values())
+            c = m.to_dict()["counters"]
+            assert c["gleif_bytes_wire"] < c["gleif_bytes_body"]   # gzip negotiated
+            assert m.gleif_decode.n == 1
+            wire[lean] = c["gleif_bytes_wire"]
+    assert wire[True] < wire[False]
+
+
+@responses.activate
+def test_adaptive_outage_shrinks_then_gives_up():
+    import pytest
+
+    from lei_enricher.core import AdaptiveBatchSizer, GleifBatchError
+
+    base = "https://api.gleif.org/api/v1/lei-records"
+    responses.add(responses.GET, base, status=503)
+
+    session = make_session()
+    session.mount("https://", requests.adapters.HTTPAdapter())  # no urllib3 retries
+    sizer = AdaptiveBatchSizer(max_size=8)
+    client = GleifClient(session=session, throttle_s=0.0, sizer=sizer)
+    leis = [f"{i:020d}" for i in range(16)]
+    with pytest.raises(GleifBatchError):
+        client.lookup_batch(leis)
+
+    assert sizer.current() == 1
+    assert len(responses.calls) < len(leis)   # 3 single LEIs in a row failed: stop there
+    assert client.rejected == []
+    assert sorted(client.failed) == leis
+
+
+@responses.activate
+def test_adaptive_timeout_retries_smaller_and_keeps_going():
+    from lei_enricher.core import AdaptiveBatchSizer
+
+    slow = "SLOWSLOWSLOWSLOWSLOW"
+    base = "https://api.gleif.org/api/v1/lei-records"
+
+    def callback(request):
+        leis = parse_qs(urlparse(request.url).query)["filter[lei]"][0].split(",")
+        if slow in leis:
+            raise requests.exceptions.ReadTimeout("read timed out")
+        return 200, {}, json.dumps({"data": [_item(lei) for lei in leis]})
+
+    responses.add_callback(responses.GET, base, callback=callback)
+
+    session = make_session()
+    session.mount("https://", requests.adapters.HTTPAdapter())  # no urllib3 retries
+    client = GleifClient(session=session, throttle_s=0.0, sizer=AdaptiveBatchSizer(max_size=4))
+    leis = [f"{i:020d}" for i in range(19)]
+    leis.insert(5, slow)
+    batches = [leis[i : i + 4] for i in range(0, len(leis), 4)]
+    out = {}
+    for _, res in client.lookup_batches(batches):
+        out.update(res)
+
+    assert set(out) == set(leis) - {slow}   # batches after the slow one were still sent
+    assert client.failed == [slow] and client.rejected == []
+
+
+@responses.activate
+def test_adaptive_429_requeues_the_part(monkeypatch):
+    from lei_enricher.core import AdaptiveBatchSizer
+
+    monkeypatch.setattr("lei_enricher.core.time.sleep", lambda s: None)
+    base = "https://api.gleif.org/api/v1/lei-records"
+    responses.add(responses.GET, base, status=429)
+    responses.add(responses.GET, base, json={"data": [_item("213800NZT1VX6PZ7BT53")]})
+
+    session = make_session()
+    session.mount("https://", requests.adapters.HTTPAdapter())  # no urllib3 retries
+    client = GleifClient(session=session, throttle_s=0.0, sizer=AdaptiveBatchSizer(max_size=8))
+    out = client.lookup_batch(["213800NZT1VX6PZ7BT53"])
+
+    assert out["213800NZT1VX6PZ7BT53"].entity_status == "ACTIVE"
+    assert client.failed == [] and client.rejected == []
@@ -0,0 +1,66 @@
+import zipfile
+
+import responses
+
+from lei_enricher.engine import EnrichEngine
+from lei_enricher.golden import LeiIndex, ingest_file
+from tests._data import LEI_MISS, LEI_OK
+
+GOLDEN_CSV = """\
+"LEI","Entity.LegalName","Entity.EntityStatus","Registration.NextRenewalDate"
+"213800NZT1VX6PZ7BT53","Foo plc","ACTIVE","2026-09-29T00:00:00Z"
+"AAAABBBBCCCCDDDDEE34","Bar SA","ACTIVE","2025-01-01T00:00:00Z"
+"""
+
+DELTA_XML = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<lei:LEIData xmlns:lei="http://www.gleif.org/data/schema/leidata/2016">
+  <lei:LEIRecords>
+    <lei:LEIRecord>
+      <lei:LEI>AAAABBBBCCCCDDDDEE34</lei:LEI>
+      <lei:Entity><lei:EntityStatus>INACTIVE</lei:EntityStatus></lei:Entity>
+      <lei:Registration>
+        <lei:NextRenewalDate>2025-06-01T00:00:00Z</lei:NextRenewalDate>
+      </lei:Registration>
+    </lei:LEIRecord>
+    <lei:LEIRecord>
+      <lei:LEI>5493001KJTIIGC8Y1R12</lei:LEI>
+      <lei:Entity><lei:EntityStatus>ACTIVE</lei:EntityStatus></lei:Entity>
+      <lei:Registration>
+        <lei:NextRenewalDate>2027-02-02T00:00:00Z</lei:NextRenewalDate>
+      </lei:Registration>
+    </lei:LEIRecord>
+  </lei:LEIRecords>
+</lei:LEIData>
+"""
+
+
+def test_ingest_golden_then_delta(tmp_path):
+    golden = tmp_path / "golden.csv"
+    golden.write_text(GOLDEN_CSV, encoding="utf-8")
+    delta = tmp_path / "delta.zip"
+    with zipfile.ZipFile(delta, "w") as zf:
+        zf.writestr("delta.xml", DELTA_XML)
+
+    index = LeiIndex(str(tmp_path / "idx.sqlite"))
+    assert ingest_file(str(golden), index) == 2
+    assert ingest_file(str(delta), index, kind="delta") == 2
+
+    got = index.get_many(["213800NZT1VX6PZ7BT53", "AAAABBBBCCCCDDDDEE34", "5493001KJTIIGC8Y1R12"])
+    assert index.count() == 3
+    assert got["AAAABBBBCCCCDDDDEE34"] == ("INACTIVE", "2025-06-01T00:00:00Z")
+    assert got["213800NZT1VX6PZ7BT53"][0] == "ACTIVE"
+
+
+@responses.activate
+def test_engine_resolves_from_index_without_http(tmp_path, make_cfg):
+    golden = tmp_path / "golden.csv"
+    golden.write_text(GOLDEN_CSV, encoding="utf-8")
+    ingest_file(str(golden), LeiIndex(str(tmp_path / "idx.sqlite")))
+
+    cfg = make_cfg(index_db=str(tmp_path / "idx.sqlite"))
+    results = EnrichEngine(cfg).resolve([LEI_OK, LEI_MISS])
+
+    assert len(responses.calls) == 0
+    assert results[LEI_OK].source == "golden-copy"
+    assert results[LEI_MISS].entity_status == "ACTIVE"
@@ -0,0 +1,39 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")   # headless CI
+
+from PySide6 import QtCore  # noqa: E402
+
+from lei_enricher.core import LeiResult  # noqa: E402
+from lei_enricher.gui import EnrichWorker, ResultsModel  # noqa: E402
+
+
+def test_results_model_appends_and_updates_rows(qtbot):
+    model = ResultsModel()
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+
+    model.add_results({"A" * 20: LeiResult("ACTIVE", None, "gleif"), "B" * 20: LeiResult()})
+    model.add_results({"A" * 20: LeiResult("ACTIVE", "2026-09-29", "lei-lookup")})
+    model.add_results({"C" * 20: LeiResult("LAPSED", None, "cache")})
+
+    assert model.rowCount() == 3
+    assert inserted == [(0, 1), (2, 2)]   # one insert per coalesced update, none for updates
+    assert model.data(model.index(0, 2)) == "2026-09-29"
+    assert model.data(model.index(2, 1)) == "LAPSED"
+    assert model.headerData(3, QtCore.Qt.Horizontal) == "Source"
+
+
+def test_cancel_before_the_engine_exists_skips_the_job(qtbot, make_cfg):
+    cfg = make_cfg()
+    worker = EnrichWorker(cfg)
+    finished = []
+    worker.finished_ok.connect(finished.append)
+
+    worker.cancel()
+    with qtbot.waitSignal(worker.cancelled, timeout=10000):
+        worker.start()
+    worker.wait()
+
+    assert worker.engine is None and finished == []
+    assert not os.path.exists(cfg.output_path)
@@ -0,0 +1,103 @@
+import json
+import random
+import threading
+import urllib.error
+import urllib.request
+
+from benchmarks.generate import make_lei
+from benchmarks.standin import StandinServer
+from lei_enricher.core import GleifClient
+from lei_enricher.service import LeiService, ServiceConfig, make_server
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_service_coalesces_concurrent_misses(tmp_path):
+    rng = random.Random(7)
+    leis = [make_lei(rng) for _ in range(5)]
+
+    with StandinServer() as gleif_srv:
+        gleif = GleifClient(throttle_s=0.0, base_url=gleif_srv.gleif_url)
+        service = LeiService(
+            ServiceConfig(cache_db=str(tmp_path / "c.sqlite"), window_s=0.3), gleif
+        )
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            # 20 callers, 5 distinct LEIs -> one GLEIF request
+            answers = []
+            callers = [
+                threading.Thread(
+                    target=lambda lei=lei: answers.append(_get(f"{base}/lei/{lei.lower()}"))
+                )
+                for lei in leis * 4
+            ]
+            for t in callers:
+                t.start()
+            for t in callers:
+                t.join()
+
+            assert gleif_srv.counts["gleif"] == 1
+            assert sorted(status for status, _ in answers) == [200] * 20
+
+            # now served from the cache
+            req = urllib.request.Request(
+                f"{base}/lei/batch", data=json.dumps({"leis": leis[:2]}).encode(), method="POST"
+            )
+            with urllib.request.urlopen(req) as r:
+                results = json.loads(r.read())["results"]
+            assert {v["source"] for v in results.values()} == {"cache"}
+            assert gleif_srv.counts["gleif"] == 1
+            assert _get(f"{base}/lei/NOTANLEI")[0] == 400
+            for body in ({"leis": [None]}, {"leis": [leis[0], 7]}, {"leis": "x"}):
+                req = urllib.request.Request(
+                    f"{base}/lei/batch", data=json.dumps(body).encode(), method="POST"
+                )
+                try:
+                    urllib.request.urlopen(req)
+                except urllib.error.HTTPError as e:
+                    assert e.code == 400
+                else:
+                    raise AssertionError(body)
+            req = urllib.request.Request(
+                f"{base}/lei/batch", data=b'{"leis": ["", " "]}', method="POST"
+            )
+            with urllib.request.urlopen(req) as r:
+                assert json.loads(r.read()) == {"results": {}}   # invalid LEIs are left out
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.close()
+
+
+def test_service_outage_is_503_and_not_cached(tmp_path):
+    import requests
+
+    from lei_enricher.cache import LeiCache
+    from lei_enricher.core import make_session
+
+    lei = make_lei(random.Random(8))
+    session = make_session()
+    session.mount("http://", requests.adapters.HTTPAdapter())   # no urllib3 retries
+    with StandinServer(error_rate=1.0) as gleif_srv:
+        gleif = GleifClient(session=session, throttle_s=0.0, base_url=gleif_srv.gleif_url)
+        service = LeiService(
+            ServiceConfig(cache_db=str(tmp_path / "c.sqlite"), window_s=0.0), gleif
+        )
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            assert _get(f"{base}/lei/{lei}")[0] == 503
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.close()
+    assert LeiCache(str(tmp_path / "c.sqlite")).get_misses([lei], 30) == {}